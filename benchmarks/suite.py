@@ -0,0 +1,360 @@
+import csv
+import importlib.util
+import json
+import os
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import typer
+from datetime import date, datetime, timedelta
+from typing import List
+from rich.console import Console
+from rich.table import Table
+
+app = typer.Typer()
+console = Console()
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MAIN = os.path.join(PROJECT_ROOT, "main.py")
+
+SIZES = {"10k": 10_000, "1m": 1_000_000, "10m": 10_000_000}
+MONTHS = 36  # History covered by a generated ledger, ending on --end
+IMPORT_ROWS = 10_000  # Rows in each file imported by the import case
+NOISE_MS = 20  # Differences smaller than this are never reported as regressions
+
+# (category, relative frequency, smallest and largest amount in paisa)
+EXPENSES = [
+    ("Groceries", 30, 5_000, 400_000),
+    ("Food", 25, 8_000, 150_000),
+    ("Transport", 15, 2_000, 80_000),
+    ("Shopping", 10, 20_000, 1_500_000),
+    ("Entertainment", 8, 10_000, 300_000),
+    ("Utilities", 4, 50_000, 600_000),
+    ("Health", 3, 20_000, 2_000_000),
+    ("Education", 2, 100_000, 5_000_000),
+    ("Travel", 2, 200_000, 8_000_000),
+    ("Rent", 1, 1_500_000, 4_000_000),
+]
+INCOME = [("Salary", 6), ("Freelance", 3), ("Interest", 1)]
+INCOME_SHARE = 0.04  # Fraction of rows that are income
+DESCRIPTIONS = ["Card payment", "UPI transfer", "Cash", "Online order", "Monthly bill", "Refund adjustment"]
+
+# Entry points timed per ledger size. "{delete_id}" and "{run}" are filled
+# in per run; the cases that change the ledger come last.
+CASES = [
+    ("transactions list", "transactions list --limit 50"),
+    ("transactions list (last 7 days)", "transactions list --last-days 7 --limit 500"),
+    ("transactions balance", "transactions balance"),
+    ("budgets list", "budgets list"),
+    ("analytics report", "analytics report"),
+    ("analytics income-report", "analytics income-report"),
+    ("analytics health-score", "analytics health-score"),
+    ("analytics trend", "analytics trend"),
+    ("smart-assistant recommend", "smart-assistant recommend"),
+    ("smart-assistant anomalies", "smart-assistant anomalies --limit 50"),
+    ("data export transactions", "data export transactions csv --path export.csv"),
+    ("data export budgets", "data export budgets json --path budgets.json"),
+    ("dashboard loaders", None),
+    ("transactions delete", "transactions delete {delete_id} --yes"),
+    ("data import transactions", "data import-data transactions csv --path import-{run}.csv --restart"),
+]
+
+# Prefixed to every timed process: writes its peak RSS (kB) to the file
+# named by BENCHMARK_PEAK_FILE on exit. ru_maxrss cannot be used, as Linux
+# carries the parent's peak over into the child at exec.
+PEAK = """
+import atexit, os
+def _peak():
+    with open("/proc/self/status") as status, open(os.environ["BENCHMARK_PEAK_FILE"], "w") as f:
+        f.write(next(line.split()[1] for line in status if line.startswith("VmHWM:")))
+atexit.register(_peak)
+"""
+
+# Runs main.py with the arguments that follow the code
+CLI = f"""
+import runpy, sys
+sys.path.insert(0, {PROJECT_ROOT!r})
+sys.argv = sys.argv[1:]
+runpy.run_path(sys.argv[0], run_name="__main__")
+"""
+
+# Does what the dashboard does on a cold start: total the current month
+# and build the frames of the newest rows and of the budgets
+DASHBOARD = f"""
+import sys
+sys.path.insert(0, {PROJECT_ROOT!r})
+from dashboard.loaders import budgets_frame, month_totals, recent_frame
+from features.ledger.storage import get_storage
+from features.ledger.timecodec import current_month_key
+storage = get_storage()
+month_totals(storage, current_month_key())
+recent_frame(storage)
+budgets_frame(storage)
+"""
+
+# Builds every sidecar once, so the timed runs measure steady state
+WARM = f"""
+import sys
+sys.path.insert(0, {PROJECT_ROOT!r})
+from features.ledger.storage import get_storage
+storage = get_storage(daemon=False)
+storage.history_totals()
+storage.find(storage.load().row(0)[0])
+next(storage.latest(limit=1), None)
+"""
+
+
+def _id(rng: random.Random):
+    """A version 4 UUID string drawn from rng, so IDs repeat with the seed."""
+    bits = rng.getrandbits(128) & ~(0xF << 76) | (0x4 << 76)
+    bits = bits & ~(0x3 << 62) | (0x2 << 62)
+    hex = f"{bits:032x}"
+    return f"{hex[:8]}-{hex[8:12]}-{hex[12:16]}-{hex[16:20]}-{hex[20:]}"
+
+def generate_rows(rows: int, seed: int, end: date, span_months: int = MONTHS):
+    """Yields (id, timestamp, type, category, amount_paisa, description) in time order.
+
+    The same rows, seed and end date always give the same ledger. Rows are
+    spread evenly over span_months months up to the end of the end date, and
+    income is sized to run about 20% ahead of spending.
+    """
+    rng = random.Random(seed)
+    finish = datetime.combine(end, datetime.min.time()) + timedelta(days=1)
+    start = finish - timedelta(days=round(span_months * 30.44))
+    span = int((finish - start).total_seconds())
+    categories = [category for category, _, _, _ in EXPENSES]
+    weights = [weight for _, weight, _, _ in EXPENSES]
+    bounds = {category: (low, high) for category, _, low, high in EXPENSES}
+    mean_expense = sum(weight * (low + high) / 2 for _, weight, low, high in EXPENSES) / sum(weights)
+    mean_income = 1.2 * mean_expense * (1 - INCOME_SHARE) / INCOME_SHARE
+    days = {}
+    for row in range(rows):
+        offset = row * span // rows
+        day, second = divmod(offset, 86400)
+        prefix = days.get(day)
+        if prefix is None:
+            prefix = days[day] = (start + timedelta(days=day)).strftime("%Y-%m-%d")
+        timestamp = f"{prefix} {second // 3600:02d}:{second // 60 % 60:02d}:{second % 60:02d}"
+        if rng.random() < INCOME_SHARE:
+            category = rng.choices([name for name, _ in INCOME], [weight for _, weight in INCOME])[0]
+            amount = int(rng.uniform(0.5, 1.5) * mean_income)
+            yield _id(rng), timestamp, "income", category, amount, f"{category} credit"
+        else:
+            category = rng.choices(categories, weights)[0]
+            low, high = bounds[category]
+            yield _id(rng), timestamp, "expense", category, rng.randint(low, high), rng.choice(DESCRIPTIONS)
+
+def write_ledger(directory: str, rows: int, seed: int, end: date, samples: int = 0):
+    """Writes database/transactions.txt and budgets.txt under directory.
+
+    Budgets are each category's average monthly spending scaled by 0.8-1.2,
+    so some categories run over. Returns up to samples IDs spread through
+    the ledger, for the delete case.
+    """
+    database = os.path.join(directory, "database")
+    os.makedirs(database, exist_ok=True)
+    spent = {}
+    ids, every = [], max(1, rows // samples) if samples else 0
+    with open(os.path.join(database, "transactions.txt"), "w") as f:
+        lines = []
+        for number, (id, timestamp, type, category, amount, description) in enumerate(generate_rows(rows, seed, end)):
+            lines.append(f"{id},{timestamp},{type},{category},{amount},{description}\n")
+            if type == "expense":
+                spent[category] = spent.get(category, 0) + amount
+            if every and number % every == 0 and len(ids) < samples:
+                ids.append(id)
+            if len(lines) >= 100_000:
+                f.writelines(lines)
+                lines = []
+        f.writelines(lines)
+    rng = random.Random(seed + 1)
+    with open(os.path.join(database, "budgets.txt"), "w") as f:
+        for category, _, _, _ in EXPENSES:
+            f.write(f"{category},{int(spent.get(category, 0) / MONTHS * rng.uniform(0.8, 1.2))}\n")
+    return ids
+
+def write_import(path: str, rows: int, seed: int, end: date):
+    """Writes rows new transactions in the export CSV layout, dated within the last month."""
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["ID", "Timestamp", "Type", "Category", "Amount", "Description"])
+        writer.writerows(generate_rows(rows, seed, end, span_months=1))
+
+
+def measure(code: str, args: list, cwd: str, env: dict):
+    """Runs Python code with arguments and returns (wall ms, CPU ms, peak RSS in MB, exit code, output)."""
+    with tempfile.TemporaryFile() as output, tempfile.NamedTemporaryFile("r") as peak:
+        start = time.perf_counter()
+        process = subprocess.Popen([sys.executable, "-c", PEAK + code, *args], cwd=cwd, env=dict(env, BENCHMARK_PEAK_FILE=peak.name),
+                                   stdout=output, stderr=subprocess.STDOUT, stdin=subprocess.DEVNULL)
+        # wait4 reports the CPU time of this child alone
+        _, status, usage = os.wait4(process.pid, 0)
+        wall = (time.perf_counter() - start) * 1000
+        output.seek(0)
+        text = output.read().decode(errors="replace")
+        rss = int(peak.read() or 0) / 1024
+    return wall, (usage.ru_utime + usage.ru_stime) * 1000, rss, os.waitstatus_to_exitcode(status), text
+
+def run_size(label: str, rows: int, seed: int, end: date, engine: str, jobs: int, runs: int, scratch: str):
+    directory = tempfile.mkdtemp(prefix=f"finance-bench-{label}-", dir=scratch)
+    env = dict(os.environ, FINANCE_TRACKER_STORAGE=engine, FINANCE_TRACKER_JOBS=str(jobs), FINANCE_TRACKER_DAEMON="off")
+    try:
+        with console.status(f"Generating {rows:,} transactions..."):
+            start = time.perf_counter()
+            delete_ids = write_ledger(directory, rows, seed, end, samples=runs)
+            for run in range(runs):
+                write_import(os.path.join(directory, f"import-{run}.csv"), IMPORT_ROWS, seed + 100 + run, end)
+            if engine != "text":
+                subprocess.run([sys.executable, MAIN, "data", "migrate", engine], cwd=directory, env=env, capture_output=True, check=True)
+            generate_s = time.perf_counter() - start
+            subprocess.run([sys.executable, "-c", WARM], cwd=directory, env=env, capture_output=True, check=True)
+        size = sum(os.path.getsize(os.path.join(directory, "database", name)) for name in os.listdir(os.path.join(directory, "database")))
+
+        results = []
+        for name, command in CASES:
+            if command is None and importlib.util.find_spec("pandas") is None:
+                console.print(f"[bold yellow]Skipping {name}: pandas is not installed.[/bold yellow]")
+                continue
+            samples = []
+            with console.status(f"{label}: {name}..."):
+                for run in range(runs):
+                    if command is None:
+                        code, args = DASHBOARD, []
+                    else:
+                        code, args = CLI, [MAIN, *command.format(delete_id=delete_ids[run % len(delete_ids)], run=run).split()]
+                    wall, cpu, rss, exit_code, output = measure(code, args, directory, env)
+                    if exit_code or "Error" in output:
+                        console.print(f"[bold red]Error:[/bold red] '{name}' failed on {label}:\n{output.strip()[-2000:]}", markup=False)
+                        raise typer.Exit(1)
+                    samples.append((wall, cpu, rss))
+            results.append({
+                "name": name,
+                "command": command or "dashboard loaders",
+                "wall_ms": round(statistics.median(wall for wall, _, _ in samples), 1),
+                "cpu_ms": round(statistics.median(cpu for _, cpu, _ in samples), 1),
+                "max_rss_mb": round(max(rss for _, _, rss in samples), 1),
+                "runs_ms": [round(wall, 1) for wall, _, _ in samples],
+            })
+        return {"size": label, "rows": rows, "database_bytes": size, "generate_s": round(generate_s, 2), "cases": results}
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+def compare(results: dict, baseline: dict, tolerance: float):
+    """Prints each case against the baseline and returns the number of regressions."""
+    before = {(size["size"], case["name"]): case for size in baseline.get("sizes", []) for case in size["cases"]}
+    table = Table(title="Against Baseline")
+    table.add_column("Size")
+    table.add_column("Case")
+    table.add_column("Baseline (ms)")
+    table.add_column("Now (ms)")
+    table.add_column("Change")
+    table.add_column("RSS Change (MB)")
+    regressions = 0
+    for size in results["sizes"]:
+        for case in size["cases"]:
+            old = before.get((size["size"], case["name"]))
+            if old is None:
+                continue
+            change = (case["wall_ms"] - old["wall_ms"]) / old["wall_ms"] * 100 if old["wall_ms"] else 0
+            slower = case["wall_ms"] > old["wall_ms"] * (1 + tolerance) and case["wall_ms"] - old["wall_ms"] > NOISE_MS
+            regressions += slower
+            color = "red" if slower else "green" if change < 0 else "white"
+            table.add_row(size["size"], case["name"], f"{old['wall_ms']:.1f}", f"{case['wall_ms']:.1f}",
+                          f"[{color}]{change:+.1f}%[/{color}]", f"{case['max_rss_mb'] - old['max_rss_mb']:+.1f}")
+    console.print(table)
+    return regressions
+
+@app.command()
+def run(
+    sizes: List[str] = typer.Option(list(SIZES), "--size", help="Ledger sizes to benchmark (10k, 1m, 10m); repeat to pick several."),
+    engine: str = typer.Option("text", help="Storage engine to benchmark (text, binary, sqlite or partitioned)."),
+    jobs: int = typer.Option(1, help="Worker processes the commands use for full-history scans (their --jobs); 0 uses every core."),
+    runs: int = typer.Option(3, help="Runs per command; the median time and the peak memory are reported."),
+    seed: int = typer.Option(42, help="Seed for the generated data."),
+    end: str = typer.Option(None, help="Last day of the generated history (YYYY-MM-DD). Defaults to today, so current-month reports have data."),
+    scratch: str = typer.Option(None, help="Directory for the generated ledgers. Defaults to the system temporary directory; 10m needs about 3 GB."),
+    output: str = typer.Option(None, "--json", help="Write the results to this JSON file."),
+    baseline: str = typer.Option(None, help="JSON results of an earlier run to compare against."),
+    tolerance: float = typer.Option(0.25, help="Slowdown over the baseline, as a fraction, that counts as a regression."),
+):
+    """Time and memory-profile every command against generated ledgers of each size."""
+    unknown = [size for size in sizes if size not in SIZES]
+    if unknown:
+        console.print(f"[bold red]Error:[/bold red] Unknown size '{unknown[0]}'. Choose from: {', '.join(SIZES)}.")
+        raise typer.Exit(1)
+    if runs <= 0:
+        console.print("[bold red]Error:[/bold red] --runs must be positive.")
+        raise typer.Exit(1)
+    if jobs < 0:
+        console.print("[bold red]Error:[/bold red] --jobs must be 0 (every core) or more.")
+        raise typer.Exit(1)
+    try:
+        end_date = datetime.strptime(end, "%Y-%m-%d").date() if end else date.today()
+    except ValueError:
+        console.print(f"[bold red]Error:[/bold red] Invalid date '{end}'. Please use YYYY-MM-DD.")
+        raise typer.Exit(1)
+
+    results = {
+        "python": sys.version.split()[0],
+        "engine": engine,
+        "jobs": jobs,
+        "seed": seed,
+        "end": end_date.isoformat(),
+        "runs": runs,
+        "started": datetime.now().isoformat(timespec="seconds"),
+        "sizes": [run_size(size, SIZES[size], seed, end_date, engine, jobs, runs, scratch) for size in sizes],
+    }
+
+    table = Table(title=f"Benchmarks ({engine} engine, {jobs or 'all'} jobs, median of {runs})")
+    table.add_column("Case")
+    for size in results["sizes"]:
+        table.add_column(f"{size['size']} (ms)")
+        table.add_column(f"{size['size']} RSS (MB)")
+    for name, _ in CASES:
+        cells = []
+        for size in results["sizes"]:
+            case = next((case for case in size["cases"] if case["name"] == name), None)
+            cells += [f"{case['wall_ms']:.1f}", f"{case['max_rss_mb']:.1f}"] if case else ["-", "-"]
+        table.add_row(name, *cells)
+    console.print(table)
+    for size in results["sizes"]:
+        console.print(f"{size['size']}: generated {size['rows']:,} rows ({size['database_bytes'] / 1e6:.1f} MB) in {size['generate_s']:.1f}s")
+
+    if output:
+        with open(output, "w") as f:
+            json.dump(results, f, indent=4)
+        console.print(f"Results written to {output}")
+    if baseline:
+        with open(baseline, "r") as f:
+            regressions = compare(results, json.load(f), tolerance)
+        if regressions:
+            console.print(f"[bold red]{regressions} case(s) slower than the baseline by more than {tolerance:.0%}.[/bold red]")
+            raise typer.Exit(1)
+        console.print("[bold green]No regressions against the baseline.[/bold green]")
+
+@app.command()
+def generate(
+    size: str = typer.Argument(..., help="Ledger size (10k, 1m or 10m), or a number of rows."),
+    directory: str = typer.Option(".", "--dir", help="Directory to write database/ into."),
+    seed: int = typer.Option(42, help="Seed for the generated data."),
+    end: str = typer.Option(None, help="Last day of the generated history (YYYY-MM-DD). Defaults to today."),
+):
+    """Write a generated ledger and budgets into a database/ directory, for trying commands by hand."""
+    try:
+        rows = SIZES[size] if size in SIZES else int(size)
+        end_date = datetime.strptime(end, "%Y-%m-%d").date() if end else date.today()
+    except ValueError:
+        console.print("[bold red]Error:[/bold red] size must be 10k, 1m, 10m or a number, and --end must be YYYY-MM-DD.")
+        raise typer.Exit(1)
+    if os.path.exists(os.path.join(directory, "database", "transactions.txt")):
+        console.print(f"[bold red]Error:[/bold red] {os.path.join(directory, 'database')} already holds transactions.")
+        raise typer.Exit(1)
+    write_ledger(directory, rows, seed, end_date)
+    console.print(f"[bold green]Wrote {rows:,} transactions to {os.path.join(directory, 'database')}.[/bold green]")
+
+if __name__ == "__main__":
+    app()
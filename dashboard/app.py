@@ -1,9 +1,9 @@
 import streamlit as st
 import pandas as pd
-from datetime import datetime
+import numpy as np
+import json
 import os
 import sys
-import calendar
 
 # Add the project root to the Python path
 script_dir = os.path.dirname(__file__)
@@ -13,64 +13,51 @@ sys.path.insert(0, project_root)
 # Import functions/logic from CLI features to reuse data reading
 # We need to explicitly import from the correct paths
 # Assuming 'database' is relative to the project root
-# For get_month_range, we can reuse the one from analytics or transactions
-from features.analytics.analytics import get_month_range
+import features.ledger.ledger as ledger_module
+from features.ledger.storage import get_storage
+from features.ledger.workspaces import ledger_dir
+from features.ledger.timecodec import current_month_key
+from dashboard.loaders import budgets_frame, month_totals, recent_frame
+
+# The dashboard can be started from any directory; FINANCE_TRACKER_LEDGER
+# shows a named ledger (see `main.py ledgers list`) instead of database/
+ledger_name = os.environ.get("FINANCE_TRACKER_LEDGER")
+ledger_module.DATABASE_DIR = os.path.join(project_root, ledger_dir(ledger_name) if ledger_name else "database")
 
 st.set_page_config(layout="wide", page_title="Personal Finance Dashboard")
 
 st.title("💰 Personal Finance Dashboard")
+if ledger_name:
+    st.caption(f"Ledger: {ledger_name}")
 
 # --- Helper Functions to Read and Process Data ---
 
-def load_transactions():
-    transactions_path = os.path.join(project_root, "database", "transactions.txt")
-    if not os.path.exists(transactions_path):
-        return pd.DataFrame(columns=["ID", "Timestamp", "Type", "Category", "Amount", "Description"])
-    
-    data = []
-    with open(transactions_path, "r") as f:
-        for line in f:
-            parts = line.strip().split(",")
-            if len(parts) == 6: # Ensure correct number of columns
-                data.append(parts)
-    
-    df = pd.DataFrame(data, columns=["ID", "Timestamp", "Type", "Category", "Amount", "Description"])
-    df["Amount"] = pd.to_numeric(df["Amount"]) / 100 # Convert paisa to actual amount
-    df["Timestamp"] = pd.to_datetime(df["Timestamp"])
-    return df
-
-def load_budgets():
-    budgets_path = os.path.join(project_root, "database", "budgets.txt")
-    if not os.path.exists(budgets_path):
-        return pd.DataFrame(columns=["Category", "Budget"])
-    
-    data = []
-    with open(budgets_path, "r") as f:
-        for line in f:
-            parts = line.strip().split(",")
-            if len(parts) == 2: # Ensure correct number of columns
-                data.append(parts)
-    
-    df = pd.DataFrame(data, columns=["Category", "Budget"])
-    df["Budget"] = pd.to_numeric(df["Budget"]) / 100 # Convert paisa to actual amount
-    return df
+@st.cache_data(max_entries=4)
+def _frames(key, month):
+    storage = get_storage()
+    return month_totals(storage, month), recent_frame(storage), budgets_frame(storage)
 
-# --- Load Data ---
-transactions_df = load_transactions()
-budgets_df = load_budgets()
+def load_frames():
+    """Returns this month's totals, the newest transactions and the budgets.
+
+    They come from storage queries, which a running daemon answers from
+    memory. Keyed on the storage fingerprint, so the queries are only rerun
+    after a change.
+    """
+    return _frames(json.dumps(get_storage().fingerprint(), sort_keys=True), current_month_key())
 
-# --- Current Month Filtering ---
-now = datetime.now()
-current_month_start, current_month_end = get_month_range(now) # Reusing CLI helper
+# --- Load Data ---
+current_month_totals, recent_transactions, budgets_df = load_frames()
 
-current_month_transactions = transactions_df[
-    (transactions_df["Timestamp"] >= current_month_start) & 
-    (transactions_df["Timestamp"] <= current_month_end)
-].copy() # Use .copy() to avoid SettingWithCopyWarning
+# --- Current Month Totals ---
+# One query for this month's totals feeds the summary, the spending chart
+# and the budget table
+no_amounts = pd.Series(dtype="int64")
+current_month_expenses = current_month_totals.get("expense", no_amounts)
 
 # --- Financial Summary ---
-total_income = current_month_transactions[current_month_transactions["Type"] == "income"]["Amount"].sum()
-total_expenses = current_month_transactions[current_month_transactions["Type"] == "expense"]["Amount"].sum()
+total_income = current_month_totals.get("income", no_amounts).sum() / 100
+total_expenses = current_month_expenses.sum() / 100
 balance = total_income - total_expenses
 
 st.subheader("📊 Current Month Summary")
@@ -83,8 +70,8 @@ st.markdown("---")
 
 # --- Recent Transactions ---
 st.subheader("💸 Recent Transactions")
-# Sort by timestamp, newest first
-recent_transactions = transactions_df.sort_values(by="Timestamp", ascending=False).head(10)
+if not recent_transactions.empty:
+    recent_transactions["Amount"] = recent_transactions["Amount"] / 100 # Convert paisa to actual amount
 
 # Apply color based on transaction type
 def color_amount_row(row):
@@ -105,10 +92,9 @@ st.markdown("---")
 
 # --- Spending Breakdown (Current Month) ---
 st.subheader("📈 Spending Breakdown (Current Month)")
-if not current_month_transactions.empty:
-    expense_breakdown = current_month_transactions[current_month_transactions["Type"] == "expense"]
-    if not expense_breakdown.empty:
-        expense_by_category = expense_breakdown.groupby("Category")["Amount"].sum().sort_values(ascending=False)
+if current_month_totals:
+    if not current_month_expenses.empty:
+        expense_by_category = current_month_expenses.sort_values(ascending=False) / 100
         st.bar_chart(expense_by_category)
     else:
         st.info("No expenses recorded this month.")
@@ -120,27 +106,18 @@ st.markdown("---")
 # --- Budget Performance (Current Month) ---
 st.subheader("🎯 Budget Performance (Current Month)")
 if not budgets_df.empty:
-    budget_performance_data = []
-    for index, budget_row in budgets_df.iterrows():
-        category = budget_row["Category"]
-        budget_amount = budget_row["Budget"]
-        spent_amount = current_month_transactions[
-            (current_month_transactions["Type"] == "expense") & 
-            (current_month_transactions["Category"] == category)
-        ]["Amount"].sum()
-        
-        remaining = budget_amount - spent_amount
-        utilization = (spent_amount / budget_amount * 100) if budget_amount > 0 else 0
-
-        budget_performance_data.append({
-            "Category": category,
-            "Budget": budget_amount,
-            "Spent": spent_amount,
-            "Remaining": remaining,
-            "Utilization (%)": utilization
-        })
-    
-    budget_performance_df = pd.DataFrame(budget_performance_data)
+    budget_paisa = budgets_df["Budget"].to_numpy()
+    spent_paisa = current_month_expenses.reindex(budgets_df["Category"], fill_value=0).to_numpy()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        utilization = np.where(budget_paisa > 0, spent_paisa / budget_paisa * 100, 0.0)
+
+    budget_performance_df = pd.DataFrame({
+        "Category": budgets_df["Category"],
+        "Budget": budget_paisa / 100,
+        "Spent": spent_paisa / 100,
+        "Remaining": (budget_paisa - spent_paisa) / 100,
+        "Utilization (%)": utilization,
+    })
     
     # Apply color based on utilization for the table
     def color_utilization_cell(val):
@@ -0,0 +1,41 @@
+import pandas as pd
+
+# The DataFrames behind the dashboard, built without Streamlit so they can
+# also be benchmarked (see benchmarks/suite.py). app.py adds the caching.
+#
+# Each comes from a storage query: month totals, the newest rows and the
+# budgets. Through get_storage() those are answered by the daemon when one
+# is serving the ledger (see `main.py serve`), and read from the files
+# otherwise; the whole ledger is never loaded.
+
+TRANSACTION_COLUMNS = ["ID", "Timestamp", "Type", "Category", "Amount", "Description"]
+
+def recent_frame(storage, count: int = 10):
+    """Returns the newest count transactions, newest first, with Amount in int64 paisa."""
+    try:
+        rows = list(storage.latest(limit=count))
+    except FileNotFoundError:
+        rows = []
+    df = pd.DataFrame(rows, columns=TRANSACTION_COLUMNS)
+    df["Timestamp"] = pd.to_datetime(df["Timestamp"], format="%Y-%m-%d %H:%M:%S")
+    df["Amount"] = df["Amount"].astype("int64")
+    return df
+
+def budgets_frame(storage):
+    """Returns the budgets as Category and Budget columns, in paisa like transaction amounts."""
+    try:
+        budgets = storage.load_budgets()
+    except FileNotFoundError:
+        return pd.DataFrame({"Category": pd.Series(dtype=object), "Budget": pd.Series(dtype="int64")})
+    return pd.DataFrame({
+        "Category": pd.Series(list(budgets.keys()), dtype=object),
+        "Budget": pd.Series(list(budgets.values()), dtype="int64"),
+    })
+
+def month_totals(storage, month):
+    """Returns a month's totals as {type: Series of paisa by category name}."""
+    try:
+        totals = storage.month_totals(month)
+    except FileNotFoundError:
+        return {}
+    return {type: pd.Series(categories, dtype="int64") for type, categories in totals.items()}
@@ -1,72 +1,116 @@
 import typer
 from rich.console import Console
-from rich.table import Table
-from datetime import datetime, timedelta
-import calendar
+import itertools
+from datetime import datetime
+from features.analytics.metrics import month_metrics, total_score
+from features.analytics.trends import category_trends, load_matrix, monthly_trend
+from features.ledger import parallel
+from features.ledger.storage import get_storage
+from features.ledger.workspaces import each_ledger, ledgers_root
+from features.ledger.timecodec import month_key_of, month_name, month_of_key
+from features.output.formats import check_format, money, page_window, paginate, status_console, write_rows
 
 app = typer.Typer()
 console = Console()
 
-def get_month_range(date: datetime):
-    first_day = date.replace(day=1)
-    last_day = date.replace(day=calendar.monthrange(date.year, date.month)[1])
-    return first_day, last_day
+ALL_LEDGERS_JOBS_HELP = ("Worker processes for full-history scans, or for the ledgers with --all-ledgers; 0 uses every core. "
+                         "Defaults to 1, or to every core with --all-ledgers.")
+SCORE_FIELDS = ["savings_rate", "budget_adherence", "income_vs_expenses", "debt_management"]
+
+def ledgers_metrics(out, skipped: list):
+    """Yields (ledger, metrics) for the current month of every named ledger with budgets, computed by the worker pool.
+
+    Ledgers without transactions or budgets are added to skipped; failures are printed.
+    """
+    for name, metrics, error in each_ledger(month_metrics, month_key_of(datetime.now())):
+        if error is not None:
+            out.print(f"[bold red]Error:[/bold red] Ledger {name}: {error}")
+        elif metrics is None or metrics["budgets"] is None:
+            skipped.append(name)
+        else:
+            yield name, metrics
+
+def print_ledgers_table(out, title: str, columns: list, rows, skipped: list):
+    """Prints consolidated rows as one table, or says that no ledger had any."""
+    from rich.table import Table # Deferred until a table is printed
+    table = Table(title=title)
+    table.add_column("Ledger", style="cyan", no_wrap=True)
+    for column in columns:
+        table.add_column(column)
+    for row in rows:
+        table.add_row(*map(str, row))
+    if table.row_count:
+        console.print(table)
+    elif not skipped:
+        out.print(f"[bold yellow]No ledgers found in {ledgers_root()}.[/bold yellow]")
+
+def report_skipped(out, skipped: list):
+    if skipped:
+        out.print(f"[bold yellow]Ledgers left out for lack of transactions or budgets: {len(skipped)}.[/bold yellow]")
 
 @app.command()
-def report():
+def report(limit: int = typer.Option(None, help="Show at most this many categories (the page size with --page)."),
+           page: int = typer.Option(None, help="Show this page of categories, counting from 1."),
+           format: str = typer.Option("table", "--format", "-f", help="Output format: table, plain, csv or jsonl. Other formats print the budget rows only."),
+           all_ledgers: bool = typer.Option(False, "--all-ledgers", help="Report on every ledger under ledgers/ at once, one row per ledger and budget."),
+           jobs: int = typer.Option(None, "--jobs", envvar="FINANCE_TRACKER_JOBS", help=ALL_LEDGERS_JOBS_HELP)):
     """Generate a report of expenses by category and compare with budget."""
+    out = console
     try:
-        # Read budgets
-        budgets = {}
-        with open("database/budgets.txt", "r") as f:
-            for line in f:
-                category, amount_paisa = line.strip().split(",")
-                budgets[category] = int(amount_paisa)
-
-        # Initialize expense data for current and previous month
-        current_month_expenses = {}
-        previous_month_expenses = {}
-        total_current_month_expense_paisa = 0
-        total_previous_month_expense_paisa = 0
-
+        check_format(format)
+        parallel.set_jobs(jobs if jobs is not None else 0 if all_ledgers else 1)
+        out = status_console(format, console)
+        limit, offset = page_window(limit, page)
+        if all_ledgers:
+            skipped = []
+            rows = paginate(((name, category, money(usage["budget"]), money(usage["spent"]), money(usage["remaining"]))
+                             for name, metrics in ledgers_metrics(out, skipped)
+                             for category, usage in metrics["adherence"].items()), limit, offset)
+            if format != "table":
+                write_rows(format, ["ledger", "category", "budget", "spent", "remaining"], rows)
+            else:
+                print_ledgers_table(out, "Expense Report (Current Month, All Ledgers)", ["Category", "Budget", "Spent", "Remaining"], rows, skipped)
+            report_skipped(out, skipped)
+            return
         now = datetime.now()
-        current_month_start, current_month_end = get_month_range(now)
-        
-        previous_month_date = now.replace(day=1) - timedelta(days=1)
-        previous_month_start, previous_month_end = get_month_range(previous_month_date)
-
-
-        with open("database/transactions.txt", "r") as f:
-            for line in f:
-                try:
-                    _, timestamp_str, type, category, amount_paisa, _ = line.strip().split(",", 5)
-                    transaction_date = datetime.strptime(timestamp_str, "%Y-%m-%d %H:%M:%S")
-                    amount = int(amount_paisa)
-
-                    if type == "expense":
-                        if current_month_start <= transaction_date <= current_month_end:
-                            current_month_expenses[category] = current_month_expenses.get(category, 0) + amount
-                            total_current_month_expense_paisa += amount
-                        elif previous_month_start <= transaction_date <= previous_month_end:
-                            previous_month_expenses[category] = previous_month_expenses.get(category, 0) + amount
-                            total_previous_month_expense_paisa += amount
-                except ValueError:
-                    console.print(f"[bold yellow]Skipping malformed transaction line: {line.strip()}[/bold yellow]")
+        current_month = month_key_of(now)
+        previous_month = current_month - 1
+
+        # Month metrics come from the shared cache, not a rescan of history
+        storage = get_storage()
+        current = month_metrics(current_month, storage)
+        previous = month_metrics(previous_month, storage)
+        budgets = current["budgets"]
+        if budgets is None:
+            raise FileNotFoundError("No budgets found.")
+
+        for line in current["malformed"]:
+            out.print(f"[bold yellow]Skipping malformed transaction line: {line}[/bold yellow]")
+
+        adherence = paginate(current["adherence"].items(), limit, offset)
+        if format != "table":
+            write_rows(format, ["category", "budget", "spent", "remaining"],
+                       ((category, money(usage["budget"]), money(usage["spent"]), money(usage["remaining"]))
+                        for category, usage in adherence))
+            return
+
+        current_month_expenses = current["expenses_by_category"]
+        previous_month_expenses = previous["expenses_by_category"]
+        total_current_month_expense_paisa = sum(current_month_expenses.values())
+        total_previous_month_expense_paisa = sum(previous_month_expenses.values())
         
         # --- Expense Report Table (existing logic) ---
+        from rich.table import Table # Deferred until a table is printed
         table = Table(title="Expense Report (Current Month)")
         table.add_column("Category")
         table.add_column("Budget")
         table.add_column("Spent")
         table.add_column("Remaining")
 
-        for category, budget_paisa in budgets.items():
-            spent_paisa = current_month_expenses.get(category, 0)
-            remaining_paisa = budget_paisa - spent_paisa
-            
-            budget = budget_paisa / 100
-            spent = spent_paisa / 100
-            remaining = remaining_paisa / 100
+        for category, usage in adherence:
+            budget = usage["budget"] / 100
+            spent = usage["spent"] / 100
+            remaining = usage["remaining"] / 100
 
             table.add_row(category, f"{budget:.2f}", f"{spent:.2f}", f"{remaining:.2f}")
 
@@ -82,7 +126,7 @@ def report():
             console.print(f"{i+1}. {category}: {amount_paisa / 100:.2f}")
         
         # Average daily expense
-        days_in_current_month = (now - current_month_start).days + 1
+        days_in_current_month = now.day
         if days_in_current_month > 0:
             avg_daily_expense = (total_current_month_expense_paisa / days_in_current_month) / 100
             console.print(f"\n[bold]Average Daily Expense:[/bold] {avg_daily_expense:.2f}")
@@ -95,7 +139,7 @@ def report():
         previous_month_total = total_previous_month_expense_paisa / 100
         
         console.print(f"Current Month ({now.strftime('%B')}): {current_month_total:.2f}")
-        console.print(f"Previous Month ({previous_month_date.strftime('%B')}): {previous_month_total:.2f}")
+        console.print(f"Previous Month ({month_name(previous_month)}): {previous_month_total:.2f}")
 
         if previous_month_total > 0:
             change_percent = ((current_month_total - previous_month_total) / previous_month_total) * 100
@@ -127,51 +171,50 @@ def report():
 
 
     except FileNotFoundError:
-        console.print("[bold yellow]No budgets or transactions found.[/bold yellow]")
+        out.print("[bold yellow]No budgets or transactions found.[/bold yellow]")
     except Exception as e:
-        console.print(f"[bold red]Error:[/bold red] {e}")
+        out.print(f"[bold red]Error:[/bold red] {e}")
 
     except Exception as e:
         console.print(f"[bold red]Error:[/bold red] {e}")
 
 @app.command()
-def income_report():
+def income_report(limit: int = typer.Option(None, help="Show at most this many sources (the page size with --page)."),
+                  page: int = typer.Option(None, help="Show this page of sources, counting from 1."),
+                  format: str = typer.Option("table", "--format", "-f", help="Output format: table, plain, csv or jsonl. Other formats print the income sources only."),
+                  jobs: int = typer.Option(1, "--jobs", envvar="FINANCE_TRACKER_JOBS", help=parallel.JOBS_HELP)):
     """Generate a report of income by source and compare with previous month."""
+    out = console
     try:
-        current_month_income = {}
-        previous_month_income = {}
-        total_current_month_income_paisa = 0
-        total_previous_month_income_paisa = 0
-
+        check_format(format)
+        parallel.set_jobs(jobs)
+        out = status_console(format, console)
+        limit, offset = page_window(limit, page)
         now = datetime.now()
-        current_month_start, current_month_end = get_month_range(now)
-        
-        previous_month_date = now.replace(day=1) - timedelta(days=1)
-        previous_month_start, previous_month_end = get_month_range(previous_month_date)
-
-        with open("database/transactions.txt", "r") as f:
-            for line in f:
-                try:
-                    _, timestamp_str, type, category, amount_paisa, _ = line.strip().split(",", 5)
-                    transaction_date = datetime.strptime(timestamp_str, "%Y-%m-%d %H:%M:%S")
-                    amount = int(amount_paisa)
-
-                    if type == "income":
-                        if current_month_start <= transaction_date <= current_month_end:
-                            current_month_income[category] = current_month_income.get(category, 0) + amount
-                            total_current_month_income_paisa += amount
-                        elif previous_month_start <= transaction_date <= previous_month_end:
-                            previous_month_income[category] = previous_month_income.get(category, 0) + amount
-                            total_previous_month_income_paisa += amount
-                except ValueError:
-                    console.print(f"[bold yellow]Skipping malformed transaction line: {line.strip()}[/bold yellow]")
+        current_month = month_key_of(now)
+        previous_month = current_month - 1
+
+        storage = get_storage()
+        current = month_metrics(current_month, storage)
+        previous = month_metrics(previous_month, storage)
+        for line in current["malformed"]:
+            out.print(f"[bold yellow]Skipping malformed transaction line: {line}[/bold yellow]")
+
+        current_month_income = paginate(current["income_by_category"].items(), limit, offset)
+        if format != "table":
+            write_rows(format, ["source", "amount"], ((source, money(amount_paisa)) for source, amount_paisa in current_month_income))
+            return
+
+        total_current_month_income_paisa = current["income"]
+        total_previous_month_income_paisa = previous["income"]
         
         console.print("\n[bold]Income Analysis (Current Month):[/bold]")
+        from rich.table import Table
         income_table = Table(title="Income by Source")
         income_table.add_column("Source", style="cyan")
         income_table.add_column("Amount", style="green")
 
-        for source, amount_paisa in current_month_income.items():
+        for source, amount_paisa in current_month_income:
             income_table.add_row(source, f"{amount_paisa / 100:.2f}")
         console.print(income_table)
         console.print(f"\nTotal Income This Month: [green]{total_current_month_income_paisa / 100:.2f}[/green]")
@@ -181,7 +224,7 @@ def income_report():
         previous_month_total = total_previous_month_income_paisa / 100
         
         console.print(f"Current Month ({now.strftime('%B')}): {current_month_total:.2f}")
-        console.print(f"Previous Month ({previous_month_date.strftime('%B')}): {previous_month_total:.2f}")
+        console.print(f"Previous Month ({month_name(previous_month)}): {previous_month_total:.2f}")
 
         if previous_month_total > 0:
             change_percent = ((current_month_total - previous_month_total) / previous_month_total) * 100
@@ -194,101 +237,51 @@ def income_report():
 
 
     except FileNotFoundError:
-        console.print("[bold yellow]No transactions found.[/bold yellow]")
+        out.print("[bold yellow]No transactions found.[/bold yellow]")
     except Exception as e:
-        console.print(f"[bold red]Error:[/bold red] {e}")
+        out.print(f"[bold red]Error:[/bold red] {e}")
 
     except Exception as e:
         console.print(f"[bold red]Error:[/bold red] {e}")
 
 @app.command()
-def health_score():
+def health_score(limit: int = typer.Option(None, help="Show at most this many score factors (the page size with --page)."),
+                 page: int = typer.Option(None, help="Show this page of score factors, counting from 1."),
+                 format: str = typer.Option("table", "--format", "-f", help="Output format: table, plain, csv or jsonl. Other formats print the factors and the overall score."),
+                 all_ledgers: bool = typer.Option(False, "--all-ledgers", help="Score every ledger under ledgers/ at once, one row per ledger."),
+                 jobs: int = typer.Option(None, "--jobs", envvar="FINANCE_TRACKER_JOBS", help=ALL_LEDGERS_JOBS_HELP)):
     """Calculate and display a financial health score."""
+    out = console
     try:
-        total_income_paisa = 0
-        total_expense_paisa = 0
-        now = datetime.now()
-        current_month_start, current_month_end = get_month_range(now)
-
-        # Read transactions
-        with open("database/transactions.txt", "r") as f:
-            for line in f:
-                try:
-                    _, timestamp_str, type, _, amount_paisa, _ = line.strip().split(",", 5)
-                    transaction_date = datetime.strptime(timestamp_str, "%Y-%m-%d %H:%M:%S")
-                    amount = int(amount_paisa)
-
-                    if current_month_start <= transaction_date <= current_month_end:
-                        if type == "income":
-                            total_income_paisa += amount
-                        else:
-                            total_expense_paisa += amount
-                except ValueError:
-                    console.print(f"[bold yellow]Skipping malformed transaction line: {line.strip()}[/bold yellow]")
-
-        # Read budgets and calculate adherence
-        budgets_data = {}
-        with open("database/budgets.txt", "r") as f:
-            for line in f:
-                category, budget_paisa = line.strip().split(",")
-                budgets_data[category] = int(budget_paisa)
-        
-        # Calculate expenses for current month, grouped by category for budget adherence
-        expenses_by_category_paisa = {}
-        try:
-            with open("database/transactions.txt", "r") as f:
-                for line in f:
-                    try:
-                        _, timestamp_str, type, category, amount_paisa, _ = line.strip().split(",", 5)
-                        transaction_date = datetime.strptime(timestamp_str, "%Y-%m-%d %H:%M:%S")
-
-                        if transaction_date.year == now.year and transaction_date.month == now.month:
-                            if type == "expense":
-                                expenses_by_category_paisa[category] = expenses_by_category_paisa.get(category, 0) + int(amount_paisa)
-                    except ValueError:
-                        pass
-        except FileNotFoundError:
-            pass
-
-        # Score Calculation
-        score = 0
-        score_breakdown = {}
-
-        # 1. Savings Rate (30 points)
-        savings_paisa = total_income_paisa - total_expense_paisa
-        if total_income_paisa > 0:
-            savings_rate = (savings_paisa / total_income_paisa) * 100
-            if savings_rate >= 20:
-                score_breakdown["Savings Rate"] = 30
-            elif savings_rate > 0:
-                score_breakdown["Savings Rate"] = min(30, int(savings_rate / 20 * 30)) # Scale points
+        check_format(format)
+        parallel.set_jobs(jobs if jobs is not None else 0 if all_ledgers else 1)
+        out = status_console(format, console)
+        limit, offset = page_window(limit, page)
+        if all_ledgers:
+            skipped = []
+            rows = paginate(((name, *metrics["score"].values(), total_score(metrics))
+                             for name, metrics in ledgers_metrics(out, skipped)), limit, offset)
+            if format != "table":
+                write_rows(format, ["ledger", *SCORE_FIELDS, "score"], rows)
             else:
-                score_breakdown["Savings Rate"] = 0
-        else:
-            score_breakdown["Savings Rate"] = 0 # No income, no savings score possible
-        score += score_breakdown["Savings Rate"]
-
-        # 2. Budget Adherence (25 points)
-        budget_adherence_score = 25
-        for category, budget_paisa in budgets_data.items():
-            spent_paisa = expenses_by_category_paisa.get(category, 0)
-            if budget_paisa > 0 and spent_paisa > budget_paisa:
-                budget_adherence_score = 0 # Penalize heavily if any budget is overspent
-                break
-        score_breakdown["Budget Adherence"] = budget_adherence_score
-        score += score_breakdown["Budget Adherence"]
-
-        # 3. Income vs Expenses (25 points)
-        if total_income_paisa > total_expense_paisa:
-            score_breakdown["Income vs Expenses"] = 25
-        else:
-            score_breakdown["Income vs Expenses"] = 0
-        score += score_breakdown["Income vs Expenses"]
-
-        # 4. Debt Management (20 points) - Placeholder
-        score_breakdown["Debt Management (Placeholder)"] = 10 # Default score as not implemented
-        score += score_breakdown["Debt Management (Placeholder)"]
-
+                print_ledgers_table(out, "Financial Health Scores (All Ledgers)",
+                                    ["Savings Rate", "Budget Adherence", "Income vs Expenses", "Debt Management", "Overall"], rows, skipped)
+            report_skipped(out, skipped)
+            return
+        metrics = month_metrics(month_key_of(datetime.now()))
+        for line in metrics["malformed"]:
+            out.print(f"[bold yellow]Skipping malformed transaction line: {line}[/bold yellow]")
+        if metrics["budgets"] is None:
+            raise FileNotFoundError("No budgets found.")
+
+        # Savings rate (30), budget adherence (25), income vs expenses (25)
+        # and debt management (20, a placeholder for now)
+        score_breakdown = metrics["score"]
+        score = total_score(metrics)
+        factors = paginate(score_breakdown.items(), limit, offset)
+        if format != "table":
+            write_rows(format, ["factor", "points"], itertools.chain(factors, [("Overall", score)]))
+            return
 
         # Interpretation
         if score >= 90:
@@ -305,14 +298,105 @@ def health_score():
         console.print(f"Interpretation: {interpretation}")
 
         console.print("\n[bold]Score Breakdown:[/bold]")
-        for factor, factor_score in score_breakdown.items():
+        for factor, factor_score in factors:
             console.print(f"- {factor}: {factor_score} points")
 
 
     except FileNotFoundError:
-        console.print("[bold yellow]No transactions or budgets found. Cannot calculate health score.[/bold yellow]")
+        out.print("[bold yellow]No transactions or budgets found. Cannot calculate health score.[/bold yellow]")
     except Exception as e:
-        console.print(f"[bold red]Error:[/bold red] {e}")
+        out.print(f"[bold red]Error:[/bold red] {e}")
+
+def _percent(percent):
+    """Rounds a percent change for machine-readable output; None stays None."""
+    return None if percent is None else round(percent, 2)
+
+def _change(percent, higher_is_better: bool = False):
+    """Formats a percent change, green when it moves the right way."""
+    if percent is None:
+        return "N/A"
+    color = "green" if (percent > 0) == higher_is_better else "red"
+    return f"[{color}]{percent:+.2f}%[/{color}]"
+
+@app.command()
+def trend(months: int = typer.Option(12, help="Number of months to show, ending with the current month."),
+          window: int = typer.Option(3, help="Months in the rolling average."),
+          limit: int = typer.Option(None, help="Show at most this many months (the page size with --page)."),
+          page: int = typer.Option(None, help="Show this page of months, counting from 1."),
+          format: str = typer.Option("table", "--format", "-f", help="Output format: table, plain, csv or jsonl. Other formats print the monthly rows only."),
+          jobs: int = typer.Option(1, "--jobs", envvar="FINANCE_TRACKER_JOBS", help=parallel.JOBS_HELP)):
+    """Show monthly income and spending trends with month-over-month, rolling and year-over-year comparisons."""
+    out = console
+    try:
+        check_format(format)
+        parallel.set_jobs(jobs)
+        out = status_console(format, console)
+        if months < 1 or window < 1:
+            raise ValueError("--months and --window must be at least 1.")
+        limit, offset = page_window(limit, page)
+        matrix = load_matrix()
+        if not matrix.types:
+            out.print("[bold yellow]No transactions found.[/bold yellow]")
+            return
+        trend_rows = paginate(monthly_trend(months, window, matrix=matrix), limit, offset)
+        if format != "table":
+            write_rows(format, ["month", "income", "spending", "net", "spending_mom", f"spending_{window}_month_avg", "spending_yoy"],
+                       (("%d-%02d" % month_of_key(row["month"]), money(row["income"]["amount"]), money(row["expense"]["amount"]),
+                         money(row["net"]["amount"]), _percent(row["expense"]["mom"]), money(row["expense"]["rolling"]),
+                         _percent(row["expense"]["yoy"])) for row in trend_rows))
+            return
+
+        from rich.table import Table
+        table = Table(title=f"Monthly Trend (Last {months} Months)")
+        table.add_column("Month")
+        table.add_column("Income", style="green")
+        table.add_column("Spending", style="red")
+        table.add_column("Net")
+        table.add_column("Spending MoM")
+        table.add_column(f"Spending {window}-Month Avg")
+        table.add_column("Spending YoY")
+        for row in trend_rows:
+            year, month = month_of_key(row["month"])
+            expense = row["expense"]
+            table.add_row(
+                f"{year}-{month:02d}",
+                f"{row['income']['amount'] / 100:.2f}",
+                f"{expense['amount'] / 100:.2f}",
+                f"{row['net']['amount'] / 100:.2f}",
+                _change(expense["mom"]),
+                f"{expense['rolling'] / 100:.2f}",
+                _change(expense["yoy"]),
+            )
+        console.print(table)
+
+        # Categories ranked by what they cost over the period shown
+        categories = category_trends("expense", months, window, matrix=matrix)
+        if categories:
+            totals = {category: sum(entry["amount"] for entry in entries) for category, entries in categories.items()}
+            ranked = sorted((item for item in categories.items() if totals[item[0]]), key=lambda item: totals[item[0]], reverse=True)
+            category_table = Table(title="Spending by Category (Current Month)")
+            category_table.add_column("Category")
+            category_table.add_column("Spent")
+            category_table.add_column("MoM")
+            category_table.add_column(f"{window}-Month Avg")
+            category_table.add_column("YoY")
+            category_table.add_column(f"Total ({months} Months)")
+            for category, entries in ranked:
+                latest = entries[-1]
+                category_table.add_row(
+                    category,
+                    f"{latest['amount'] / 100:.2f}",
+                    _change(latest["mom"]),
+                    f"{latest['rolling'] / 100:.2f}",
+                    _change(latest["yoy"]),
+                    f"{totals[category] / 100:.2f}",
+                )
+            console.print(category_table)
+
+    except FileNotFoundError:
+        out.print("[bold yellow]No transactions found.[/bold yellow]")
+    except Exception as e:
+        out.print(f"[bold red]Error:[/bold red] {e}")
 
 if __name__ == "__main__":
     app()
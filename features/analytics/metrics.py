@@ -0,0 +1,143 @@
+import hashlib
+import json
+import os
+from collections import OrderedDict
+from features.ledger.ledger import database_path
+from features.ledger.locking import atomic_write
+from features.ledger.storage import get_storage
+from features.profiling.profiler import phase
+
+MAX_ENTRIES = 64  # Month bundles kept in the cache; the least recently used go first
+DEBT_PLACEHOLDER = 10  # Debt management is not tracked yet, so every score gets these points
+
+_cache = None  # The cache file of the ledger in use, read once per process
+
+
+def cache_path():
+    """Returns the file holding cached month metrics."""
+    return database_path("metrics.cache.json")
+
+def _content_key(month: int, totals: dict, budgets, malformed: list):
+    """Hashes the inputs of a month's metrics, so unchanged months survive unrelated writes."""
+    content = json.dumps([totals, budgets, malformed], sort_keys=True).encode()
+    return f"{month}:{hashlib.blake2b(content, digest_size=16).hexdigest()}"
+
+def _load():
+    global _cache
+    path = cache_path()
+    # Reread when a command switches to another ledger (see workspaces.use_ledger)
+    if _cache is None or _cache["path"] != path:
+        try:
+            with open(path, "r") as f:
+                data = json.load(f)
+            _cache = {
+                "path": path,
+                "fingerprint": data["fingerprint"],
+                "months": data["months"],
+                "entries": OrderedDict(data["entries"]),
+            }
+        except (FileNotFoundError, ValueError, KeyError, TypeError):
+            _cache = {"path": path, "fingerprint": None, "months": {}, "entries": OrderedDict()}
+    return _cache
+
+def _save(cache: dict):
+    path = cache["path"]
+    if not os.path.isdir(os.path.dirname(path) or "."):
+        return
+    data = {
+        "fingerprint": cache["fingerprint"],
+        "months": cache["months"],
+        # Stored oldest first, so the order read back is the LRU order
+        "entries": list(cache["entries"].items()),
+    }
+    with atomic_write(path, "w") as f:
+        json.dump(data, f)
+
+def compute_metrics(month: int, totals: dict, budgets, malformed: list):
+    """Builds the metric bundle for one month from its {type: {category: amount_paisa}} totals.
+
+    budgets is {category: amount_paisa}, or None when no budgets file exists.
+    Amounts are paisa; the score components are the health score's points.
+    """
+    income = sum(totals.get("income", {}).values())
+    # Every type other than income counts as spending
+    expense = sum(sum(categories.values()) for type, categories in totals.items() if type != "income")
+    expenses_by_category = totals.get("expense", {})
+    savings = income - expense
+    savings_rate = savings / income * 100 if income > 0 else None
+
+    adherence = {}
+    for category, budget_paisa in (budgets or {}).items():
+        spent_paisa = expenses_by_category.get(category, 0)
+        adherence[category] = {"budget": budget_paisa, "spent": spent_paisa, "remaining": budget_paisa - spent_paisa}
+
+    score = {}
+    if savings_rate is None or savings_rate <= 0:
+        score["Savings Rate"] = 0
+    elif savings_rate >= 20:
+        score["Savings Rate"] = 30
+    else:
+        score["Savings Rate"] = min(30, int(savings_rate / 20 * 30))
+    # Any overspent budget costs every adherence point
+    overspent = any(usage["budget"] > 0 and usage["spent"] > usage["budget"] for usage in adherence.values())
+    score["Budget Adherence"] = 0 if overspent else 25
+    score["Income vs Expenses"] = 25 if income > expense else 0
+    score["Debt Management (Placeholder)"] = DEBT_PLACEHOLDER
+
+    return {
+        "month": month,
+        "income": income,
+        "expense": expense,
+        "income_by_category": totals.get("income", {}),
+        "expenses_by_category": expenses_by_category,
+        "savings": savings,
+        "savings_rate": savings_rate,
+        "budgets": budgets,
+        "adherence": adherence,
+        "score": score,
+        "malformed": malformed,
+    }
+
+def month_metrics(month: int, storage=None):
+    """Returns the metric bundle for a month, computed at most once per change to the data.
+
+    Bundles are cached in database/metrics.cache.json. While the storage
+    files keep their size and mtime, a lookup reads nothing else. After a
+    write, the month's totals and budgets are hashed, and a bundle with the
+    same content is reused, so adding to one month keeps the others cached.
+    Raises FileNotFoundError when there are no transactions.
+    """
+    storage = storage or get_storage()
+    cache = _load()
+    entries = cache["entries"]
+    files = storage.fingerprint()
+    if cache["fingerprint"] == files:
+        key = cache["months"].get(str(month))
+        if key in entries:
+            entries.move_to_end(key)
+            return entries[key]
+    else:
+        cache["fingerprint"], cache["months"] = files, {}
+
+    totals = storage.month_totals(month)
+    try:
+        budgets = storage.load_budgets()
+    except FileNotFoundError:
+        budgets = None
+    malformed = storage.malformed()
+    key = _content_key(month, totals, budgets, malformed)
+    metrics = entries.get(key)
+    if metrics is None:
+        with phase("aggregate"):
+            metrics = compute_metrics(month, totals, budgets, malformed)
+        entries[key] = metrics
+    entries.move_to_end(key)
+    while len(entries) > MAX_ENTRIES:
+        entries.popitem(last=False)
+    cache["months"][str(month)] = key
+    _save(cache)
+    return metrics
+
+def total_score(metrics: dict):
+    """Returns the overall score out of 100 for a metric bundle."""
+    return sum(metrics["score"].values())
@@ -0,0 +1,136 @@
+from features.ledger.storage import get_storage
+from features.ledger.timecodec import current_month_key
+from features.profiling.profiler import phase
+
+
+class MonthMatrix:
+    """Dense (month x type x category) totals for the whole history.
+
+    Months run without gaps from the first month with transactions to
+    last_month, so row i is month first + i and a series can be shifted by
+    plain index arithmetic (1 back for month-over-month, 12 for
+    year-over-year). Amounts are paisa.
+    """
+
+    def __init__(self, history: dict, last_month: int = None):
+        months = sorted(history)
+        self.last = max(months[-1], last_month or months[-1]) if months else last_month
+        self.first = months[0] if months else last_month
+        count = self.last - self.first + 1
+        self.types = []
+        self.categories = {}  # {type: [category names]}; the position is the category code
+        codes = {}
+        cells = {}  # {type: flat list indexed by month offset * width + category code}
+        for month in months:
+            for type, categories in history[month].items():
+                if type not in codes:
+                    self.types.append(type)
+                    self.categories[type], codes[type], cells[type] = [], {}, []
+                for category, amount in categories.items():
+                    code = codes[type].get(category)
+                    if code is None:
+                        code = codes[type][category] = len(codes[type])
+                        self.categories[type].append(category)
+                    cells[type].append(((month - self.first), code, amount))
+        # Grouped sum into one flat array per type, like a bincount over the
+        # combined month and category codes
+        self._values = {}
+        for type, entries in cells.items():
+            width = len(self.categories[type])
+            values = [0] * (count * width)
+            for offset, code, amount in entries:
+                values[offset * width + code] += amount
+            self._values[type] = values
+
+    def __len__(self):
+        return self.last - self.first + 1 if self.first is not None else 0
+
+    def months(self):
+        return list(range(self.first, self.last + 1)) if len(self) else []
+
+    def category_series(self, type: str, category: str):
+        """Returns the month-by-month totals of one category."""
+        if category not in self.categories.get(type, []):
+            return [0] * len(self)
+        width = len(self.categories[type])
+        return self._values[type][self.categories[type].index(category)::width]
+
+    def type_series(self, type: str):
+        """Returns the month-by-month totals of every category of a type."""
+        width = len(self.categories.get(type, []))
+        if not width:
+            return [0] * len(self)
+        values = self._values[type]
+        return [sum(values[start:start + width]) for start in range(0, len(values), width)]
+
+    def spending_series(self):
+        """Month-by-month totals of every type other than income, as the reports count spending."""
+        series = [0] * len(self)
+        for type in self.types:
+            if type != "income":
+                series = [total + amount for total, amount in zip(series, self.type_series(type))]
+        return series
+
+
+def change(current: int, previous: int):
+    """Percent change from previous to current, or None when there is nothing to compare with."""
+    if not previous:
+        return None
+    return (current - previous) / previous * 100
+
+def rolling_mean(series: list, window: int):
+    """Trailing mean over up to window values; the first entries average what exists so far."""
+    means, total = [], 0
+    for index, value in enumerate(series):
+        total += value
+        if index >= window:
+            total -= series[index - window]
+        means.append(total / min(index + 1, window))
+    return means
+
+def series_trend(series: list, window: int = 3):
+    """Returns one {amount, mom, rolling, yoy} dict per month of a series."""
+    rolling = rolling_mean(series, window)
+    return [
+        {
+            "amount": amount,
+            "mom": change(amount, series[index - 1]) if index >= 1 else None,
+            "rolling": rolling[index],
+            "yoy": change(amount, series[index - 12]) if index >= 12 else None,
+        }
+        for index, amount in enumerate(series)
+    ]
+
+def load_matrix(storage=None, last_month: int = None):
+    """Builds the month matrix from the storage's per-month totals, up to the current month."""
+    storage = storage or get_storage()
+    history = storage.history_totals()
+    with phase("aggregate"):
+        return MonthMatrix(history, last_month or current_month_key())
+
+def monthly_trend(months: int = 12, window: int = 3, storage=None, matrix: MonthMatrix = None):
+    """Returns income, spending and net trends for the last months, oldest first.
+
+    Each month is {"month", "income", "expense", "net"}, where each figure is
+    a series_trend entry. Rolling averages and comparisons look back over
+    the whole history, not just the months returned.
+    """
+    matrix = matrix or load_matrix(storage)
+    income = matrix.type_series("income")
+    expense = matrix.spending_series()
+    net = [earned - spent for earned, spent in zip(income, expense)]
+    trends = [series_trend(series, window) for series in (income, expense, net)]
+    rows = [
+        {"month": month, "income": earned, "expense": spent, "net": saved}
+        for month, earned, spent, saved in zip(matrix.months(), *trends)
+    ]
+    return rows[-months:] if months > 0 else rows
+
+def category_trends(type: str = "expense", months: int = 12, window: int = 3, storage=None, matrix: MonthMatrix = None):
+    """Returns {category: series_trend entries for the last months} for one transaction type."""
+    matrix = matrix or load_matrix(storage)
+    trends = {}
+    for category in matrix.categories.get(type, []):
+        trend = series_trend(matrix.category_series(type, category), window)
+        trends[category] = trend[-months:] if months > 0 else trend
+    return trends
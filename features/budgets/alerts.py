@@ -0,0 +1,144 @@
+import json
+import os
+from datetime import datetime
+from features.ledger.ledger import Ledger, database_path
+from features.ledger.timecodec import month_of_key
+from features.output.formats import money
+
+WARNING_PERCENT = 70  # Utilization at which a budget turns from OK to Warning; past 100% it is Over
+STATUSES = ("OK", "Warning", "Over")
+
+
+def budget_status(spent_paisa: int, budget_paisa: int):
+    """Returns "OK", "Warning" or "Over" for a category's spending against its budget."""
+    if budget_paisa <= 0 or spent_paisa * 100 < budget_paisa * WARNING_PERCENT:
+        return "OK"
+    return "Warning" if spent_paisa <= budget_paisa else "Over"
+
+def alert_settings():
+    """Returns (hook command, log path) for budget alerts; either may be None.
+
+    The FINANCE_TRACKER_ALERT_HOOK and FINANCE_TRACKER_ALERT_LOG environment
+    variables take precedence over the "alert_hook" and "alert_log" keys of
+    database/config.json.
+    """
+    config = {}
+    try:
+        with open(database_path("config.json"), "r") as f:
+            config = json.load(f)
+    except (FileNotFoundError, ValueError):
+        pass
+    return (os.environ.get("FINANCE_TRACKER_ALERT_HOOK") or config.get("alert_hook"),
+            os.environ.get("FINANCE_TRACKER_ALERT_LOG") or config.get("alert_log"))
+
+
+class BudgetAlerts:
+    """Raises an alert for each written expense that moves its category's budget to Warning or Over.
+
+    Pass it to Storage.append as an observer, or call check() with each
+    commit of a batch: either way it runs while the write lock is held, so
+    no other writer's rows can land between reading a month's spending and
+    checking against it. A month's totals are read from the storage's
+    rollup (or database) the first time a row falls in it and kept up to
+    date from the written rows after that, so the check costs O(1) per row
+    and never rescans the month. Use a local storage, not the daemon's,
+    since the daemon cannot answer while the lock is held. Alerts are
+    appended to the alert log and piped to the hook command, as JSON, as
+    they happen; report() prints them.
+    """
+
+    def __init__(self, storage):
+        self.storage = storage
+        try:
+            self.budgets = storage.load_budgets()
+        except FileNotFoundError:
+            self.budgets = {}
+        self.spent = {}  # month_key -> {category: amount_paisa}, for budgeted categories
+        self.alerts = []
+        self.failures = []
+        self.hook, self.log = alert_settings() if self.budgets else (None, None)
+
+    def before_write(self):
+        """Storage.append observer: forgets spending read before other writers may have added to it."""
+        self.spent = {}
+
+    def after_write(self, rows: Ledger):
+        """Storage.append observer: checks the rows just written, still under the lock."""
+        self.check(rows)
+
+    def _read(self, months, rows: Ledger):
+        """Reads the spending of months not seen yet, as it stood before rows were written."""
+        for month in months:
+            try:
+                expenses = self.storage.month_totals(month).get("expense", {})
+            except FileNotFoundError:
+                expenses = {}  # No transactions yet
+            self.spent[month] = {category: expenses.get(category, 0) for category in self.budgets}
+        type_names, category_names = rows.type_names, rows.category_names
+        for month, type_code, category_code, amount in zip(rows.months, rows.types, rows.categories, rows.amounts):
+            if month in months and type_names[type_code] == "expense" and category_names[category_code] in self.budgets:
+                self.spent[month][category_names[category_code]] -= amount
+
+    def check(self, rows: Ledger):
+        """Adds written rows to the running totals and raises the alerts they cause."""
+        if not self.budgets:
+            return
+        months = set(rows.months) - self.spent.keys()
+        if months:
+            self._read(months, rows)
+        budgets, type_names, category_names = self.budgets, rows.type_names, rows.category_names
+        for index, (month, type_code, category_code, amount) in enumerate(zip(rows.months, rows.types, rows.categories, rows.amounts)):
+            category = category_names[category_code]
+            if type_names[type_code] != "expense" or category not in budgets:
+                continue
+            spent = self.spent[month]
+            before = spent[category]
+            spent[category] = after = before + amount
+            status = budget_status(after, budgets[category])
+            if STATUSES.index(status) > STATUSES.index(budget_status(before, budgets[category])):
+                self._raise(month, category, status, after, rows.row(index))
+
+    def _raise(self, month: int, category: str, status: str, spent_paisa: int, row):
+        year, month_number = month_of_key(month)
+        budget_paisa = self.budgets[category]
+        alert = {
+            "time": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "status": status,
+            "category": category,
+            "month": f"{year}-{month_number:02d}",
+            "budget": money(budget_paisa),
+            "spent": money(spent_paisa),
+            "utilization": round(spent_paisa / budget_paisa * 100, 2),
+            "transaction_id": row[0],
+            "description": row[5],
+        }
+        self.alerts.append(alert)
+        line = json.dumps(alert)
+        if self.log:
+            try:
+                with open(self.log, "a") as f:
+                    f.write(line + "\n")
+            except OSError as e:
+                self.failures.append(f"Could not write the alert log: {e}")
+        if self.hook:
+            import subprocess # Deferred: only hooks need it
+            try:
+                result = subprocess.run(self.hook, shell=True, input=line + "\n", text=True)
+                if result.returncode:
+                    self.failures.append(f"Alert hook exited with status {result.returncode}.")
+            except OSError as e:
+                self.failures.append(f"Could not run the alert hook: {e}")
+
+    def report(self, console, limit: int = 10):
+        """Prints the alerts raised so far, at most limit of them."""
+        for alert in self.alerts[:limit]:
+            if alert["status"] == "Over":
+                console.print(f"[bold red]Budget exceeded:[/bold red] {alert['category']} has spent {alert['spent']} of its "
+                              f"{alert['budget']} budget for {alert['month']} ({alert['utilization']:.2f}%).")
+            else:
+                console.print(f"[bold yellow]Budget warning:[/bold yellow] {alert['category']} has spent {alert['spent']} of its "
+                              f"{alert['budget']} budget for {alert['month']} ({alert['utilization']:.2f}%).")
+        if len(self.alerts) > limit:
+            console.print(f"  ... and {len(self.alerts) - limit} more budget alerts.")
+        for failure in dict.fromkeys(self.failures):
+            console.print(f"[bold yellow]{failure}[/bold yellow]")
@@ -1,6 +1,9 @@
 import typer
 from rich.console import Console
-from rich.table import Table
+from features.budgets.alerts import budget_status
+from features.ledger.storage import get_storage
+from features.ledger.timecodec import current_month_key
+from features.output.formats import check_format, money, page_window, paginate, status_console, write_rows
 
 app = typer.Typer()
 console = Console()
@@ -12,93 +15,77 @@ def add(category: str, amount: float):
         console.print("[bold red]Error:[/bold red] Amount must be positive.")
         raise typer.Exit()
     try:
-        budgets = {}
-        try:
-            with open("database/budgets.txt", "r") as f:
-                for line in f:
-                    cat, amt_paisa = line.strip().split(",")
-                    budgets[cat] = int(amt_paisa)
-        except FileNotFoundError:
-            pass # File will be created if it doesn't exist
-
-        amount_paisa = int(amount * 100)
-        budgets[category] = amount_paisa
-
-        with open("database/budgets.txt", "w") as f:
-            for cat, amt_paisa in budgets.items():
-                f.write(f"{cat},{amt_paisa}\n")
+        storage = get_storage()
+        with storage.budgets_locked():
+            budgets = {}
+            try:
+                budgets = storage.load_budgets()
+            except FileNotFoundError:
+                pass # Budgets will be created if they don't exist
+
+            amount_paisa = int(amount * 100)
+            budgets[category] = amount_paisa
+
+            storage.write_budgets(budgets)
         console.print(f"Set budget for {category}: {amount:.2f}")
     except Exception as e:
         console.print(f"[bold red]Error:[/bold red] {e}")
 
-import typer
-from rich.console import Console
-from rich.table import Table
-from datetime import datetime
-
-app = typer.Typer()
-console = Console()
-
-@app.command()
-def add(category: str, amount: float):
-    """Add or update a new budget for a category."""
-    if amount <= 0:
-        console.print("[bold red]Error:[/bold red] Amount must be positive.")
-        raise typer.Exit()
-    try:
-        budgets = {}
-        try:
-            with open("database/budgets.txt", "r") as f:
-                for line in f:
-                    cat, amt_paisa = line.strip().split(",")
-                    budgets[cat] = int(amt_paisa)
-        except FileNotFoundError:
-            pass # File will be created if it doesn't exist
+STATUS_COLORS = {"OK": "green", "Warning": "yellow", "Over": "red"}
+BUDGET_FIELDS = ["category", "budget", "spent", "remaining", "utilization", "status"]
 
-        amount_paisa = int(amount * 100)
-        budgets[category] = amount_paisa
+def budget_rows(budgets, expenses: dict, plain: bool = False):
+    """Yields a row per (category, budget_paisa) with this month's spending, colored unless plain."""
+    for category, budget_paisa in budgets:
+        spent_paisa = expenses.get(category, 0)
+        utilization_percent = (spent_paisa / budget_paisa * 100) if budget_paisa > 0 else 0
+        status_text = budget_status(spent_paisa, budget_paisa)
+        status_color = STATUS_COLORS[status_text]
 
-        with open("database/budgets.txt", "w") as f:
-            for cat, amt_paisa in budgets.items():
-                f.write(f"{cat},{amt_paisa}\n")
-        console.print(f"Set budget for {category}: {amount:.2f}")
-    except Exception as e:
-        console.print(f"[bold red]Error:[/bold red] {e}")
+        values = [category, money(budget_paisa), money(spent_paisa), money(budget_paisa - spent_paisa)]
+        if plain:
+            yield values + [round(utilization_percent, 2), status_text]
+        else:
+            yield values + [f"[{status_color}]{utilization_percent:.2f}%[/{status_color}]",
+                            f"[{status_color}]{status_text}[/{status_color}]"]
 
 @app.command()
-def list():
+def list(limit: int = typer.Option(None, help="Show at most this many budgets (the page size with --page)."),
+         page: int = typer.Option(None, help="Show this page of budgets, counting from 1."),
+         format: str = typer.Option("table", "--format", "-f", help="Output format: table, plain, csv or jsonl.")):
     """List all budgets."""
+    out = console
     try:
+        check_format(format)
+        out = status_console(format, console)
+        limit, offset = page_window(limit, page)
+
         # Read budgets
-        budgets_data = {}
-        with open("database/budgets.txt", "r") as f:
-            for line in f:
-                category, budget_paisa = line.strip().split(",")
-                budgets_data[category] = int(budget_paisa)
+        storage = get_storage()
+        budgets_data = storage.load_budgets()
 
         # Read transactions and calculate expenses for current month
         expenses_data = {}
         total_spent_paisa_month = 0
-        now = datetime.now()
 
         try:
-            with open("database/transactions.txt", "r") as f:
-                for line in f:
-                    try:
-                        _, timestamp_str, type, category, amount_paisa, _ = line.strip().split(",", 5)
-                        transaction_date = datetime.strptime(timestamp_str, "%Y-%m-%d %H:%M:%S")
-
-                        if transaction_date.year == now.year and transaction_date.month == now.month:
-                            if type == "expense":
-                                spent_paisa = int(amount_paisa)
-                                expenses_data[category] = expenses_data.get(category, 0) + spent_paisa
-                                total_spent_paisa_month += spent_paisa
-                    except ValueError:
-                        console.print(f"[bold yellow]Skipping malformed transaction line: {line.strip()}[/bold yellow]")
+            for line in storage.malformed():
+                out.print(f"[bold yellow]Skipping malformed transaction line: {line}[/bold yellow]")
+
+            expenses_data = dict(storage.month_totals(current_month_key()).get("expense", {}))
+            total_spent_paisa_month = sum(expenses_data.values())
         except FileNotFoundError:
             pass # No transactions yet
 
+        # The summary covers every budget; the rows shown are one page of them
+        total_budget_paisa_month = sum(budgets_data.values())
+        shown = paginate(budgets_data.items(), limit, offset)
+        if format != "table":
+            write_rows(format, BUDGET_FIELDS, budget_rows(shown, expenses_data, plain=True))
+            return
+
         # Prepare table
+        from rich.table import Table # Deferred until a table is printed
         table = Table(title="Monthly Budgets Overview")
         table.add_column("Category", style="cyan", no_wrap=True)
         table.add_column("Budget", style="magenta")
@@ -107,39 +94,10 @@ def list():
         table.add_column("Utilization", justify="right")
         table.add_column("Status", style="white")
 
-        total_budget_paisa_month = sum(budgets_data.values())
         overall_utilization = 0
 
-        for category, budget_paisa in budgets_data.items():
-            spent_paisa = expenses_data.get(category, 0)
-            remaining_paisa = budget_paisa - spent_paisa
-
-            budget = budget_paisa / 100
-            spent = spent_paisa / 100
-            remaining = remaining_paisa / 100
-
-            utilization_percent = (spent_paisa / budget_paisa * 100) if budget_paisa > 0 else 0
-
-            if utilization_percent < 70:
-                status_color = "green"
-                status_text = "OK"
-            elif utilization_percent <= 100:
-                status_color = "yellow"
-                status_text = "Warning"
-            else:
-                status_color = "red"
-                status_text = "Over"
-            
-            utilization_str = f"[{status_color}]{utilization_percent:.2f}%[/{status_color}]"
-
-            table.add_row(
-                category,
-                f"{budget:.2f}",
-                f"{spent:.2f}",
-                f"{remaining:.2f}",
-                utilization_str,
-                f"[{status_color}]{status_text}[/{status_color}]"
-            )
+        for row in budget_rows(shown, expenses_data):
+            table.add_row(*row)
 
         console.print(table)
 
@@ -165,6 +123,6 @@ def list():
 
 
     except FileNotFoundError:
-        console.print("[bold yellow]No budgets found. Please add some budgets first.[/bold yellow]")
+        out.print("[bold yellow]No budgets found. Please add some budgets first.[/bold yellow]")
     except Exception as e:
-        console.print(f"[bold red]Error:[/bold red] {e}")
+        out.print(f"[bold red]Error:[/bold red] {e}")
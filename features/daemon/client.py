@@ -0,0 +1,147 @@
+import json
+import os
+from features.ledger.ledger import database_path
+from features.profiling.profiler import phase
+
+TIMEOUT = 10  # Seconds to wait for an answer before falling back to the files
+MAX_PAGE = 500  # Most rows a listing asks the daemon for; longer ones stream from the files
+
+# Errors the daemon reports by name, re-raised as the same type so commands
+# handle them exactly as they would a local failure
+ERRORS = {"FileNotFoundError": FileNotFoundError, "ValueError": ValueError, "KeyError": KeyError}
+
+
+def socket_path():
+    """Returns the Unix socket the daemon listens on, inside the database directory."""
+    return database_path("daemon.sock")
+
+def daemon_enabled():
+    """Whether commands may use a running daemon; FINANCE_TRACKER_DAEMON=off forces direct file access."""
+    return os.environ.get("FINANCE_TRACKER_DAEMON", "on").lower() not in ("off", "0", "no")
+
+
+class DaemonError(Exception):
+    """The daemon could not answer, so the caller should read the files itself."""
+
+
+class DaemonClient:
+    """A connection to the ledger daemon, speaking one JSON object per line each way."""
+
+    def __init__(self, path: str = None):
+        self.path = path or socket_path()
+        self._socket = None
+        self._file = None
+
+    def connect(self):
+        # Imported here: commands import this module, but most find no daemon to connect to
+        import socket
+        connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        connection.settimeout(TIMEOUT)
+        try:
+            connection.connect(self.path)
+        except OSError:
+            connection.close()
+            raise
+        self._socket = connection
+        self._file = connection.makefile("rwb")
+        return self
+
+    def close(self):
+        if self._socket is not None:
+            self._file.close()
+            self._socket.close()
+            self._socket = self._file = None
+
+    def call(self, engine: str, method: str, **params):
+        """Runs a query on the daemon and returns its result.
+
+        Raises the daemon's FileNotFoundError, ValueError or KeyError as-is, and
+        DaemonError when the daemon cannot be reached or fails otherwise.
+        """
+        try:
+            if self._socket is None:
+                self.connect()
+            self._file.write(json.dumps({"engine": engine, "method": method, "params": params}).encode() + b"\n")
+            self._file.flush()
+            line = self._file.readline()
+        except OSError as e:
+            self.close()
+            raise DaemonError(str(e)) from None
+        if not line:
+            self.close()
+            raise DaemonError("the daemon closed the connection")
+        response = json.loads(line)
+        if "error" in response:
+            error = ERRORS.get(response.get("type"))
+            if error is None:
+                raise DaemonError(response["error"])
+            raise error(response["error"])
+        return response["result"]
+
+
+class DaemonStorage:
+    """A storage backend whose queries are answered by the running daemon.
+
+    Balances, listings, monthly totals and budgets come from the daemon's
+    memory. Everything else, including every write, goes straight to the
+    wrapped local storage; the daemon notices the files changed and
+    refreshes itself. If the daemon stops answering, queries fall back to
+    the local storage too.
+    """
+
+    def __init__(self, storage, engine: str, client: DaemonClient):
+        self.storage = storage
+        self.engine = engine
+        self.client = client
+
+    def __getattr__(self, name):
+        return getattr(self.storage, name)
+
+    def _query(self, method: str, **params):
+        if self.client is not None:
+            try:
+                with phase("daemon"):
+                    return self.client.call(self.engine, method, **params)
+            except DaemonError:
+                self.client = None
+        return None
+
+    def month_totals(self, month: int):
+        result = self._query("month_totals", month=month)
+        return self.storage.month_totals(month) if result is None else result
+
+    def history_totals(self):
+        result = self._query("history_totals")
+        if result is None:
+            return self.storage.history_totals()
+        return {int(month): types for month, types in result.items()}
+
+    def malformed(self):
+        result = self._query("malformed")
+        return self.storage.malformed() if result is None else result
+
+    def load_budgets(self):
+        result = self._query("load_budgets")
+        return self.storage.load_budgets() if result is None else result
+
+    def latest(self, start: int = None, end: int = None, type: str = None, limit: int = None, offset: int = 0):
+        if limit is None or limit > MAX_PAGE:
+            # The daemon would send the whole listing as one answer, so it is
+            # read from the files instead, a row at a time
+            return self.storage.latest(start, end, type, limit, offset)
+        result = self._query("latest", start=start, end=end, type=type, limit=limit, offset=offset)
+        if result is None:
+            return self.storage.latest(start, end, type, limit, offset)
+        return (tuple(row) for row in result)
+
+
+def connect_daemon(storage, engine: str):
+    """Wraps a storage backend in a DaemonStorage if a daemon is listening, else returns it unchanged."""
+    path = socket_path()
+    if not daemon_enabled() or not os.path.exists(path):
+        return storage
+    try:
+        client = DaemonClient(path).connect()
+    except OSError:
+        return storage  # A socket left behind by a daemon that is gone
+    return DaemonStorage(storage, engine, client)
@@ -0,0 +1,142 @@
+import asyncio
+import json
+import os
+import signal
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from features.daemon.client import MAX_PAGE, DaemonClient, socket_path
+from features.ledger.storage import ENGINES
+
+MAX_RESULTS = 256  # Query results kept per engine until its files change
+
+def _latest(storage, limit: int = None, **params):
+    # Bounded, so no answer, and none of the results kept, holds the whole
+    # ledger; DaemonStorage reads longer listings from the files itself
+    if limit is None or limit > MAX_PAGE:
+        raise ValueError(f"Listings from the daemon are limited to {MAX_PAGE} rows.")
+    return list(storage.latest(limit=limit, **params))
+
+# Queries the daemon answers: name -> function of (storage, **params)
+QUERIES = {
+    "ping": lambda storage: "pong",
+    "month_totals": lambda storage, month: storage.month_totals(month),
+    "history_totals": lambda storage: storage.history_totals(),
+    "malformed": lambda storage: storage.malformed(),
+    "load_budgets": lambda storage: storage.load_budgets(),
+    "latest": _latest,
+}
+
+
+class Resident:
+    """Storage backends kept open by the daemon, with the answers it has given.
+
+    Before each query the backend's files are fingerprinted. While they are
+    unchanged, repeated queries are answered from memory; once a command
+    writes to them, the stored answers are dropped and the next queries
+    read the fresh data, incrementally where the backend supports it (the
+    parsed text ledger is extended with just the appended lines).
+
+    Queries run on a worker thread per engine, never on the event loop: a
+    read waiting for a writer's lock holds up only the queries for that
+    engine, while the loop keeps serving every connection. One thread per
+    engine keeps each backend and its answers to one query at a time.
+    """
+
+    def __init__(self):
+        self.storages = {}
+        self.fingerprints = {}
+        self.results = {}
+        self.workers = {}
+
+    async def answer(self, engine: str, method: str, params: dict):
+        """Runs query() on the engine's worker thread."""
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown storage engine '{engine}'.")
+        worker = self.workers.get(engine)
+        if worker is None:
+            worker = self.workers[engine] = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"daemon-{engine}")
+        return await asyncio.get_running_loop().run_in_executor(worker, self.query, engine, method, params)
+
+    def close(self):
+        for worker in self.workers.values():
+            worker.shutdown(wait=False, cancel_futures=True)
+
+    def query(self, engine: str, method: str, params: dict):
+        if method not in QUERIES:
+            raise ValueError(f"Unknown query '{method}'.")
+        storage = self.storages.get(engine)
+        if storage is None:
+            storage = self.storages[engine] = ENGINES[engine]()
+        fingerprint = storage.fingerprint()
+        if self.fingerprints.get(engine) != fingerprint:
+            self.fingerprints[engine] = fingerprint
+            self.results[engine] = OrderedDict()
+        results = self.results[engine]
+        key = (method, json.dumps(params, sort_keys=True))
+        if key in results:
+            results.move_to_end(key)
+            return results[key]
+        result = QUERIES[method](storage, **params)
+        results[key] = result
+        while len(results) > MAX_RESULTS:
+            results.popitem(last=False)
+        return result
+
+    def warm(self, engine: str):
+        """Loads an engine's ledger and aggregates up front, so the first commands are fast too."""
+        storage = self.storages[engine] = ENGINES[engine]()
+        if storage.exists():
+            storage.load()
+            storage.history_totals()
+
+
+async def _handle(resident: Resident, reader, writer):
+    try:
+        while line := await reader.readline():
+            try:
+                request = json.loads(line)
+                result = await resident.answer(request["engine"], request["method"], request.get("params", {}))
+                response = {"result": result}
+            except Exception as e:
+                response = {"error": str(e), "type": type(e).__name__}
+            writer.write(json.dumps(response).encode() + b"\n")
+            await writer.drain()
+    except ConnectionError:
+        pass
+    finally:
+        writer.close()
+
+async def _serve(path: str, resident: Resident, ready):
+    server = await asyncio.start_unix_server(lambda reader, writer: _handle(resident, reader, writer), path=path)
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, stop.set)
+    ready(path)
+    async with server:
+        await stop.wait()
+
+def is_running(path: str = None):
+    """Whether a daemon answers on the socket."""
+    try:
+        client = DaemonClient(path).connect()
+    except OSError:
+        return False
+    client.close()
+    return True
+
+def serve(engine: str, ready=lambda path: None):
+    """Runs the daemon until SIGINT or SIGTERM. Raises RuntimeError if one is already running."""
+    path = socket_path()
+    if is_running(path):
+        raise RuntimeError(f"A daemon is already listening on {path}.")
+    if os.path.exists(path):
+        os.remove(path)  # Left behind by a daemon that did not shut down cleanly
+    resident = Resident()
+    resident.warm(engine)
+    try:
+        asyncio.run(_serve(path, resident, ready))
+    finally:
+        resident.close()
+        if os.path.exists(path):
+            os.remove(path)
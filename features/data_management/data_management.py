@@ -1,136 +1,349 @@
 import typer
 from rich.console import Console
-import csv
+from contextlib import nullcontext
+import itertools
 import json
 import os
-from datetime import datetime
-import questionary
+from datetime import datetime, timedelta
+from features.budgets.alerts import BudgetAlerts
+from features.data_management.readers import open_input, read_csv, read_json
+from features.data_management.writers import export_range, open_output, write_chunks, write_rows
+from features.ledger.ledger import fingerprint
+from features.ledger import parallel
+from features.ledger.partitions import COMPRESSED, Manifest
+from features.ledger.storage import ENGINES, get_storage, set_storage_engine, storage_engine
+from features.ledger.timecodec import format_timestamp, to_epoch
+from features.profiling.profiler import count
+from features.smart_assistant.anomalies import AnomalyDetector
+from features.transactions.validation import imported_line, paisa
 
 app = typer.Typer()
 console = Console()
 
-def read_data(data_type: str):
-    """Reads data from the specified text file."""
-    file_path = f"database/{data_type}.txt"
-    data = []
-    if os.path.exists(file_path):
-        with open(file_path, "r") as f:
-            for line in f:
-                parts = line.strip().split(",")
-                data.append(parts)
-    return data
-
-def write_data(data_type: str, data: list, mode: str = "w"):
-    """Writes data to the specified text file."""
-    file_path = f"database/{data_type}.txt"
-    with open(file_path, mode) as f:
-        for item in data:
-            f.write(",".join(map(str, item)) + "\n")
+TRANSACTION_HEADERS = ["ID", "Timestamp", "Type", "Category", "Amount", "Description"]
+BUDGET_HEADERS = ["Category", "Amount"]
+
+def parse_date(date: str):
+    """Parses a YYYY-MM-DD option into a naive datetime, exiting with an error if invalid."""
+    try:
+        return datetime.strptime(date, "%Y-%m-%d")
+    except ValueError:
+        console.print(f"[bold red]Error:[/bold red] Invalid date '{date}'. Please use YYYY-MM-DD.")
+        raise typer.Exit(1)
+
+def use_jobs(jobs: int):
+    """Applies a --jobs option, exiting with an error if it is invalid."""
+    try:
+        parallel.set_jobs(jobs)
+    except ValueError as e:
+        console.print(f"[bold red]Error:[/bold red] {e}")
+        raise typer.Exit(1)
+
+def ask_confirm(message: str):
+    """Asks a yes/no question. questionary is imported here, as prompt_toolkit is slow to import."""
+    import questionary
+    return questionary.confirm(message).ask()
 
 @app.command()
 def export(
     data_type: str = typer.Argument(..., help="Type of data to export (transactions or budgets)."),
-    format: str = typer.Argument(..., help="Export format (csv or json)."),
-    path: str = typer.Option(None, "--path", "-p", help="Output file path.")
+    format: str = typer.Argument(..., help="Export format (csv, json or jsonl)."),
+    path: str = typer.Option(None, "--path", "-p", help="Output file path."),
+    compress: bool = typer.Option(False, "--gzip", "-z", help="Compress the output with gzip (implied by a .gz path)."),
+    date_from: str = typer.Option(None, "--from", help="Only export transactions on or after this date (YYYY-MM-DD)."),
+    date_to: str = typer.Option(None, "--to", help="Only export transactions on or before this date (YYYY-MM-DD)."),
+    type: str = typer.Option(None, "--type", help="Only export transactions of this type (matched ignoring case)."),
+    category: str = typer.Option(None, "--category", help="Only export transactions in this category."),
+    jobs: int = typer.Option(1, "--jobs", envvar="FINANCE_TRACKER_JOBS", help=parallel.JOBS_HELP)
 ):
-    """Export transactions or budgets to CSV or JSON."""
+    """Export transactions or budgets to CSV, JSON or JSON Lines, streaming the rows.
+
+    With --jobs, transactions are filtered and formatted by worker processes, a range of the ledger at a time.
+    """
     if data_type not in ["transactions", "budgets"]:
         console.print("[bold red]Error:[/bold red] data_type must be 'transactions' or 'budgets'.")
         raise typer.Exit(1)
-    if format not in ["csv", "json"]:
-        console.print("[bold red]Error:[/bold red] format must be 'csv' or 'json'.")
+    if format not in ["csv", "json", "jsonl"]:
+        console.print("[bold red]Error:[/bold red] format must be 'csv', 'json' or 'jsonl'.")
         raise typer.Exit(1)
+    use_jobs(jobs)
+    start = to_epoch(parse_date(date_from)) if date_from else None
+    end = to_epoch(parse_date(date_to) + timedelta(days=1)) if date_to else None
 
-    data = read_data(data_type)
-    if not data:
+    storage = get_storage()
+    chunks = None
+    if data_type == "transactions":
+        headers = TRANSACTION_HEADERS
+        rows = iter(())
+        if storage.exists() and parallel.jobs() > 1 and storage.parallel_scans:
+            chunks = export_chunks(storage, format, start, end, type, category)
+        elif storage.exists():
+            rows = ((id, timestamp, row_type, row_category, str(amount_paisa), description)
+                    for id, timestamp, row_type, row_category, amount_paisa, description
+                    in storage.iter_rows(start, end, type, category))
+    else:
+        headers = BUDGET_HEADERS
+        try:
+            rows = iter([[category, str(amount_paisa)] for category, amount_paisa in storage.load_budgets().items()])
+        except FileNotFoundError:
+            rows = iter(())
+
+    # Look at the first row (or block of rows) before creating the output file
+    first = next(rows if chunks is None else chunks, None)
+    if first is None:
         console.print(f"[bold yellow]No {data_type} found to export.[/bold yellow]")
         raise typer.Exit()
 
-    # Define headers based on data_type
-    if data_type == "transactions":
-        headers = ["ID", "Timestamp", "Type", "Category", "Amount", "Description"]
-    else: # budgets
-        headers = ["Category", "Amount"]
-
     if path is None:
-        path = f"export_{data_type}.{format}"
+        path = f"export_{data_type}.{format}" + (".gz" if compress else "")
+    compress = compress or path.endswith(".gz")
 
     try:
-        if format == "csv":
-            with open(path, "w", newline="") as outfile:
-                writer = csv.writer(outfile)
-                writer.writerow(headers)
-                writer.writerows(data)
-        elif format == "json":
-            # Convert list of lists to list of dicts for JSON
-            json_data = []
-            for row in data:
-                json_data.append(dict(zip(headers, row)))
-            with open(path, "w") as outfile:
-                json.dump(json_data, outfile, indent=4)
-        
-        console.print(f"[bold green]{data_type.capitalize()} exported successfully to {path}[/bold green]")
+        with open_output(path, compress) as outfile:
+            if chunks is None:
+                written = write_rows(format, headers, itertools.chain([first], rows), outfile)
+            else:
+                written = write_chunks(outfile, format, headers, itertools.chain([first], chunks))
+        console.print(f"[bold green]{written} {data_type} exported successfully to {path}[/bold green]")
     except Exception as e:
         console.print(f"[bold red]Error during export:[/bold red] {e}")
         raise typer.Exit(1)
 
+def export_chunks(storage, format: str, start: int, end: int, type: str, category: str):
+    """Yields (text, rows) blocks of exported transactions, filtered and formatted by worker processes in storage order."""
+    filters = (format_timestamp(start).encode() if start is not None else None,
+               format_timestamp(end).encode() if end is not None else None,
+               type.lower().encode() if type else None, category.encode() if category else None)
+    for text, rows, filtered, malformed, size in storage.scan(export_range, filters, format, TRANSACTION_HEADERS, start=start, end=end):
+        count("bytes_read", size)
+        count("rows_filtered", filtered)
+        count("malformed_skipped", malformed)
+        if rows:
+            yield text, rows
+
+def record_fields(record, headers: list):
+    """Returns the fields of an imported CSV row or JSON item in header order."""
+    if isinstance(record, dict):
+        by_name = {str(key).lower(): value for key, value in record.items()}
+        missing = [header for header in headers if header.lower() not in by_name]
+        if missing:
+            raise ValueError(f"Missing {', '.join(missing)}.")
+        return [by_name[header.lower()] for header in headers]
+    if isinstance(record, list):
+        if len(record) != len(headers):
+            raise ValueError(f"Expected {len(headers)} fields but found {len(record)}.")
+        return record
+    if isinstance(record, str):
+        raise ValueError("Not valid JSON.")
+    raise ValueError("Expected a JSON object or array.")
+
+def budget_entry(category, amount_paisa):
+    """Validates an imported budget row and returns (category, amount_paisa)."""
+    category = str(category).strip()
+    if not category or "," in category or "\n" in category:
+        raise ValueError(f"Invalid category: {category!r}.")
+    amount = paisa(amount_paisa)
+    if amount <= 0:
+        raise ValueError("Amount must be positive.")
+    return category, amount
+
+def checkpoint_path(path: str):
+    return path + ".checkpoint.json"
+
+def read_checkpoint(path: str):
+    """Returns the saved progress of an interrupted import of path, or None."""
+    try:
+        with open(checkpoint_path(path), "r") as f:
+            checkpoint = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+    if checkpoint.get("fingerprint") != fingerprint(path):
+        console.print(f"[bold yellow]{path} changed since an earlier import was interrupted; starting over.[/bold yellow]")
+        return None
+    return checkpoint
+
+def write_checkpoint(path: str, checkpoint: dict):
+    with open(checkpoint_path(path) + ".tmp", "w") as f:
+        json.dump(checkpoint, f)
+    os.replace(checkpoint_path(path) + ".tmp", checkpoint_path(path))
+
+class Rejects:
+    """Rows that failed validation, written to a JSON Lines file as they are committed."""
+
+    def __init__(self, path: str, append: bool = False):
+        self.path = path
+        self.mode = "a" if append else "w"
+        self.count = 0
+        self.pending = []
+
+    def add(self, number: int, record, error: Exception):
+        self.pending.append({"row": number, "error": str(error), "record": record})
+
+    def flush(self):
+        if self.pending:
+            with open(self.path, self.mode) as f:
+                for entry in self.pending:
+                    f.write(json.dumps(entry) + "\n")
+            self.mode = "a"
+            self.count += len(self.pending)
+            self.pending = []
+
+def import_budgets(records, overwrite: bool, rejects: Rejects):
+    storage = get_storage()
+    with storage.budgets_locked():
+        budgets = {}
+        if not overwrite:
+            try:
+                budgets = storage.load_budgets()
+            except FileNotFoundError:
+                pass
+        imported = 0
+        for number, record in records:
+            try:
+                category, amount = budget_entry(*record_fields(record, BUDGET_HEADERS))
+            except ValueError as e:
+                rejects.add(number, record, e)
+                continue
+            budgets[category] = amount
+            imported += 1
+        storage.write_budgets(budgets)
+    rejects.flush()
+    return imported
+
+def import_transactions(path: str, records, raw, checkpoint: dict, chunk_size: int, rejects: Rejects,
+                        alerts: BudgetAlerts = None, detector: AnomalyDetector = None):
+    """Validates and writes transactions chunk by chunk, checkpointing after each commit."""
+    storage = get_storage(daemon=False)  # The checks read the ledger while the batch holds the write lock
+    skip = checkpoint["rows"]
+    # Rows committed just before an interruption may precede the checkpoint,
+    # so the first chunk after resuming leaves out IDs that are already stored
+    verify = skip > 0
+    rows = 0
+    lines = []
+
+    def commit_chunk():
+        nonlocal lines, verify
+        if verify:
+            # Looked up together: a lookup per line would scan the ledger for each new ID
+            stored = storage.stored_ids([line.split(",", 1)[0] for line in lines])
+            lines = [line for line in lines if line.split(",", 1)[0] not in stored]
+            verify = False
+        if lines:
+            written = commit("".join(lines))
+            checkpoint["added"] += len(written)
+            if alerts:
+                alerts.check(written)
+            if detector:
+                detector.check(written)
+        lines = []
+        rejects.flush()
+        checkpoint["rows"] = rows
+        checkpoint["rejected"] = rejects.count
+        write_checkpoint(path, checkpoint)
+        progress.update(task, completed=raw.tell())
+
+    from rich.progress import Progress # Deferred: only imports draw progress
+    with Progress(console=console, transient=True, disable=not console.is_terminal) as progress, \
+            (detector.writing() if detector else nullcontext()), storage.batch() as commit:
+        task = progress.add_task(f"Importing {path}", total=os.path.getsize(path))
+        for number, record in records:
+            rows += 1
+            if rows <= skip:
+                continue
+            try:
+                lines.append(imported_line(*record_fields(record, TRANSACTION_HEADERS)))
+            except ValueError as e:
+                rejects.add(number, record, e)
+            if len(lines) + len(rejects.pending) >= chunk_size:
+                commit_chunk()
+        commit_chunk()
+    return checkpoint["added"]
+
 @app.command()
 def import_data(
     data_type: str = typer.Argument(..., help="Type of data to import (transactions or budgets)."),
-    format: str = typer.Argument(..., help="Import format (csv or json)."),
+    format: str = typer.Argument(..., help="Import format (csv, json or jsonl)."),
     path: str = typer.Option(..., "--path", "-p", help="Input file path."),
-    overwrite: bool = typer.Option(False, "--overwrite", "-o", help="Overwrite existing data.")
+    overwrite: bool = typer.Option(False, "--overwrite", "-o", help="Overwrite existing data."),
+    chunk_size: int = typer.Option(10000, help="Rows validated and written per batch."),
+    rejected: str = typer.Option(None, help="JSON Lines file for rows that fail validation. Defaults to <path>.rejected.jsonl."),
+    resume: bool = typer.Option(None, "--resume/--restart", help="Continue or start over an interrupted import of the same file. Asks if not given."),
+    alerts: bool = typer.Option(True, "--alerts/--no-alerts", help="Alert when an imported expense takes its category past 70% or 100% of its budget."),
+    anomalies: bool = typer.Option(True, "--anomalies/--no-anomalies", help="Flag imported amounts far outside their category's usual range, or sudden spikes."),
+    jobs: int = typer.Option(1, "--jobs", envvar="FINANCE_TRACKER_JOBS", help=parallel.JOBS_HELP)
 ):
-    """Import transactions or budgets from CSV or JSON."""
+    """Import transactions or budgets from CSV, JSON or JSON Lines, streaming the file."""
     if data_type not in ["transactions", "budgets"]:
         console.print("[bold red]Error:[/bold red] data_type must be 'transactions' or 'budgets'.")
         raise typer.Exit(1)
-    if format not in ["csv", "json"]:
-        console.print("[bold red]Error:[/bold red] format must be 'csv' or 'json'.")
+    if format not in ["csv", "json", "jsonl"]:
+        console.print("[bold red]Error:[/bold red] format must be 'csv', 'json' or 'jsonl'.")
         raise typer.Exit(1)
     if not os.path.exists(path):
         console.print(f"[bold red]Error:[/bold red] Input file not found: {path}")
         raise typer.Exit(1)
+    if chunk_size <= 0:
+        console.print("[bold red]Error:[/bold red] --chunk-size must be positive.")
+        raise typer.Exit(1)
+    use_jobs(jobs)
 
-    imported_data = []
-    try:
-        if format == "csv":
-            with open(path, "r", newline="") as infile:
-                reader = csv.reader(infile)
-                headers = next(reader) # Skip header row
-                for row in reader:
-                    imported_data.append(row)
-        elif format == "json":
-            with open(path, "r") as infile:
-                json_data = json.load(infile)
-                # Convert list of dicts to list of lists
-                if json_data:
-                    headers = list(json_data[0].keys()) # Assuming all dicts have same keys
-                    for item in json_data:
-                        imported_data.append([item[key] for key in headers])
-                
-        if not imported_data:
+    checkpoint = read_checkpoint(path) if data_type == "transactions" else None
+    if checkpoint and resume is None:
+        resume = ask_confirm(f"An import of {path} was interrupted after {checkpoint['rows']} rows. Resume it?")
+    if checkpoint and not resume:
+        checkpoint = None
+    rejects = Rejects(rejected or path + ".rejected.jsonl", append=checkpoint is not None)
+    budget_alerts = detector = None
+
+    raw, infile = open_input(path)
+    with infile:
+        try:
+            records = read_csv(infile) if format == "csv" else read_json(infile)
+            first = next(records, None)
+        except (ValueError, UnicodeDecodeError) as e:
+            console.print(f"[bold red]Error during import:[/bold red] {e}")
+            raise typer.Exit(1)
+        if first is None:
             console.print(f"[bold yellow]No data found in {path} to import.[/bold yellow]")
             raise typer.Exit()
-        
-        if overwrite:
-            confirm = questionary.confirm(f"Are you sure you want to overwrite existing {data_type} data? This action cannot be undone.").ask()
+        records = itertools.chain([first], records)
+
+        if overwrite and checkpoint is None:
+            confirm = ask_confirm(f"Are you sure you want to overwrite existing {data_type} data? This action cannot be undone.")
             if not confirm:
                 console.print("Import cancelled.")
                 raise typer.Exit()
-            write_data(data_type, imported_data, mode="w") # Overwrite
-        else:
-            write_data(data_type, imported_data, mode="a") # Append
-        
-        console.print(f"[bold green]{len(imported_data)} {data_type.capitalize()} imported successfully from {path}[/bold green]")
 
-    except Exception as e:
-        console.print(f"[bold red]Error during import:[/bold red] {e}")
-        raise typer.Exit(1)
+        try:
+            if data_type == "budgets":
+                imported = import_budgets(records, overwrite, rejects)
+            else:
+                if checkpoint is None:
+                    if overwrite:
+                        get_storage().replace("")
+                    checkpoint = {"fingerprint": fingerprint(path), "rows": 0, "added": 0, "rejected": 0}
+                else:
+                    rejects.count = checkpoint["rejected"]
+                    console.print(f"Resuming after row {checkpoint['rows']}.")
+                if alerts:
+                    budget_alerts = BudgetAlerts(get_storage(daemon=False))
+                if anomalies:
+                    detector = AnomalyDetector(get_storage(daemon=False))
+                imported = import_transactions(path, records, raw, checkpoint, chunk_size, rejects, budget_alerts, detector)
+                os.remove(checkpoint_path(path))
+        except Exception as e:
+            console.print(f"[bold red]Error during import:[/bold red] {e}")
+            if checkpoint and checkpoint["added"]:
+                console.print(f"{checkpoint['added']} transactions were imported before the error. Run the import again to resume.")
+            raise typer.Exit(1)
 
-    except Exception as e:
-        console.print(f"[bold red]Error during import:[/bold red] {e}")
-        raise typer.Exit(1)
+    console.print(f"[bold green]{imported} {data_type.capitalize()} imported successfully from {path}[/bold green]")
+    if budget_alerts:
+        budget_alerts.report(console)
+    if detector:
+        detector.report(console)
+    if rejects.count:
+        console.print(f"[bold yellow]{rejects.count} rows were rejected and written to {rejects.path}[/bold yellow]")
 
 @app.command()
 def clear(
@@ -141,25 +354,121 @@ def clear(
         console.print("[bold red]Error:[/bold red] data_type must be 'transactions', 'budgets', or 'all'.")
         raise typer.Exit(1)
     
-    confirm = questionary.confirm(f"Are you sure you want to clear ALL {data_type} data? This action cannot be undone.").ask()
+    confirm = ask_confirm(f"Are you sure you want to clear ALL {data_type} data? This action cannot be undone.")
     if not confirm:
         console.print("Clear operation cancelled.")
         raise typer.Exit()
 
     try:
         if data_type == "transactions" or data_type == "all":
-            with open("database/transactions.txt", "w") as f:
-                f.write("")
+            get_storage().replace("")
             console.print("[bold green]All transactions data cleared.[/bold green]")
         
         if data_type == "budgets" or data_type == "all":
-            with open("database/budgets.txt", "w") as f:
-                f.write("")
+            get_storage().write_budgets({})
             console.print("[bold green]All budgets data cleared.[/bold green]")
 
     except Exception as e:
         console.print(f"[bold red]Error during clear operation:[/bold red] {e}")
         raise typer.Exit(1)
 
+@app.command()
+def compact():
+    """Reclaim the space held by deleted transactions."""
+    try:
+        storage = get_storage()
+        reclaimed = storage.compact()
+        console.print(f"[bold green]Compacted {storage.path}, reclaiming {reclaimed} bytes.[/bold green]")
+    except FileNotFoundError:
+        console.print("[bold yellow]No transactions found.[/bold yellow]")
+    except Exception as e:
+        console.print(f"[bold red]Error during compaction:[/bold red] {e}")
+        raise typer.Exit(1)
+
+@app.command()
+def migrate(
+    to: str = typer.Argument(..., help="Storage engine to convert to (text, binary, sqlite or partitioned)."),
+    source: str = typer.Option(None, "--from", "-f", help="Storage engine to convert from. Defaults to text, or to the configured engine when converting to text.")
+):
+    """Copy transactions and budgets from one storage engine to another."""
+    if source is None:
+        source = "text" if to != "text" else storage_engine()
+    for engine in (to, source):
+        if engine not in ENGINES:
+            console.print(f"[bold red]Error:[/bold red] storage engine must be one of: {', '.join(ENGINES)}.")
+            raise typer.Exit(1)
+    if source == to:
+        console.print(f"[bold red]Error:[/bold red] source and target are both '{to}'.")
+        raise typer.Exit(1)
+
+    source_storage, target_storage = get_storage(source), get_storage(to)
+    if not source_storage.exists():
+        console.print(f"[bold yellow]No transactions found in {source_storage.path}.[/bold yellow]")
+        raise typer.Exit()
+    if target_storage.exists():
+        confirm = ask_confirm(f"{target_storage.path} already exists. Overwrite it with the contents of {source_storage.path}?")
+        if not confirm:
+            console.print("Migration cancelled.")
+            raise typer.Exit()
+
+    try:
+        ledger = source_storage.load()
+        rows = target_storage.replace(ledger.data.decode())
+        try:
+            target_storage.write_budgets(source_storage.load_budgets())
+        except FileNotFoundError:
+            pass # No budgets to copy
+        console.print(f"[bold green]Migrated {len(rows)} transactions from {source_storage.path} to {target_storage.path}.[/bold green]")
+        if len(ledger.malformed) > len(rows.malformed):
+            console.print(f"[bold yellow]Skipped {len(ledger.malformed)} malformed lines.[/bold yellow]")
+        console.print(f"Set FINANCE_TRACKER_STORAGE={to} to use the {to} engine.")
+    except Exception as e:
+        console.print(f"[bold red]Error during migration:[/bold red] {e}")
+        raise typer.Exit(1)
+
+@app.command()
+def repartition(
+    source: str = typer.Option(None, "--from", "-f", help="Storage engine to read the ledger from. Defaults to the configured engine."),
+    switch: bool = typer.Option(True, "--switch/--no-switch", help="Make the partitioned engine the configured one in database/config.json.")
+):
+    """Split the ledger into one file per month under database/transactions/, compressing closed months.
+
+    Run on a partitioned ledger, it rebuilds the partitions and their manifest.
+    """
+    source = source or storage_engine()
+    if source not in ENGINES:
+        console.print(f"[bold red]Error:[/bold red] storage engine must be one of: {', '.join(ENGINES)}.")
+        raise typer.Exit(1)
+
+    source_storage, target_storage = get_storage(source), get_storage("partitioned")
+    if not source_storage.exists():
+        console.print(f"[bold yellow]No transactions found in {source_storage.path}.[/bold yellow]")
+        raise typer.Exit()
+
+    try:
+        ledger = source_storage.load()
+        rows = target_storage.replace(ledger.data.decode())
+        if source == "sqlite":
+            try:
+                target_storage.write_budgets(source_storage.load_budgets())
+            except FileNotFoundError:
+                pass # No budgets to copy
+        if switch:
+            set_storage_engine("partitioned")
+    except Exception as e:
+        console.print(f"[bold red]Error during repartitioning:[/bold red] {e}")
+        raise typer.Exit(1)
+
+    manifest = Manifest.load(target_storage.path)
+    closed = sum(manifest.entries[month]["file"].endswith(COMPRESSED) for month in manifest.entries)
+    console.print(f"[bold green]Split {len(rows)} transactions into {len(manifest.entries)} monthly partitions "
+                  f"in {target_storage.path} ({closed} closed and compressed).[/bold green]")
+    if len(ledger.malformed) > len(rows.malformed):
+        console.print(f"[bold yellow]Skipped {len(ledger.malformed)} malformed lines.[/bold yellow]")
+    if source != "partitioned":
+        console.print(f"{source_storage.path} was left in place; remove it once you no longer need it.")
+    if switch and os.environ.get("FINANCE_TRACKER_STORAGE", "partitioned") != "partitioned":
+        console.print("[bold yellow]FINANCE_TRACKER_STORAGE overrides the configured engine; unset it to use the partitions.[/bold yellow]")
+
 if __name__ == "__main__":
     app()
\ No newline at end of file
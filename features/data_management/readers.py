@@ -0,0 +1,97 @@
+import csv
+import io
+import json
+
+CHUNK_SIZE = 1 << 16
+MAX_VALUE_SIZE = 16 << 20  # Longest single JSON value the array reader will buffer
+
+def open_input(path: str):
+    """Opens a file for streaming reads. Returns (raw binary file, text wrapper).
+
+    The raw file's tell() reports how far the reader has got, for progress.
+    """
+    raw = open(path, "rb")
+    return raw, io.TextIOWrapper(raw, encoding="utf-8", newline="")
+
+def read_csv(f):
+    """Yields (line number, list of fields) for each row after the header."""
+    reader = csv.reader(f)
+    next(reader, None)  # Skip header row
+    for row in reader:
+        if row:
+            yield reader.line_num, row
+
+def read_json(f):
+    """Yields (number, value) for each item of a JSON array or each line of JSON Lines.
+
+    Values are decoded one at a time, so memory stays bounded by the largest
+    item rather than the file. An invalid JSON Lines line is yielded as its
+    raw text so the caller can reject it and carry on; syntax errors inside
+    an array cannot be resynchronised and raise ValueError.
+    """
+    first = f.read(1)
+    while first and first.isspace():
+        first = f.read(1)
+    if not first:
+        return
+    if first != "[":
+        lines = iter(f)
+        for number, line in enumerate(_chain(first, lines), 1):
+            if not line.strip():
+                continue
+            try:
+                yield number, json.loads(line)
+            except ValueError:
+                yield number, line.rstrip("\r\n")
+        return
+    yield from enumerate(_read_array(f), 1)
+
+def _chain(first: str, lines):
+    """Puts the character consumed while sniffing the format back on the first line."""
+    yield first + next(lines, "")
+    yield from lines
+
+def _read_array(f):
+    decoder = json.JSONDecoder()
+    buffer, pos, eof = "", 0, False
+    expect_value = first = True
+    while True:
+        while pos < len(buffer) and buffer[pos].isspace():
+            pos += 1
+        if pos == len(buffer):
+            if eof:
+                raise ValueError("Invalid JSON: unexpected end of file inside the array.")
+            buffer, pos = f.read(CHUNK_SIZE), 0
+            eof = not buffer
+            continue
+        if not expect_value:
+            if buffer[pos] == "]":
+                return
+            if buffer[pos] != ",":
+                raise ValueError(f"Invalid JSON: expected ',' or ']' but found {buffer[pos]!r}.")
+            pos += 1
+            expect_value = True
+            continue
+        if buffer[pos] == "]":
+            if not first:
+                raise ValueError("Invalid JSON: a ',' is followed by ']'.")
+            return
+        try:
+            value, end = decoder.raw_decode(buffer, pos)
+        except ValueError:
+            end = None
+        # A value that runs to the end of the buffer may continue in the next chunk
+        if end is None or (end == len(buffer) and not eof):
+            if eof:
+                raise ValueError("Invalid JSON inside the array.")
+            if len(buffer) - pos > MAX_VALUE_SIZE:
+                raise ValueError("Invalid JSON: an array item is too large or malformed.")
+            chunk = f.read(CHUNK_SIZE)
+            eof = not chunk
+            buffer, pos = buffer[pos:] + chunk, 0
+            continue
+        yield value
+        pos = end
+        expect_value = first = False
+        if pos > CHUNK_SIZE:
+            buffer, pos = buffer[pos:], 0
@@ -0,0 +1,52 @@
+import csv
+import gzip
+import io
+import json
+from features.ledger.parallel import range_rows
+from features.output.formats import write_rows
+
+def open_output(path: str, compress: bool = False):
+    """Opens a text file for streaming writes, gzip-compressed if asked."""
+    if compress:
+        # Level 6 keeps compression close to disk speed; 9 gains little
+        return gzip.open(path, "wt", encoding="utf-8", newline="", compresslevel=6)
+    return open(path, "w", encoding="utf-8", newline="")
+
+def format_rows(format: str, headers: list, rows):
+    """Returns rows as write_rows (see features.output.formats) writes them, without the CSV header or the JSON array's brackets.
+
+    Each JSON array item starts with its separating comma; write_chunks
+    drops the first one.
+    """
+    if format == "csv":
+        buffer = io.StringIO()
+        csv.writer(buffer, lineterminator="\n").writerows(rows)
+        return buffer.getvalue()
+    if format == "jsonl":
+        return "".join(json.dumps(dict(zip(headers, row))) + "\n" for row in rows)
+    return "".join(",\n    " + json.dumps(dict(zip(headers, row))) for row in rows)
+
+def write_chunks(f, format: str, headers: list, chunks):
+    """Writes (text, rows) pieces made by format_rows, in order, as one file. Returns how many rows were written."""
+    count = 0
+    if format == "csv":
+        csv.writer(f, lineterminator="\n").writerow(headers)
+    elif format == "json":
+        f.write("[")
+    for text, rows in chunks:
+        f.write(text[1:] if format == "json" and not count else text)
+        count += rows
+    if format == "json":
+        f.write("\n]\n")
+    return count
+
+def export_range(file: str, start: int, stop: int, deleted, filters: tuple, format: str, headers: list):
+    """Worker for parallel exports: formats the rows of a ledger range that pass the filters.
+
+    filters are range_rows's (low, high, type, category). Returns (text,
+    rows, rows filtered out, malformed rows skipped, bytes read).
+    """
+    rows, filtered, malformed, size = range_rows(file, start, stop, deleted, *filters)
+    text = format_rows(format, headers, ((id, timestamp, type, category, str(amount_paisa), description)
+                                         for id, timestamp, type, category, amount_paisa, description in rows))
+    return text, len(rows), filtered, malformed, size
@@ -0,0 +1,297 @@
+import json
+import mmap
+import os
+import struct
+import uuid
+from array import array
+from contextlib import contextmanager
+from features.ledger.ledger import Ledger
+from features.ledger.locking import atomic_write
+from features.ledger.timecodec import format_timestamp
+
+MAGIC = b"FTBLOG01"
+BLOCK_RECORDS = 4096
+_FILE_HEADER = struct.Struct("<8sI4x")
+_BLOCK_HEADER = struct.Struct("<I4x")
+
+# Fixed-size record fields, stored column by column inside each block so a
+# block's column can be copied out of the mapping in one piece.
+# (name, array typecode, bytes per record)
+COLUMNS = (
+    ("ids", None, 16),
+    ("timestamps", "q", 8),
+    ("amounts", "q", 8),
+    ("heap_offsets", "Q", 8),
+    ("months", "I", 4),
+    ("heap_lengths", "I", 4),
+    ("categories", "I", 4),
+    ("types", "B", 1),
+    ("flags", "B", 1),
+)
+_FIELDS = tuple(struct.Struct("<16s" if typecode is None else "<" + typecode) for _, typecode, _ in COLUMNS)
+RECORD_SIZE = sum(size for _, _, size in COLUMNS)
+BLOCK_SIZE = _BLOCK_HEADER.size + RECORD_SIZE * BLOCK_RECORDS
+
+FLAG_TEXT_ID = 1  # The ID is not a UUID and is stored in the heap before the description
+FLAG_DELETED = 2  # Tombstone: the record was deleted and is skipped by readers
+
+_column_offsets = {}
+_offset = _BLOCK_HEADER.size
+for _name, _, _size in COLUMNS:
+    _column_offsets[_name] = _offset
+    _offset += _size * BLOCK_RECORDS
+
+def _code(names: list, name: str):
+    """Returns the position of name in names, adding it if it is new."""
+    try:
+        return names.index(name)
+    except ValueError:
+        names.append(name)
+        return len(names) - 1
+
+
+class BinaryLedger(Ledger):
+    """Ledger loaded from a binary log.
+
+    Columns are copied out of the mapped blocks with one bulk copy per column
+    per block; nothing is tokenized or converted per row. IDs and descriptions
+    are read from the mapped heap only when a row is displayed.
+    """
+
+    _row_columns = ("timestamps", "months", "amounts", "types", "categories", "heap_offsets", "heap_lengths", "flags", "records")
+
+    def __init__(self):
+        super().__init__()
+        self.ids = bytearray()
+        self.heap_offsets = array("Q")
+        self.heap_lengths = array("I")
+        self.flags = array("B")
+        self.records = array("Q")  # Record number of each row in the log
+        self._heap = b""
+
+    def _keep(self, indexes: list):
+        ids = self.ids
+        self.ids = bytearray(b"".join(ids[index * 16:index * 16 + 16] for index in indexes))
+        super()._keep(indexes)
+
+    def _entry(self, index: int):
+        start = self.heap_offsets[index]
+        return bytes(self._heap[start:start + self.heap_lengths[index]]).decode()
+
+    def id(self, index: int):
+        if self.flags[index] & FLAG_TEXT_ID:
+            return self._entry(index).split(",", 1)[0]
+        return str(uuid.UUID(bytes=bytes(self.ids[index * 16:index * 16 + 16])))
+
+    def find_all(self, prefix: str):
+        for index in range(len(self)):
+            if self.id(index).startswith(prefix):
+                yield index
+
+    def position(self, index: int):
+        return self.records[index]
+
+    def row(self, index: int):
+        description = self._entry(index)
+        if self.flags[index] & FLAG_TEXT_ID:
+            id, description = description.split(",", 1)
+        else:
+            id = self.id(index)
+        return (id, format_timestamp(self.timestamps[index]), self.type_names[self.types[index]],
+                self.category_names[self.categories[index]], self.amounts[index], description)
+
+    @property
+    def data(self):
+        """The rows rendered in the text format."""
+        return "".join(",".join(map(str, self.row(index))) + "\n" for index in range(len(self))).encode()
+
+
+class BinaryLog:
+    """Transactions stored as fixed-size records plus a description heap.
+
+    Three files share the base name of the log: the record file (.bin), the
+    heap of IDs/descriptions (.heap) and the type/category name tables
+    (.names.json). Records are grouped into blocks of BLOCK_RECORDS, with
+    each block holding its records column by column.
+    """
+
+    def __init__(self, path: str):
+        base = os.path.splitext(path)[0]
+        self.path = path
+        self.heap_path = base + ".heap"
+        self.names_path = base + ".names.json"
+
+    def _read_names(self):
+        try:
+            with open(self.names_path, "r") as f:
+                names = json.load(f)
+        except FileNotFoundError:
+            return [], []
+        return names["types"], names["categories"]
+
+    def _write_names(self, type_names, category_names):
+        with atomic_write(self.names_path, "w") as f:
+            json.dump({"types": type_names, "categories": category_names}, f)
+
+    def load(self):
+        """Maps the log and returns its rows as a BinaryLedger.
+
+        Raises FileNotFoundError when the log does not exist.
+        """
+        ledger = BinaryLedger()
+        with open(self.path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size > _FILE_HEADER.size:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    self._read_blocks(memoryview(mapped), size, ledger)
+        ledger.records = array("Q", range(len(ledger)))
+        flags = ledger.flags
+        if FLAG_DELETED in flags or FLAG_DELETED | FLAG_TEXT_ID in flags:
+            ledger._keep([index for index, flag in enumerate(flags) if not flag & FLAG_DELETED])
+        type_names, category_names = self._read_names()
+        for name in type_names:
+            ledger._intern(name.encode(), ledger._type_codes, ledger.type_names)
+        for name in category_names:
+            ledger._intern(name.encode(), ledger._category_codes, ledger.category_names)
+        if os.path.exists(self.heap_path) and os.path.getsize(self.heap_path):
+            with open(self.heap_path, "rb") as f:
+                ledger._heap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return ledger
+
+    def _read_blocks(self, view, size, ledger):
+        magic, block_records = _FILE_HEADER.unpack_from(view, 0)
+        if magic != MAGIC or block_records != BLOCK_RECORDS:
+            raise ValueError(f"{self.path} is not a transactions log")
+        try:
+            for block in range(_FILE_HEADER.size, size, BLOCK_SIZE):
+                count = _BLOCK_HEADER.unpack_from(view, block)[0]
+                for name, typecode, field_size in COLUMNS:
+                    start = block + _column_offsets[name]
+                    if typecode is None:
+                        ledger.ids += view[start:start + count * field_size]
+                    else:
+                        getattr(ledger, name).frombytes(view[start:start + count * field_size])
+        finally:
+            view.release()
+
+    def _record_offset(self, record: int, column: str):
+        """Returns the file offset of one field of a record."""
+        block, slot = divmod(record, BLOCK_RECORDS)
+        size = next(field_size for name, _, field_size in COLUMNS if name == column)
+        return _FILE_HEADER.size + block * BLOCK_SIZE + _column_offsets[column] + slot * size
+
+    @contextmanager
+    def reader(self):
+        """Yields a function that reads one record as (id, timestamp, type, category, amount_paisa, description)."""
+        type_names, category_names = self._read_names()
+        with open(self.path, "rb") as log, open(self.heap_path, "rb") as heap:
+            def read_record(record: int):
+                values = {}
+                for (name, _, _), field in zip(COLUMNS, _FIELDS):
+                    values[name] = field.unpack(os.pread(log.fileno(), field.size, self._record_offset(record, name)))[0]
+                description = os.pread(heap.fileno(), values["heap_lengths"], values["heap_offsets"]).decode()
+                if values["flags"] & FLAG_TEXT_ID:
+                    id, description = description.split(",", 1)
+                else:
+                    id = str(uuid.UUID(bytes=values["ids"]))
+                return (id, format_timestamp(values["timestamps"]), type_names[values["types"]],
+                        category_names[values["categories"]], values["amounts"], description)
+            yield read_record
+
+    def mark_deleted(self, records: list):
+        """Sets the tombstone flag on each record in place."""
+        with open(self.path, "r+b") as f:
+            for record in records:
+                offset = self._record_offset(record, "flags")
+                flags = os.pread(f.fileno(), 1, offset)[0]
+                os.pwrite(f.fileno(), bytes([flags | FLAG_DELETED]), offset)
+
+    def _record_count(self):
+        with open(self.path, "rb") as f:
+            size = f.seek(0, os.SEEK_END)
+            if size <= _FILE_HEADER.size:
+                return 0
+            f.seek(size - BLOCK_SIZE)
+            count = _BLOCK_HEADER.unpack(f.read(_BLOCK_HEADER.size))[0]
+        return (size - _FILE_HEADER.size) // BLOCK_SIZE * BLOCK_RECORDS - BLOCK_RECORDS + count
+
+    def append(self, rows: Ledger):
+        """Appends the parsed rows of a text ledger and returns the record number of the first.
+
+        Malformed lines are dropped.
+        """
+        if not len(rows):
+            return self._record_count() if os.path.exists(self.path) else 0
+        # Map the codes of the incoming rows onto the log's name tables. The
+        # tables are saved before any record can refer to a new code.
+        type_names, category_names = self._read_names()
+        known = len(type_names) + len(category_names)
+        type_map = [_code(type_names, name) for name in rows.type_names]
+        category_map = [_code(category_names, name) for name in rows.category_names]
+        if len(type_names) > 256:
+            raise ValueError("a transactions log holds at most 256 transaction types")
+        if len(type_names) + len(category_names) != known:
+            self._write_names(type_names, category_names)
+
+        if not os.path.exists(self.path):
+            with open(self.path, "wb") as f:
+                f.write(_FILE_HEADER.pack(MAGIC, BLOCK_RECORDS))
+
+        with open(self.heap_path, "ab") as heap, open(self.path, "r+b") as log:
+            heap_offset = heap.tell()
+            size = log.seek(0, os.SEEK_END)
+            # Records are filled into an in-memory copy of the last block,
+            # which is written back whole once it is full or the rows run out
+            if size == _FILE_HEADER.size:
+                block_start, count, block = size, 0, bytearray(BLOCK_SIZE)
+            else:
+                block_start = size - BLOCK_SIZE
+                log.seek(block_start)
+                block = bytearray(log.read(BLOCK_SIZE))
+                count = _BLOCK_HEADER.unpack_from(block, 0)[0]
+                if count == BLOCK_RECORDS:
+                    block_start, count, block = size, 0, bytearray(BLOCK_SIZE)
+            first = (block_start - _FILE_HEADER.size) // BLOCK_SIZE * BLOCK_RECORDS + count
+
+            entries = []
+            for index in range(len(rows)):
+                id, _, _, _, _, description = rows.row(index)
+                flags = 0
+                try:
+                    id_bytes = uuid.UUID(id).bytes
+                    if str(uuid.UUID(bytes=id_bytes)) != id:
+                        raise ValueError(id)
+                except ValueError:
+                    id_bytes = bytes(16)
+                    flags |= FLAG_TEXT_ID
+                    description = f"{id},{description}"
+                entry = description.encode()
+                entries.append(entry)
+
+                values = (id_bytes, rows.timestamps[index], rows.amounts[index], heap_offset,
+                          rows.months[index], len(entry), category_map[rows.categories[index]], type_map[rows.types[index]], flags)
+                for (name, _, field_size), field, value in zip(COLUMNS, _FIELDS, values):
+                    field.pack_into(block, _column_offsets[name] + count * field_size, value)
+                heap_offset += len(entry)
+                count += 1
+
+                if count == BLOCK_RECORDS or index == len(rows) - 1:
+                    # Heap entries go first so a record never points past the heap
+                    heap.write(b"".join(entries))
+                    heap.flush()
+                    entries = []
+                    _BLOCK_HEADER.pack_into(block, 0, count)
+                    log.seek(block_start)
+                    log.write(block)
+                    if count == BLOCK_RECORDS:
+                        block_start, count, block = block_start + BLOCK_SIZE, 0, bytearray(BLOCK_SIZE)
+        return first
+
+    def write(self, rows: Ledger):
+        """Replaces the whole log with the given rows."""
+        for path in (self.path, self.heap_path, self.names_path):
+            if os.path.exists(path):
+                os.remove(path)
+        with open(self.path, "wb") as f:
+            f.write(_FILE_HEADER.pack(MAGIC, BLOCK_RECORDS))
+        return self.append(rows)
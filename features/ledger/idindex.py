@@ -0,0 +1,215 @@
+import hashlib
+import mmap
+import os
+import struct
+from contextlib import contextmanager
+from features.ledger.ledger import fingerprint, load_ledger
+from features.ledger.locking import atomic_write
+from features.profiling.profiler import phase
+
+MAGIC = b"FTIDX002"  # 002: an ID keeps a slot per row, so duplicated IDs find every row
+MIN_CAPACITY = 1024
+# magic, capacity, used slots (live + removed), live entries, ledger fingerprint
+_HEADER = struct.Struct("<8sQQQqq")
+_VALUE = struct.Struct("<Q")
+_SLOT = struct.Struct("<16sQ")
+KEY_SIZE = 16
+SLOT_SIZE = _SLOT.size
+
+# Slot values: 0 marks a never-used slot, 1 a removed entry, anything else
+# is the stored position plus 2.
+_EMPTY, _REMOVED = 0, 1
+
+
+def index_path(path: str):
+    """Returns the sidecar file that holds the ID index for a transactions file."""
+    base, extension = os.path.splitext(path)
+    if extension == ".txt":
+        return base + ".index"
+    return path + ".index"
+
+def _key(id: str):
+    return hashlib.blake2b(id.encode(), digest_size=KEY_SIZE).digest()
+
+def _capacity(count: int):
+    """Smallest table size that keeps count entries at most a quarter full."""
+    capacity = MIN_CAPACITY
+    while capacity < count * 4:
+        capacity *= 2
+    return capacity
+
+
+class IdIndex:
+    """Persistent hash table from transaction ID to the positions of its rows.
+
+    The position is the byte offset of the line for the text ledger and the
+    record number for the binary log. Imports may store an ID more than
+    once, so each row has its own slot and a lookup returns them all. The
+    table lives in a memory-mapped file using open addressing, so a lookup,
+    insert or removal touches a handful of slots no matter how large the
+    ledger is.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.file = index_path(path)
+        self._mapped = None
+        self.capacity = self.used = self.count = 0
+        self.fingerprint = None
+
+    def _open(self):
+        with open(self.file, "r+b") as f:
+            self._mapped = mmap.mmap(f.fileno(), 0)
+        magic, self.capacity, self.used, self.count, size, mtime_ns = _HEADER.unpack_from(self._mapped, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{self.file} is not an ID index")
+        self.fingerprint = [size, mtime_ns]
+
+    def _create(self, capacity: int, entries=()):
+        """Writes a fresh table holding the given (key, value) slots and maps it."""
+        table = bytearray(_HEADER.size + capacity * SLOT_SIZE)
+        occupied = bytearray(capacity)
+        mask = capacity - 1
+        count = 0
+        pack_into, header_size = _SLOT.pack_into, _HEADER.size
+        for key, value in entries:
+            slot = int.from_bytes(key[:8], "little") & mask
+            while occupied[slot]:
+                slot = (slot + 1) & mask
+            occupied[slot] = 1
+            pack_into(table, header_size + slot * SLOT_SIZE, key, value)
+            count += 1
+        self.close()
+        with atomic_write(self.file) as f:
+            f.write(table)
+        self.capacity, self.used, self.count = capacity, count, count
+        with open(self.file, "r+b") as f:
+            self._mapped = mmap.mmap(f.fileno(), 0)
+
+    def _entries(self):
+        mapped = self._mapped
+        for slot in range(self.capacity):
+            start = _HEADER.size + slot * SLOT_SIZE
+            value = _VALUE.unpack_from(mapped, start + KEY_SIZE)[0]
+            if value > _REMOVED:
+                yield mapped[start:start + KEY_SIZE], value
+
+    def _grow(self):
+        self._create(_capacity(self.count), list(self._entries()))
+
+    def _probe(self, key: bytes):
+        """Returns ({slot: stored value} for the slots holding key, first slot a new entry could use)."""
+        mapped, mask = self._mapped, self.capacity - 1
+        slot = int.from_bytes(key[:8], "little") & mask
+        found, free = {}, None
+        while True:
+            start = _HEADER.size + slot * SLOT_SIZE
+            value = _VALUE.unpack_from(mapped, start + KEY_SIZE)[0]
+            if value == _EMPTY:
+                return found, slot if free is None else free
+            if value == _REMOVED:
+                if free is None:
+                    free = slot
+            elif mapped[start:start + KEY_SIZE] == key:
+                found[slot] = value
+            slot = (slot + 1) & mask
+
+    def positions(self, id: str):
+        """Returns the positions stored for an ID, in storage order; empty if there are none."""
+        found, _ = self._probe(_key(id))
+        return sorted(value - 2 for value in found.values())
+
+    def put(self, id: str, position: int):
+        """Adds a row's position; an ID stored before keeps its other rows."""
+        if (self.used + 1) * 2 > self.capacity:
+            self._grow()
+        key = _key(id)
+        _, slot = self._probe(key)
+        start = _HEADER.size + slot * SLOT_SIZE
+        if _VALUE.unpack_from(self._mapped, start + KEY_SIZE)[0] == _EMPTY:
+            self.used += 1
+        self.count += 1
+        self._mapped[start:start + KEY_SIZE] = key
+        _VALUE.pack_into(self._mapped, start + KEY_SIZE, position + 2)
+
+    def remove(self, id: str, position: int):
+        """Removes one row's position, leaving the ID's other rows."""
+        found, _ = self._probe(_key(id))
+        for slot, value in found.items():
+            if value == position + 2:
+                _VALUE.pack_into(self._mapped, _HEADER.size + slot * SLOT_SIZE + KEY_SIZE, _REMOVED)
+                self.count -= 1
+                return
+
+    def put_many(self, entries):
+        """Stores (id, position) pairs. An empty table is filled in a single pass."""
+        if self.used:
+            entries = list(entries)
+            if (self.used + len(entries)) * 2 > self.capacity:
+                # Grow once up front rather than doubling along the way
+                self._create(_capacity(self.count + len(entries)), list(self._entries()))
+            for id, position in entries:
+                self.put(id, position)
+            return
+        entries = [(_key(id), position + 2) for id, position in entries]
+        self._create(_capacity(len(entries)), entries)
+
+    def save(self):
+        """Records the ledger's current fingerprint and closes the table."""
+        size, mtime_ns = fingerprint(self.path)
+        _HEADER.pack_into(self._mapped, 0, MAGIC, self.capacity, self.used, self.count, size, mtime_ns)
+        self.close()
+
+    def close(self):
+        if self._mapped is not None:
+            self._mapped.close()
+            self._mapped = None
+
+    @classmethod
+    def build(cls, path: str, ledger=None):
+        """Rebuilds the index from a full scan of the transactions file."""
+        index = cls(path)
+        with phase("sidecars"):
+            if ledger is None:
+                ledger = load_ledger(path)
+            index.put_many((ledger.id(row), ledger.position(row)) for row in range(len(ledger)))
+        return index
+
+
+def load_index(path: str):
+    """Opens the ID index for a transactions file, rebuilding it if missing or stale.
+
+    Raises FileNotFoundError when the transactions file does not exist.
+    """
+    index = IdIndex(path)
+    try:
+        index._open()
+    except (FileNotFoundError, ValueError, struct.error):
+        index.close()
+    else:
+        if index.fingerprint == fingerprint(path):
+            return index
+        index.close()
+    index = IdIndex.build(path)
+    index.save()
+    index._open()
+    return index
+
+@contextmanager
+def index_update(path: str, truncate: bool = False):
+    """Keeps the ID index in step with a write to the transactions file.
+
+    Works like rollup.rollup_update: the index is validated before the caller
+    writes and saved with the file's new fingerprint afterwards. The caller
+    puts or removes the rows it changed.
+    """
+    if os.path.exists(path) and not truncate:
+        index = load_index(path)
+    else:
+        index = IdIndex(path)
+        index._create(MIN_CAPACITY)
+    try:
+        yield index
+        index.save()
+    finally:
+        index.close()
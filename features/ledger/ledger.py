@@ -0,0 +1,291 @@
+import copy
+import os
+import sys
+from array import array
+from features.ledger.locking import atomic_write, locked
+from features.ledger.timecodec import parse_timestamp_key
+from features.profiling.profiler import count, phase
+
+DATABASE_DIR = "database"
+
+def database_path(name: str):
+    """Returns the path of a file inside the database directory."""
+    return os.path.join(DATABASE_DIR, name)
+
+def transactions_path():
+    return database_path("transactions.txt")
+
+def budgets_path():
+    return database_path("budgets.txt")
+
+def fingerprint(path: str):
+    """Returns [size, mtime_ns] identifying the current contents of a file."""
+    stat = os.stat(path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+TOMBSTONE = b"!"
+
+def tombstone_line(offset: int):
+    """A line marking the row that starts at offset as deleted."""
+    return TOMBSTONE + str(offset).encode() + b"\n"
+
+
+class Ledger:
+    """Column-oriented view of the transactions file.
+
+    Numeric fields are kept in compact arrays and type/category names are
+    interned into small integer codes. IDs and descriptions stay in the raw
+    file buffer and are only decoded when a row is actually displayed.
+
+    Deleting a row appends a tombstone line ("!<offset of the row>") instead
+    of rewriting the file; tombstoned rows are dropped while parsing.
+    """
+
+    # Arrays holding one entry per row
+    _row_columns = ("timestamps", "months", "amounts", "types", "categories", "_line_starts")
+
+    def __init__(self):
+        self.timestamps = array("q")  # Seconds since 1970-01-01
+        self.months = array("I")  # Month keys, see timecodec.month_key
+        self.amounts = array("q")  # Paisa
+        self.types = array("B")  # Codes into type_names
+        self.categories = array("I")  # Codes into category_names
+        self.type_names = []
+        self.category_names = []
+        self.malformed = []  # Raw text of lines that could not be parsed
+        self._type_codes = {}
+        self._category_codes = {}
+        self._buffer = b""
+        self._line_starts = array("Q")
+        self.tombstones = set()  # Offsets of deleted rows
+        # Ledgers extended from this one share its lineage; version is bumped
+        # whenever rows are dropped and the later ones renumbered
+        self.lineage = object()
+        self.version = 0
+
+    def __len__(self):
+        return len(self.amounts)
+
+    def type_code(self, name: str):
+        """Returns the code for a type name, or None if it never occurs."""
+        return self._type_codes.get(name)
+
+    def category_code(self, name: str):
+        return self._category_codes.get(name)
+
+    def _intern(self, name: bytes, codes: dict, names: list):
+        code = codes.get(name)
+        if code is None:
+            code = len(names)
+            text = sys.intern(name.decode())
+            names.append(text)
+            codes[name] = code
+            codes[text] = code
+        return code
+
+    def parse(self, data: bytes):
+        """Parses raw file contents into the columns in a single pass."""
+        return self.extend(data)
+
+    def extend(self, data: bytes):
+        """Parses lines appended to the file after the contents already parsed.
+
+        Rows already parsed keep their indexes unless the new lines tombstone
+        some of them, which bumps version.
+        """
+        malformed = len(self.malformed)
+        with phase("parse"):
+            rows = self._extend(data)
+        count("rows_parsed", rows)
+        count("malformed_skipped", len(self.malformed) - malformed)
+        return self
+
+    def _extend(self, data: bytes):
+        """Parses the new lines and returns how many rows they added."""
+        pos = len(self._buffer)
+        if pos:
+            data = self._buffer + data
+        self._buffer = data
+        timestamps, months, amounts = self.timestamps, self.months, self.amounts
+        types, categories = self.types, self.categories
+        line_starts = self._line_starts
+        parsed = len(line_starts)
+        deleted = set()
+        size = len(data)
+        while pos < size:
+            end = data.find(b"\n", pos)
+            if end == -1:
+                end = size
+            line = data[pos:end].rstrip()
+            if line.startswith(TOMBSTONE):
+                try:
+                    deleted.add(int(line[1:]))
+                except ValueError:
+                    self.malformed.append(line.decode(errors="replace"))
+            elif line:
+                try:
+                    _, timestamp, type, category, amount_paisa, _ = line.split(b",", 5)
+                    epoch, month = parse_timestamp_key(timestamp)
+                    amount = int(amount_paisa)
+                except ValueError:
+                    self.malformed.append(line.decode(errors="replace"))
+                else:
+                    timestamps.append(epoch)
+                    months.append(month)
+                    amounts.append(amount)
+                    types.append(self._intern(type, self._type_codes, self.type_names))
+                    categories.append(self._intern(category, self._category_codes, self.category_names))
+                    line_starts.append(pos)
+            pos = end + 1
+        parsed = len(line_starts) - parsed
+        if deleted:
+            self.tombstones |= deleted
+            self._keep([index for index, start in enumerate(self._line_starts) if start not in deleted])
+        return parsed
+
+    def copy(self):
+        """Returns an independent copy that can be extended without changing this ledger."""
+        ledger = copy.copy(self)
+        for name in self._row_columns:
+            setattr(ledger, name, getattr(self, name)[:])
+        ledger.type_names, ledger.category_names = self.type_names[:], self.category_names[:]
+        ledger._type_codes, ledger._category_codes = dict(self._type_codes), dict(self._category_codes)
+        ledger.malformed, ledger.tombstones = self.malformed[:], set(self.tombstones)
+        return ledger
+
+    def _keep(self, indexes: list):
+        """Drops every row whose index is not listed."""
+        self.version += 1
+        for name in self._row_columns:
+            column = getattr(self, name)
+            setattr(self, name, array(column.typecode, [column[index] for index in indexes]))
+
+    @property
+    def data(self):
+        """The raw file contents the ledger was parsed from."""
+        return self._buffer
+
+    def find_all(self, prefix: str):
+        """Yields the index of every row whose ID starts with prefix."""
+        prefix = prefix.encode()
+        buffer = self._buffer
+        for index, start in enumerate(self._line_starts):
+            if buffer.startswith(prefix, start):
+                yield index
+
+    def find(self, prefix: str):
+        """Returns the index of the first row whose ID starts with prefix, or None."""
+        return next(self.find_all(prefix), None)
+
+    def id(self, index: int):
+        start = self._line_starts[index]
+        return self._buffer[start:self._buffer.find(b",", start)].decode()
+
+    def position(self, index: int):
+        """Where the row is stored: its byte offset in the file."""
+        return self._line_starts[index]
+
+    def row(self, index: int):
+        """Decodes a single row as (id, timestamp, type, category, amount_paisa, description)."""
+        start = self._line_starts[index]
+        end = self._buffer.find(b"\n", start)
+        if end == -1:
+            end = len(self._buffer)
+        id, timestamp, _, _, _, description = self._buffer[start:end].rstrip().decode().split(",", 5)
+        return (id, timestamp, self.type_names[self.types[index]],
+                self.category_names[self.categories[index]], self.amounts[index], description)
+
+    def description(self, index: int):
+        return self.row(index)[5]
+
+
+_cache = {}  # path -> (fingerprint, inode, ledger)
+_CHECK_SIZE = 4096  # Bytes compared at each end of the parsed contents before reading only the tail
+
+def _appended(path: str, ledger: Ledger, inode: int, cached_inode: int):
+    """Returns the bytes appended to a text ledger since it was parsed, or None if it was rewritten.
+
+    The file counts as only grown when it is the same inode, no shorter, and
+    the first and last few kilobytes of what was parsed still match.
+    """
+    parsed = ledger.data
+    if inode != cached_inode or (parsed and parsed[-1:] != b"\n"):
+        return None
+    with phase("read"), open(path, "rb") as f:
+        check = min(len(parsed), _CHECK_SIZE)
+        if f.read(check) != parsed[:check]:
+            return None
+        f.seek(len(parsed) - check)
+        if f.read(check) != parsed[len(parsed) - check:]:
+            return None
+        tail = f.read()
+        count("bytes_read", len(tail))
+        return tail
+
+def load_ledger(path: str = None):
+    """Loads transactions from a text file, binary log or SQLite database.
+
+    The parsed ledger is reused while the file is unchanged. When a text
+    ledger has only grown, just the appended lines are read, into a copy of
+    the cached ledger so ledgers already handed out never change. Text and
+    binary files are read under a shared lock, so a write in progress is
+    never half seen. Raises FileNotFoundError when the file does not exist,
+    like open() does.
+    """
+    path = path or transactions_path()
+    if path.endswith(".db"):
+        # SQLite does its own locking
+        return _load_ledger(path)
+    with locked(path, shared=True):
+        return _load_ledger(path)
+
+def _load_ledger(path: str):
+    stat = os.stat(path)
+    key = [stat.st_size, stat.st_mtime_ns]
+    cached = _cache.get(path)
+    if cached and cached[0] == key:
+        return cached[2]
+    # The other storage formats import this module, so they are loaded lazily
+    if path.endswith(".bin"):
+        from features.ledger.binlog import BinaryLog
+        with phase("read"):
+            ledger = BinaryLog(path).load()
+        count("bytes_read", stat.st_size)
+    elif path.endswith(".db"):
+        from features.ledger.sqlitedb import SQLiteLedger, connect
+        with phase("read"):
+            ledger = SQLiteLedger(connect(path)).load()
+    else:
+        tail = None
+        if cached and stat.st_size >= cached[0][0]:
+            tail = _appended(path, cached[2], stat.st_ino, cached[1])
+        if tail is not None:
+            ledger = cached[2].copy().extend(tail)
+        else:
+            with phase("read"), open(path, "rb") as f:
+                data = f.read()
+            count("bytes_read", len(data))
+            ledger = Ledger().parse(data)
+    _cache[path] = (key, stat.st_ino, ledger)
+    return ledger
+
+def clear_ledger_cache():
+    """Drops the ledgers load_ledger keeps parsed, for a process moving on to other ledgers."""
+    _cache.clear()
+
+def load_budgets(path: str = None):
+    """Reads budgets as a {category: amount_paisa} dict."""
+    budgets = {}
+    with open(path or budgets_path(), "r") as f:
+        for line in f:
+            category, amount_paisa = line.strip().split(",")
+            budgets[category] = int(amount_paisa)
+    return budgets
+
+def write_budgets(budgets: dict, path: str = None):
+    """Replaces the budgets file in one rename, under its write lock."""
+    path = path or budgets_path()
+    with locked(path), atomic_write(path, "w", sync=True) as f:
+        for category, amount_paisa in budgets.items():
+            f.write(f"{category},{amount_paisa}\n")
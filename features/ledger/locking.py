@@ -0,0 +1,123 @@
+import fcntl
+import os
+import struct
+from contextlib import contextmanager
+
+# written, synced: commit counters of a data file, see group_sync
+_COUNTERS = struct.Struct("<QQ")
+
+_held = {}  # lock file -> [open file, shared, depth], for locks this process holds
+
+
+def lock_path(path: str):
+    """Returns the lock file guarding a data file."""
+    return path + ".lock"
+
+def sync_path(path: str):
+    """Returns the file holding a data file's commit counters."""
+    return path + ".sync"
+
+@contextmanager
+def locked(path: str, shared: bool = False):
+    """Holds an advisory lock on a data file for the duration of the block.
+
+    Writers take the lock exclusively and readers take it shared, so a
+    reader never sees half of a write. The lock lives in a separate .lock
+    file, which survives the data file being replaced. Locks are reentrant
+    within a process; an exclusive lock cannot be taken inside a shared one.
+    """
+    file = os.path.abspath(lock_path(path))
+    held = _held.get(file)
+    if held is not None:
+        if held[1] and not shared:
+            raise RuntimeError(f"{path} is locked for reading; it cannot be written inside that block")
+        held[2] += 1
+        try:
+            yield
+        finally:
+            held[2] -= 1
+        return
+    with open(file, "a+b") as f:
+        fcntl.flock(f.fileno(), fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        _held[file] = [f, shared, 1]
+        try:
+            yield
+        finally:
+            del _held[file]
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+@contextmanager
+def atomic_write(path: str, mode: str = "wb", sync: bool = False):
+    """Yields a file whose contents replace path in one rename once the block finishes.
+
+    Readers see either the old or the new file, never a partial one. The
+    temporary file is unique to the process; it is removed if the block
+    raises. With sync set, the contents reach the disk before the rename.
+    """
+    temporary = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(temporary, mode) as f:
+            yield f
+            if sync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(temporary, path)
+    except BaseException:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+        raise
+
+@contextmanager
+def _counters_file(path: str):
+    # Not opened for appending: Linux appends every pwrite to such a file
+    descriptor = os.open(sync_path(path), os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        yield descriptor
+    finally:
+        os.close(descriptor)
+
+def _counters(descriptor: int):
+    # Until the first sync only the written counter is in the file
+    data = os.pread(descriptor, _COUNTERS.size, 0)
+    return _COUNTERS.unpack(data.ljust(_COUNTERS.size, b"\0"))
+
+def record_commit(path: str):
+    """Counts a write to a data file and returns its commit number, for group_sync.
+
+    Call it while holding the exclusive lock, after the write.
+    """
+    with _counters_file(path) as descriptor:
+        written = _counters(descriptor)[0] + 1
+        os.pwrite(descriptor, struct.pack("<Q", written), 0)
+    return written
+
+def sync_files(files: list):
+    """Flushes each existing file to disk."""
+    for file in files:
+        if os.path.exists(file):
+            descriptor = os.open(file, os.O_RDONLY)
+            try:
+                os.fsync(descriptor)
+            finally:
+                os.close(descriptor)
+
+def group_sync(path: str, commit: int, files: list):
+    """Makes a commit durable by syncing files, sharing the sync with concurrent writers.
+
+    Writers call this after releasing the write lock, so others can keep
+    writing while one syncs. Syncs are taken one at a time under the .sync
+    file's lock, and each covers every commit written before it started:
+    a writer that waited finds its commit already synced and returns
+    without syncing again. Many writers therefore share one fsync.
+    """
+    with _counters_file(path) as descriptor:
+        fcntl.flock(descriptor, fcntl.LOCK_EX)
+        try:
+            written, synced = _counters(descriptor)
+            if synced >= commit:
+                return False
+            sync_files(files)
+            os.pwrite(descriptor, struct.pack("<Q", written), 8)
+            return True
+        finally:
+            fcntl.flock(descriptor, fcntl.LOCK_UN)
@@ -0,0 +1,189 @@
+import os
+import sys
+from collections import deque
+from itertools import islice
+from features.ledger.ledger import TOMBSTONE
+from features.ledger.timecodec import parse_timestamp_key
+from features.profiling.profiler import count
+
+# Full-history scans split a text ledger into line-aligned byte ranges (a
+# partitioned ledger into its month files) and hand each range to a worker
+# process, which parses it and returns a small partial result: per-category
+# totals, or a block of formatted export rows. The caller merges the
+# partials in file order. Workers record no profile; the caller counts
+# what they report.
+
+RANGE_SIZE = 8 << 20  # Bytes of ledger per unit of work
+BACKLOG = 2  # Ranges queued per worker, so none waits while the caller merges a result
+JOBS_HELP = "Worker processes for full-history scans (rebuilding totals, exports); 0 uses every core."
+
+_jobs = 1  # Worker processes for full-history scans; 1 scans in this process
+
+
+def set_jobs(jobs: int):
+    """Sets the worker processes full-history scans use: 1 scans in this process, 0 uses every core."""
+    global _jobs
+    if jobs < 0:
+        raise ValueError("--jobs must be 0 (every core) or more.")
+    _jobs = jobs or os.cpu_count() or 1
+
+def jobs():
+    return _jobs
+
+def tombstone_offsets(data):
+    """Returns the offsets tombstoned in a mapped text ledger, found with a bytes search."""
+    tombstones = set()
+    pos = 0 if data[:1] == TOMBSTONE else data.find(b"\n" + TOMBSTONE)
+    while pos != -1:
+        start = pos if data[pos:pos + 1] == TOMBSTONE else pos + 1
+        stop = data.find(b"\n", start)
+        try:
+            tombstones.add(int(data[start + 1:stop if stop != -1 else len(data)]))
+        except ValueError:
+            pass
+        pos = data.find(b"\n" + TOMBSTONE, start)
+    return tombstones
+
+def text_ranges(path: str, size: int = None):
+    """Splits a text ledger into (file, start, stop, deleted) ranges of about size (RANGE_SIZE) bytes, each ending after a line.
+
+    deleted holds the offsets of the range's tombstoned rows, whichever
+    range their tombstone lines are in. Call it under the file's lock.
+    """
+    import mmap # Deferred: only parallel scans map the file here
+    size = size or RANGE_SIZE
+    with open(path, "rb") as f:
+        total = os.fstat(f.fileno()).st_size
+        if not total:
+            return []
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            tombstones = tombstone_offsets(data)
+            bounds, start = [], 0
+            while start < total:
+                stop = data.find(b"\n", min(start + size, total) - 1)
+                stop = total if stop == -1 else stop + 1
+                bounds.append((start, stop))
+                start = stop
+    return [(path, start, stop, frozenset(offset for offset in tombstones if start <= offset < stop))
+            for start, stop in bounds]
+
+def read_range(file: str, start: int = 0, stop: int = None):
+    """Reads bytes start to stop of a ledger file (all of it by default), decompressing a .gz partition whole."""
+    if file.endswith(".gz"):
+        import gzip  # Not imported at the top, as plain text ledgers never need it
+        with gzip.open(file, "rb") as f:
+            return f.read()[start:stop]
+    with open(file, "rb") as f:
+        f.seek(start)
+        return f.read() if stop is None else f.read(stop - start)
+
+def _lines(data: bytes):
+    """Yields (offset, line) for each line of data, without its line ending."""
+    pos, size = 0, len(data)
+    while pos < size:
+        end = data.find(b"\n", pos)
+        if end == -1:
+            end = size
+        yield pos, data[pos:end].rstrip()
+        pos = end + 1
+
+def range_totals(file: str, start: int = 0, stop: int = None, deleted=frozenset()):
+    """Worker: parses a range as Ledger.parse would and sums it.
+
+    Returns ({(month, type, category): amount_paisa}, malformed lines, rows,
+    bytes read), with names as bytes; merge_totals joins the results.
+    """
+    data = read_range(file, start, stop)
+    totals, malformed, rows = {}, [], 0
+    for pos, line in _lines(data):
+        if line.startswith(TOMBSTONE):
+            try:
+                int(line[1:])
+            except ValueError:
+                malformed.append(line.decode(errors="replace"))
+        elif line:
+            try:
+                _, timestamp, type, category, amount_paisa, _ = line.split(b",", 5)
+                _, month = parse_timestamp_key(timestamp)
+                amount = int(amount_paisa)
+            except ValueError:
+                malformed.append(line.decode(errors="replace"))
+            else:
+                if start + pos not in deleted:
+                    key = (month, type, category)
+                    totals[key] = totals.get(key, 0) + amount
+                    rows += 1
+    return totals, malformed, rows, len(data)
+
+def merge_totals(results):
+    """Merges range_totals results, in file order, into ({month_key: {type: {category: amount_paisa}}}, malformed lines).
+
+    Months, types and categories keep the order a serial scan first meets
+    them in. The rows and bytes the workers handled are counted here.
+    """
+    totals, malformed = {}, []
+    for partial, lines, rows, size in results:
+        count("bytes_read", size)
+        count("rows_parsed", rows)
+        count("malformed_skipped", len(lines))
+        for (month, type, category), amount in partial.items():
+            categories = totals.setdefault(month, {}).setdefault(sys.intern(type.decode()), {})
+            category = sys.intern(category.decode())
+            categories[category] = categories.get(category, 0) + amount
+        malformed.extend(lines)
+    return totals, malformed
+
+def range_rows(file: str, start: int = 0, stop: int = None, deleted=frozenset(),
+               low: bytes = None, high: bytes = None, type: bytes = None, category: bytes = None):
+    """Worker: returns (rows, rows filtered out, malformed rows skipped, bytes read) for a range, filtered as TextStorage.iter_rows filters.
+
+    Rows are (id, timestamp, type, category, amount_paisa, description);
+    low and high are formatted timestamps bounding them, and type is lower case.
+    """
+    data = read_range(file, start, stop)
+    rows, filtered, malformed = [], 0, 0
+    for pos, line in _lines(data):
+        fields = line.split(b",", 5)
+        if len(fields) != 6 or start + pos in deleted:
+            continue
+        id, timestamp, row_type, row_category, amount, description = fields
+        if ((low is None or timestamp >= low) and (high is None or timestamp < high)
+                and (type is None or row_type.lower() == type) and (category is None or row_category == category)):
+            try:
+                parse_timestamp_key(timestamp)
+                amount = int(amount)
+            except ValueError:
+                malformed += 1
+            else:
+                rows.append((id.decode(), timestamp.decode(), row_type.decode(), row_category.decode(),
+                             amount, description.decode()))
+        else:
+            filtered += 1
+    return rows, filtered, malformed, len(data)
+
+def parallel_map(worker, tasks: list, *args):
+    """Yields worker(*task, *args) for each task, in task order, computed by up to jobs() processes.
+
+    At most BACKLOG tasks per process are in flight, so the caller merges
+    or writes each result while later ones are computed, and no more than
+    a few ranges' results are ever held. With one job, or a single task,
+    the tasks run in this process.
+    """
+    if _jobs <= 1 or len(tasks) <= 1:
+        for task in tasks:
+            yield worker(*task, *args)
+        return
+    from concurrent.futures import ProcessPoolExecutor # Deferred: only parallel scans start processes
+    with ProcessPoolExecutor(max_workers=min(_jobs, len(tasks))) as pool:
+        queued = iter(tasks)
+        pending = deque(pool.submit(worker, *task, *args) for task in islice(queued, _jobs * BACKLOG))
+        try:
+            while pending:
+                result = pending.popleft().result()
+                task = next(queued, None)
+                if task is not None:
+                    pending.append(pool.submit(worker, *task, *args))
+                yield result
+        finally:
+            for future in pending:
+                future.cancel()
@@ -0,0 +1,251 @@
+import json
+import os
+from features.ledger.ledger import Ledger, database_path, fingerprint
+from features.ledger.locking import atomic_write
+from features.ledger.parallel import jobs, merge_totals, parallel_map, range_totals
+from features.ledger.timecodec import from_epoch, month_key, month_key_of, month_of_key
+from features.profiling.profiler import count, phase
+
+MANIFEST = "manifest.json"
+COMPRESSED = ".gz"
+COMPRESS_LEVEL = 6  # As for exports: close to disk speed; 9 gains little
+
+
+def partitions_path():
+    """Returns the directory holding the month partitions of the ledger."""
+    return database_path("transactions")
+
+def manifest_path(path: str):
+    return os.path.join(path, MANIFEST)
+
+def partition_name(month: int):
+    """Returns the file name of a month's open partition, e.g. "2026-10"."""
+    year, number = month_of_key(month)
+    return f"{year:04d}-{number:02d}"
+
+def partition_month(name: str):
+    """Returns the month key of a partition file name, or None for any other file."""
+    base = name[:-len(COMPRESSED)] if name.endswith(COMPRESSED) else name
+    year, _, number = base.partition("-")
+    if len(year) != 4 or len(number) != 2 or not (year + number).isdigit() or not 1 <= int(number) <= 12:
+        return None
+    return month_key(int(year), int(number))
+
+def month_range(start: int = None, end: int = None):
+    """Returns the (first, last) month keys covering epochs start <= epoch < end; None leaves a side open."""
+    return (month_key_of(from_epoch(start)) if start is not None else None,
+            month_key_of(from_epoch(end - 1)) if end is not None else None)
+
+def read_partition(file: str):
+    """Returns the contents of a partition, decompressing a closed one."""
+    with phase("read"):
+        if file.endswith(COMPRESSED):
+            import gzip  # Only closed partitions need it, so it is not loaded at startup
+            with gzip.open(file, "rb") as f:
+                data = f.read()
+        else:
+            with open(file, "rb") as f:
+                data = f.read()
+    count("bytes_read", len(data))
+    return data
+
+def add_totals(stored: dict, totals: dict):
+    """Adds {type: {category: amount_paisa}} totals into stored ones."""
+    for type, categories in totals.items():
+        kept = stored.setdefault(type, {})
+        for category, amount in categories.items():
+            kept[category] = kept.get(category, 0) + amount
+
+def month_totals_of(rows: Ledger, indexes=None):
+    """Returns {type: {category: amount_paisa}} for the given rows (all by default)."""
+    totals = {}
+    type_names, category_names = rows.type_names, rows.category_names
+    for index in range(len(rows)) if indexes is None else indexes:
+        categories = totals.setdefault(type_names[rows.types[index]], {})
+        category = category_names[rows.categories[index]]
+        categories[category] = categories.get(category, 0) + rows.amounts[index]
+    return totals
+
+
+class Manifest:
+    """The month partitions in a ledger directory, and what each one holds.
+
+    Each entry records a partition's file, row count, per-category totals
+    ({type: {category: amount_paisa}}) and unparseable lines, with the
+    fingerprint of the file they were read from. An entry whose file has
+    changed since (a write cut short, or an edit by hand) is rebuilt from
+    the file when it is next used, as is a partition the manifest misses.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.entries = {}  # month_key -> {"file", "rows", "totals", "malformed", "fingerprint", "appended"}
+        self.changed = False
+        self._checked = set()  # Months whose entry matches its file
+        self._complete = False  # Whether every partition in the directory has been checked
+        self._leftovers = []  # Files replaced by others, removed once the manifest is saved
+
+    @classmethod
+    def load(cls, path: str):
+        manifest = cls(path)
+        try:
+            with open(manifest_path(path), "r") as f:
+                manifest.entries = {int(month): entry for month, entry in json.load(f)["partitions"].items()}
+        except (FileNotFoundError, ValueError, KeyError, TypeError):
+            manifest.changed = True
+        return manifest
+
+    def file(self, month: int):
+        return os.path.join(self.path, self.entries[month]["file"])
+
+    def _scan(self, month: int, name: str):
+        file = os.path.join(self.path, name)
+        rows = Ledger().parse(read_partition(file))
+        self.entries[month] = {"file": name, "rows": len(rows), "totals": month_totals_of(rows),
+                               "malformed": rows.malformed, "fingerprint": fingerprint(file), "appended": False}
+        self.changed = True
+
+    def _check(self, month: int):
+        """Matches a month's entry to its partition, dropping the entry if the partition is gone.
+
+        Returns the name of the partition to rebuild the entry from, or
+        None when the entry is current or there is no partition.
+        """
+        self._checked.add(month)
+        entry = self.entries.get(month)
+        names = [partition_name(month) + COMPRESSED, partition_name(month)]
+        if entry is not None:
+            # The manifest's choice wins when a compression was cut short
+            names.remove(entry["file"])
+            names.insert(0, entry["file"])
+        for name in names:
+            try:
+                current = fingerprint(os.path.join(self.path, name))
+            except FileNotFoundError:
+                continue
+            if entry is None or entry["file"] != name or entry["fingerprint"] != current:
+                return name
+            return None
+        if entry is not None:
+            del self.entries[month]
+            self.changed = True
+        return None
+
+    def _rescan(self, stale: dict):
+        """Rebuilds the entries of {month: partition name}, in worker processes when jobs are set (see parallel.set_jobs)."""
+        if jobs() <= 1 or len(stale) <= 1:
+            for month, name in stale.items():
+                self._scan(month, name)
+            return
+        files = [(os.path.join(self.path, name),) for name in stale.values()]
+        for (month, name), (file,), result in zip(stale.items(), files, parallel_map(range_totals, files)):
+            by_month, malformed = merge_totals([result])
+            totals = {}
+            for types in by_month.values():
+                add_totals(totals, types)
+            self.entries[month] = {"file": name, "rows": result[2], "totals": totals,
+                                   "malformed": malformed, "fingerprint": fingerprint(file), "appended": False}
+        self.changed = True
+
+    def entry(self, month: int):
+        """Returns the month's entry, checked against its partition, or None if it has none."""
+        if month not in self._checked:
+            name = self._check(month)
+            if name is not None:
+                self._scan(month, name)
+        return self.entries.get(month)
+
+    def months(self, first: int = None, last: int = None):
+        """Returns the months with partitions, oldest first, optionally only those from first to last."""
+        if not self._complete:
+            self._complete = True
+            try:
+                found = {partition_month(name) for name in os.listdir(self.path)} - {None}
+            except FileNotFoundError:
+                found = set()
+            stale = {}
+            for month in sorted(found | set(self.entries)):
+                name = self._check(month) if month not in self._checked else None
+                if name is not None:
+                    stale[month] = name
+            self._rescan(stale)
+        return sorted(month for month in self.entries
+                      if (first is None or month >= first) and (last is None or month <= last))
+
+    def append(self, month: int, data: bytes, rows: int, totals: dict):
+        """Appends lines to a month's partition and adds them to its entry. Returns the file written."""
+        entry = self.entry(month)
+        if entry is None:
+            entry = self.entries[month] = {"file": partition_name(month), "rows": 0, "totals": {},
+                                           "malformed": [], "fingerprint": None, "appended": False}
+        file = os.path.join(self.path, entry["file"])
+        if entry["file"].endswith(COMPRESSED):
+            # A new gzip member, which readers see as a continuation
+            import gzip
+            with gzip.open(file, "ab", compresslevel=COMPRESS_LEVEL) as f:
+                f.write(data)
+            entry["appended"] = True
+        else:
+            with open(file, "ab") as f:
+                f.write(data)
+        entry["rows"] += rows
+        add_totals(entry["totals"], totals)
+        entry["fingerprint"] = fingerprint(file)
+        self._checked.add(month)
+        self.changed = True
+        return file
+
+    def rewrite(self, month: int, data: bytes, compress: bool = None):
+        """Replaces a month's partition with data, compressed or not (by default as it was), in one rename."""
+        entry = self.entries.get(month)
+        if compress is None:
+            compress = entry is not None and entry["file"].endswith(COMPRESSED)
+        name = partition_name(month) + (COMPRESSED if compress else "")
+        if not data:
+            if entry is not None:
+                self._leftovers.append(os.path.join(self.path, entry["file"]))
+                del self.entries[month]
+                self.changed = True
+            return None
+        file = os.path.join(self.path, name)
+        with atomic_write(file, sync=True) as f:
+            if compress:
+                import gzip
+                with gzip.GzipFile(fileobj=f, mode="wb", compresslevel=COMPRESS_LEVEL, mtime=0) as compressed:
+                    compressed.write(data)
+            else:
+                f.write(data)
+        if entry is not None and entry["file"] != name:
+            self._leftovers.append(os.path.join(self.path, entry["file"]))
+        self._scan(month, name)
+        self._checked.add(month)
+        return file
+
+    def close(self, before: int, recompress: bool = False):
+        """Compresses the partition of every month before the given one that is still open.
+
+        With recompress set, closed partitions appended to since they were
+        compressed are rewritten as a single gzip member too. Returns the
+        number of bytes saved.
+        """
+        saved = 0
+        for month in [month for month, entry in self.entries.items() if month < before]:
+            entry = self.entry(month)
+            if entry is None or (entry["file"].endswith(COMPRESSED) and not (recompress and entry["appended"])):
+                continue
+            size = entry["fingerprint"][0]
+            self.rewrite(month, read_partition(self.file(month)), compress=True)
+            saved += size - self.entries[month]["fingerprint"][0]
+        return saved
+
+    def save(self, sync: bool = False):
+        """Writes the manifest if it changed, then removes the files it no longer lists."""
+        if self.changed:
+            os.makedirs(self.path, exist_ok=True)
+            with atomic_write(manifest_path(self.path), "w", sync=sync) as f:
+                json.dump({"partitions": {str(month): self.entries[month] for month in sorted(self.entries)}}, f)
+            self.changed = False
+        for file in self._leftovers:
+            if os.path.exists(file):
+                os.remove(file)
+        self._leftovers = []
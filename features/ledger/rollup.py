@@ -0,0 +1,139 @@
+import json
+import os
+from contextlib import contextmanager
+from features.ledger.ledger import Ledger, fingerprint, load_ledger, transactions_path
+from features.ledger.locking import atomic_write
+from features.ledger.parallel import jobs, merge_totals, parallel_map, range_totals, text_ranges
+from features.profiling.profiler import phase
+
+_open = {}  # transactions file -> rollup a write in this process is keeping in step, see rollup_update
+
+
+def rollup_path(path: str = None):
+    """Returns the sidecar file that holds the rollup for a transactions file."""
+    path = path or transactions_path()
+    base, extension = os.path.splitext(path)
+    if extension == ".txt":
+        return base + ".rollup.json"
+    return path + ".rollup.json"
+
+
+class Rollup:
+    """Per-(month, type, category) totals for a transactions file.
+
+    The totals are persisted next to the transactions file together with the
+    file's fingerprint, so monthly commands can read them without rescanning
+    the ledger. Writers apply each row they add or remove in O(1).
+    """
+
+    def __init__(self, path: str = None):
+        self.path = path or transactions_path()
+        self.totals = {}  # {month_key: {type: {category: amount_paisa}}}
+        self.malformed = []  # Raw lines the ledger parser skipped
+
+    def month(self, month: int, type: str):
+        """Returns {category: amount_paisa} for one month and transaction type."""
+        return self.totals.get(month, {}).get(type, {})
+
+    def month_total(self, month: int, type: str):
+        return sum(self.month(month, type).values())
+
+    def apply(self, ledger: Ledger, sign: int = 1):
+        """Adds (sign=1) or removes (sign=-1) every row of a parsed ledger."""
+        type_names, category_names = ledger.type_names, ledger.category_names
+        for month, type_code, category_code, amount in zip(ledger.months, ledger.types, ledger.categories, ledger.amounts):
+            types = self.totals.setdefault(month, {})
+            type = type_names[type_code]
+            categories = types.setdefault(type, {})
+            category = category_names[category_code]
+            total = categories.get(category, 0) + sign * amount
+            if total or sign > 0:
+                categories[category] = total
+            else:
+                # Drop emptied entries so the totals match a fresh rebuild
+                del categories[category]
+                if not categories:
+                    del types[type]
+                    if not types:
+                        del self.totals[month]
+        for line in ledger.malformed:
+            if sign > 0:
+                self.malformed.append(line)
+            elif line in self.malformed:
+                self.malformed.remove(line)
+
+    def save(self):
+        data = {
+            "fingerprint": fingerprint(self.path),
+            "totals": self.totals,
+            "malformed": self.malformed,
+        }
+        sidecar = rollup_path(self.path)
+        with atomic_write(sidecar, "w") as f:
+            json.dump(data, f)
+
+    @classmethod
+    def build(cls, path: str = None):
+        """Rebuilds the rollup with a full scan of the transactions file.
+
+        With more than one job set (see parallel.set_jobs), a text file is
+        scanned in ranges by worker processes.
+        """
+        rollup = cls(path)
+        with phase("sidecars"):
+            if jobs() > 1 and not rollup.path.endswith((".bin", ".db")):
+                rollup.totals, rollup.malformed = merge_totals(parallel_map(range_totals, text_ranges(rollup.path)))
+            else:
+                rollup.apply(load_ledger(rollup.path))
+        return rollup
+
+
+def _read(path: str):
+    try:
+        with open(rollup_path(path), "r") as f:
+            data = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+    if data.get("fingerprint") != fingerprint(path):
+        return None
+    rollup = Rollup(path)
+    rollup.totals = {
+        int(month): types for month, types in data["totals"].items()
+    }
+    rollup.malformed = data["malformed"]
+    return rollup
+
+def load_rollup(path: str = None):
+    """Returns the rollup for the transactions file, rebuilding it if missing or stale.
+
+    Raises FileNotFoundError when the transactions file does not exist.
+    """
+    path = path or transactions_path()
+    # During a write (a whole batch, say) the rollup in memory is ahead of the saved one
+    rollup = _open.get(os.path.abspath(path)) or _read(path)
+    if rollup is None:
+        rollup = Rollup.build(path)
+        rollup.save()
+    return rollup
+
+@contextmanager
+def rollup_update(path: str = None, truncate: bool = False):
+    """Keeps the rollup in step with a write to the transactions file.
+
+    The rollup is loaded before the caller writes, so a stale sidecar is
+    rebuilt against the file it describes, and saved with the new fingerprint
+    once the block finishes. The caller applies the rows it wrote or removed,
+    and load_rollup returns this rollup to the process until then. Pass
+    truncate=True when the caller replaces the whole file.
+    """
+    path = path or transactions_path()
+    if os.path.exists(path) and not truncate:
+        rollup = load_rollup(path)
+    else:
+        rollup = Rollup(path)
+    _open[os.path.abspath(path)] = rollup
+    try:
+        yield rollup
+    finally:
+        del _open[os.path.abspath(path)]
+    rollup.save()
@@ -0,0 +1,123 @@
+import os
+import sqlite3
+from array import array
+from bisect import bisect_left
+from features.ledger.ledger import Ledger
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS transactions (
+    seq INTEGER PRIMARY KEY,
+    id TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    epoch INTEGER NOT NULL,
+    month INTEGER NOT NULL,
+    type TEXT NOT NULL,
+    category TEXT NOT NULL,
+    amount INTEGER NOT NULL,
+    description TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS transactions_epoch ON transactions (epoch);
+CREATE INDEX IF NOT EXISTS transactions_type_category_month ON transactions (type, category, month);
+CREATE INDEX IF NOT EXISTS transactions_id ON transactions (id);
+CREATE TABLE IF NOT EXISTS budgets (
+    category TEXT PRIMARY KEY,
+    amount INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+def connect(path: str, create: bool = False):
+    """Opens the database, raising FileNotFoundError unless create is set."""
+    if not create and not os.path.exists(path):
+        raise FileNotFoundError(f"No such file or directory: '{path}'")
+    # Streamlit reruns the dashboard script on worker threads
+    connection = sqlite3.connect(path, check_same_thread=False)
+    connection.executescript(SCHEMA)
+    return connection
+
+def id_range(prefix: str):
+    """Returns bounds [low, high) of the IDs starting with prefix, for an indexed lookup."""
+    return prefix, prefix + "\U0010ffff"
+
+def _values(rows: Ledger):
+    for index in range(len(rows)):
+        id, timestamp, type, category, amount, description = rows.row(index)
+        yield id, timestamp, rows.timestamps[index], rows.months[index], type, category, amount, description
+
+def insert_rows(connection, rows: Ledger):
+    """Inserts the parsed rows of a ledger."""
+    connection.executemany(
+        "INSERT INTO transactions (id, timestamp, epoch, month, type, category, amount, description) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+        _values(rows),
+    )
+    count_change(connection)
+
+def count_change(connection):
+    """Counts a write to the transactions table, in the same transaction; see data_version."""
+    connection.execute("INSERT INTO meta (key, value) VALUES ('transactions_version', 1) "
+                       "ON CONFLICT (key) DO UPDATE SET value = value + 1")
+
+def data_version(connection):
+    """Returns how many writes the transactions table has had, which budget writes leave alone."""
+    row = connection.execute("SELECT value FROM meta WHERE key = 'transactions_version'").fetchone()
+    return row[0] if row else 0
+
+
+class SQLiteLedger(Ledger):
+    """Ledger read from the SQLite store.
+
+    Only the numeric and code columns are loaded; each row keeps its primary
+    key so IDs and descriptions are fetched on demand.
+    """
+
+    _row_columns = ("timestamps", "months", "amounts", "types", "categories", "seqs")
+
+    def __init__(self, connection):
+        super().__init__()
+        self.connection = connection
+        self.seqs = array("q")
+
+    def load(self):
+        type_codes, category_codes = self._type_codes, self._category_codes
+        for seq, epoch, month, type, category, amount in self.connection.execute(
+                "SELECT seq, epoch, month, type, category, amount FROM transactions ORDER BY seq"):
+            self.seqs.append(seq)
+            self.timestamps.append(epoch)
+            self.months.append(month)
+            self.amounts.append(amount)
+            code = type_codes.get(type)
+            self.types.append(code if code is not None else self._intern(type.encode(), type_codes, self.type_names))
+            code = category_codes.get(category)
+            self.categories.append(code if code is not None else self._intern(category.encode(), category_codes, self.category_names))
+        return self
+
+    def find_all(self, prefix: str):
+        # The IDs are not loaded, so the ID index finds the rows and their seqs locate them
+        for (seq,) in self.connection.execute(
+                "SELECT seq FROM transactions WHERE id >= ? AND id < ? ORDER BY seq", id_range(prefix)):
+            index = bisect_left(self.seqs, seq)
+            if index < len(self.seqs) and self.seqs[index] == seq:
+                yield index
+
+    def id(self, index: int):
+        return self.connection.execute("SELECT id FROM transactions WHERE seq = ?", (self.seqs[index],)).fetchone()[0]
+
+    def position(self, index: int):
+        """Where the row is stored: its seq."""
+        return self.seqs[index]
+
+    def row(self, index: int):
+        return self.connection.execute(
+            "SELECT id, timestamp, type, category, amount, description FROM transactions WHERE seq = ?",
+            (self.seqs[index],)).fetchone()
+
+    @property
+    def data(self):
+        """The rows rendered in the text format."""
+        lines = self.connection.execute(
+            "SELECT id, timestamp, type, category, amount, description FROM transactions ORDER BY seq")
+        return "".join(",".join(map(str, line)) + "\n" for line in lines).encode()
@@ -0,0 +1,1059 @@
+import heapq
+import json
+import mmap
+import os
+import shutil
+from collections import OrderedDict
+from contextlib import contextmanager
+from itertools import islice
+from features.ledger.ledger import TOMBSTONE, Ledger, budgets_path, database_path, fingerprint, load_budgets, load_ledger, tombstone_line, write_budgets
+from features.ledger.locking import atomic_write, group_sync, locked, record_commit, sync_files
+from features.ledger.parallel import parallel_map, text_ranges, tombstone_offsets
+from features.ledger.partitions import Manifest, manifest_path, month_range, month_totals_of, partitions_path, read_partition
+from features.ledger.rollup import load_rollup, rollup_update
+from features.ledger.timecodec import current_month_key, format_timestamp, month_bounds, parse_timestamp_key
+from features.ledger.timeindex import load_timeindex, timeindex_update
+from features.profiling.profiler import count, phase
+
+
+READ_BLOCK = 1 << 14  # Bytes read at a time by backward walks over a text ledger
+CACHED_BLOCKS = 16  # Blocks a backward walk keeps, for rows stored slightly out of time order
+
+def storage_engine():
+    """Returns the configured storage engine: "text" (default), "binary", "sqlite" or "partitioned".
+
+    The FINANCE_TRACKER_STORAGE environment variable takes precedence over the
+    "storage" key of database/config.json.
+    """
+    engine = os.environ.get("FINANCE_TRACKER_STORAGE")
+    if engine:
+        return engine
+    try:
+        with open(database_path("config.json"), "r") as f:
+            return json.load(f).get("storage", "text")
+    except FileNotFoundError:
+        return "text"
+
+def set_storage_engine(engine: str):
+    """Makes engine the "storage" of database/config.json, keeping the file's other keys."""
+    path = database_path("config.json")
+    try:
+        with open(path, "r") as f:
+            config = json.load(f)
+    except (FileNotFoundError, ValueError):
+        config = {}
+    config["storage"] = engine
+    with atomic_write(path, "w") as f:
+        json.dump(config, f, indent=4)
+
+def _render(rows):
+    """Formats row tuples as text-format lines."""
+    return "".join(",".join(map(str, row)) + "\n" for row in rows)
+
+
+class _Sidecars:
+    """The files derived from a transactions file: monthly rollup, ID index and time index."""
+
+    def __init__(self, rollup, index, times):
+        self.rollup = rollup
+        self.index = index
+        self.times = times
+
+    def add(self, rows: Ledger, positions):
+        self.rollup.apply(rows)
+        self.index.put_many((rows.id(row), position) for row, position in enumerate(positions))
+        self.times.add(rows.timestamps, positions)
+
+    def remove(self, rows: Ledger, positions):
+        self.rollup.apply(rows, sign=-1)
+        for row, position in enumerate(positions):
+            self.index.remove(rows.id(row), position)
+        self.times.remove(rows.timestamps, positions)
+
+@contextmanager
+def _sidecars(path: str, truncate: bool = False, reindex: bool = False):
+    """Keeps every sidecar in step with a write; reindex rebuilds the indexes but keeps the rollup."""
+    # The ID index (and hashlib with it) is imported by writes and ID
+    # lookups only, so commands that just read do not pay for it
+    from features.ledger.idindex import index_update
+    with rollup_update(path, truncate) as rollup, \
+            index_update(path, truncate or reindex) as index, \
+            timeindex_update(path, truncate or reindex) as times:
+        yield _Sidecars(rollup, index, times)
+
+
+class Storage:
+    """Where transactions and budgets live.
+
+    Transactions are written as text-format lines
+    ("id,timestamp,type,category,amount_paisa,description"), which every
+    backend parses with the shared ledger parser before storing them.
+    """
+
+    path = None
+    parallel_scans = False  # Whether scan() can split the ledger into ranges for worker processes
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def data_files(self):
+        """Returns the paths of the files holding this backend's transactions."""
+        return [self.path]
+
+    def files(self):
+        """Returns the paths of the files holding this backend's transactions and budgets."""
+        return self.data_files() + [budgets_path()]
+
+    def fingerprint(self):
+        """Returns {path: [size, mtime_ns]} for files(); missing files map to None."""
+        files = {}
+        for path in self.files():
+            try:
+                files[path] = fingerprint(path)
+            except FileNotFoundError:
+                files[path] = None
+        return files
+
+    def data_fingerprint(self):
+        """Like fingerprint(), but changed only by writes to the transactions, not the budgets."""
+        files = self.fingerprint()
+        files.pop(budgets_path(), None)
+        return files
+
+    def write_locked(self):
+        """Holds the transactions' write lock, so state derived from them can be read, updated and saved with no write in between.
+
+        Writes inside the block take the lock again, which is allowed.
+        """
+        return locked(self.path)
+
+    def load(self):
+        """Returns every transaction as a Ledger. Raises FileNotFoundError if there is no data."""
+        return load_ledger(self.path)
+
+    def append(self, lines: str, fsync: bool = False, observers=()):
+        """Adds transactions and returns them parsed.
+
+        With fsync set they are on disk before append returns; concurrent
+        writers share the sync where the backend allows it. Each observer's
+        before_write() and after_write(rows) are called around the write
+        while the write lock is held, ahead of the sync.
+        """
+        raise NotImplementedError
+
+    def replace(self, lines: str):
+        """Replaces every transaction and returns the new rows parsed."""
+        raise NotImplementedError
+
+    @contextmanager
+    def batch(self, fsync: bool = False):
+        """Yields a commit(lines) function for adding many transactions in groups.
+
+        Each call appends one group and returns its rows parsed. Backends keep
+        their files open across calls; with fsync set every group is synced to
+        disk before commit returns.
+        """
+        yield lambda lines: self.append(lines, fsync)
+
+    def iter_rows(self, start: int = None, end: int = None, type: str = None, category: str = None):
+        """Yields (id, timestamp, type, category, amount_paisa, description) in storage order.
+
+        Only rows with start <= epoch < end and the given type (matched
+        ignoring case) and category are yielded; the filters are checked
+        before a row is decoded.
+        """
+        ledger = self.load()
+        type_codes = {code for code, name in enumerate(ledger.type_names) if name.lower() == type.lower()} if type else None
+        category_code = ledger.category_code(category) if category else None
+        if (type and not type_codes) or (category and category_code is None):
+            return
+        timestamps, types, categories = ledger.timestamps, ledger.types, ledger.categories
+        filtered = 0
+        try:
+            for index in range(len(ledger)):
+                if ((start is None or timestamps[index] >= start) and (end is None or timestamps[index] < end)
+                        and (type_codes is None or types[index] in type_codes)
+                        and (category_code is None or categories[index] == category_code)):
+                    yield ledger.row(index)
+                else:
+                    filtered += 1
+        finally:
+            count("rows_filtered", filtered)
+
+    def latest(self, start: int = None, end: int = None, type: str = None, limit: int = None, offset: int = 0):
+        """Yields rows newest first, skipping offset and stopping after limit rows.
+
+        Filters as iter_rows does.
+        Rows with the same timestamp come most recently added first.
+        """
+        ledger = self.load()
+        timestamps, types = ledger.timestamps, ledger.types
+        type_codes = {code for code, name in enumerate(ledger.type_names) if name.lower() == type.lower()} if type else None
+        candidates = (index for index in range(len(ledger))
+                      if (start is None or timestamps[index] >= start) and (end is None or timestamps[index] < end)
+                      and (type_codes is None or types[index] in type_codes))
+        key = lambda index: (timestamps[index], index)
+        if limit is None:
+            order = sorted(candidates, key=key, reverse=True)
+        else:
+            # Only the newest offset + limit rows are ever held
+            order = heapq.nlargest(offset + limit, candidates, key=key)
+        for index in order[offset:]:
+            yield ledger.row(index)
+
+    def scan(self, worker, *args, start: int = None, end: int = None):
+        """Yields worker(file, range start, range stop, deleted offsets, *args) for each range of the ledger, in storage order.
+
+        Ranges are text-format lines, handed to up to parallel.jobs() worker
+        processes; see parallel.range_totals and parallel.range_rows for
+        workers. Backends without parallel_scans do not support it. A
+        backend may skip ranges holding no rows from start to end, but the
+        worker does the filtering.
+        """
+        raise NotImplementedError
+
+    def find(self, prefix: str):
+        """Returns (id, timestamp, type, category, amount_paisa, description) for each transaction whose ID starts with prefix."""
+        raise NotImplementedError
+
+    def stored_ids(self, ids):
+        """Returns the set of the given full IDs that are stored, looking them up together.
+
+        This default reads the ledger once, however many IDs are asked for.
+        """
+        wanted = set(ids)
+        try:
+            return {row[0] for row in self.iter_rows() if row[0] in wanted}
+        except FileNotFoundError:
+            return set()
+
+    def delete(self, *prefixes: str):
+        """Removes every transaction whose ID starts with one of the prefixes and returns the removed rows."""
+        raise NotImplementedError
+
+    def compact(self):
+        """Reclaims the space held by deleted transactions. Returns the number of bytes freed."""
+        raise NotImplementedError
+
+    def month_totals(self, month: int):
+        """Returns {type: {category: amount_paisa}} for one month."""
+        raise NotImplementedError
+
+    def history_totals(self):
+        """Returns {month_key: {type: {category: amount_paisa}}} for every month with transactions."""
+        raise NotImplementedError
+
+    def malformed(self):
+        """Returns stored lines that could not be parsed."""
+        return []
+
+    def load_budgets(self):
+        """Returns {category: amount_paisa}. Raises FileNotFoundError if no budgets were ever saved."""
+        return load_budgets(budgets_path())
+
+    def write_budgets(self, budgets: dict):
+        write_budgets(budgets, budgets_path())
+
+    def budgets_locked(self):
+        """Holds the budgets' write lock, so a read-modify-write of them is not lost to another writer."""
+        return locked(budgets_path())
+
+
+class TextStorage(Storage):
+    """The plain database/transactions.txt file, with its rollup, ID index and time index sidecars.
+
+    Deletes append tombstone lines, located through the ID index, so neither
+    a delete nor a batch of them rewrites the file; compact() drops the
+    deleted rows in one pass. Newest-first listings walk the time index
+    backwards from the end of the requested range, reading the file in
+    blocks rather than a row at a time.
+
+    Writes hold the file's exclusive lock (see locking.locked) and reads a
+    shared one, so concurrent writers never interleave lines and readers
+    never see half a write or its sidecars half updated. Rewrites go to a
+    temporary file renamed over the original.
+    """
+
+    parallel_scans = True
+
+    def __init__(self, path: str = None):
+        self.path = path or database_path("transactions.txt")
+
+    def _write(self, data: bytes, rows: Ledger, mode: str):
+        """Writes the rows and returns the position of each one."""
+        if mode == "wb":
+            with atomic_write(self.path, sync=True) as f:
+                return self._write_to(f, data, rows)
+        with open(self.path, mode) as f:
+            return self._write_to(f, data, rows)
+
+    def _write_to(self, f, data: bytes, rows: Ledger):
+        start = f.tell()
+        f.write(data)
+        return [start + position for position in rows._line_starts]
+
+    @contextmanager
+    def _reader(self, backwards: bool = False):
+        """Yields a function that reads the row stored at a position.
+
+        With backwards set, rows are cut from aligned blocks of the file,
+        the most recently used of which are kept. A walk toward the start
+        of the file then reads each block once, where seeking back and
+        reading forward would refill a buffer for every row.
+        """
+        with open(self.path, "rb") as f:
+            if not backwards:
+                def read_row(position: int):
+                    f.seek(position)
+                    return Ledger().parse(f.readline()).row(0)
+                yield read_row
+                return
+
+            blocks = OrderedDict()
+            def read_block(number: int):
+                data = blocks.get(number)
+                if data is None:
+                    data = blocks[number] = os.pread(f.fileno(), READ_BLOCK, number * READ_BLOCK)
+                    count("bytes_read", len(data))
+                    if len(blocks) > CACHED_BLOCKS:
+                        blocks.popitem(last=False)
+                else:
+                    blocks.move_to_end(number)
+                return data
+
+            def read_row(position: int):
+                number, offset = divmod(position, READ_BLOCK)
+                data = read_block(number)
+                stop = data.find(b"\n", offset)
+                line = data[offset:] if stop == -1 else data[offset:stop + 1]
+                while stop == -1 and len(data) == READ_BLOCK:
+                    # The line runs on into the next block
+                    number += 1
+                    data = read_block(number)
+                    stop = data.find(b"\n")
+                    line += data if stop == -1 else data[:stop + 1]
+                # Only parsed rows are in the time index, so the line splits cleanly
+                id, timestamp, type, category, amount_paisa, description = line.rstrip().decode().split(",", 5)
+                count("rows_parsed")
+                return id, timestamp, type, category, int(amount_paisa), description
+            yield read_row
+
+    def _read_row(self, position: int):
+        with self._reader() as read_row:
+            return read_row(position)
+
+    def _tombstone(self, positions: list):
+        with open(self.path, "ab") as f:
+            f.write(b"".join(tombstone_line(position) for position in positions))
+
+    def _positions(self, index, prefix: str):
+        # Every row of a full ID, as imports may store one more than once
+        positions = index.positions(prefix)
+        if positions:
+            return positions
+        # Not a full ID, so fall back to scanning the IDs
+        ledger = self.load()
+        return [ledger.position(row) for row in ledger.find_all(prefix)]
+
+    def _save(self, data: bytes, mode: str, truncate: bool):
+        with phase("write"):
+            rows = Ledger().parse(data)
+            with _sidecars(self.path, truncate) as sidecars:
+                sidecars.add(rows, self._write(data, rows, mode))
+        count("rows_written", len(rows))
+        return rows
+
+    def append(self, lines: str, fsync: bool = False, observers=()):
+        # The sync happens after the lock is released, so other writers can
+        # append meanwhile and one fsync covers all of them (group commit)
+        with locked(self.path):
+            for observer in observers:
+                observer.before_write()
+            rows = self._save(lines.encode(), "ab", truncate=False)
+            for observer in observers:
+                observer.after_write(rows)
+            commit = record_commit(self.path) if fsync else None
+        if fsync:
+            group_sync(self.path, commit, self.data_files())
+        return rows
+
+    def replace(self, lines: str):
+        with locked(self.path):
+            return self._save(lines.encode(), "wb", truncate=True)
+
+    @contextmanager
+    def batch(self, fsync: bool = False):
+        # The sidecars stay in memory across commits, so the batch holds the
+        # write lock until it finishes
+        with locked(self.path), _sidecars(self.path) as sidecars, open(self.path, "ab") as f:
+            def commit(lines: str):
+                with phase("write"):
+                    data = lines.encode()
+                    rows = Ledger().parse(data)
+                    positions = self._write_to(f, data, rows)
+                    f.flush()
+                    if fsync:
+                        os.fsync(f.fileno())
+                    sidecars.add(rows, positions)
+                count("rows_written", len(rows))
+                return rows
+            yield commit
+
+    def iter_rows(self, start: int = None, end: int = None, type: str = None, category: str = None):
+        # Streams the mapped file instead of loading the ledger. Timestamps
+        # are fixed-width, so the date range is a plain bytes comparison.
+        low = format_timestamp(start).encode() if start is not None else None
+        high = format_timestamp(end).encode() if end is not None else None
+        type = type.lower().encode() if type else None
+        category = category.encode() if category else None
+        with locked(self.path, shared=True), open(self.path, "rb") as f:
+            if not os.fstat(f.fileno()).st_size:
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                tombstones = tombstone_offsets(data)
+                pos, size = 0, len(data)
+                count("bytes_read", size)
+                filtered = malformed = 0
+                try:
+                    while pos < size:
+                        stop = data.find(b"\n", pos)
+                        if stop == -1:
+                            stop = size
+                        fields = data[pos:stop].rstrip().split(b",", 5)
+                        if len(fields) == 6 and pos not in tombstones:
+                            id, timestamp, row_type, row_category, amount, description = fields
+                            if ((low is None or timestamp >= low) and (high is None or timestamp < high)
+                                    and (type is None or row_type.lower() == type) and (category is None or row_category == category)):
+                                try:
+                                    parse_timestamp_key(timestamp)
+                                    amount = int(amount)
+                                except ValueError:
+                                    malformed += 1  # Like Ledger.parse, skip it
+                                else:
+                                    yield (id.decode(), timestamp.decode(), row_type.decode(), row_category.decode(),
+                                           amount, description.decode())
+                            else:
+                                filtered += 1
+                        pos = stop + 1
+                finally:
+                    count("rows_filtered", filtered)
+                    count("malformed_skipped", malformed)
+
+    def scan(self, worker, *args, start: int = None, end: int = None):
+        # Rows are not stored in time order, so every range is scanned
+        with locked(self.path, shared=True):
+            yield from parallel_map(worker, text_ranges(self.path), *args)
+
+    def latest(self, start: int = None, end: int = None, type: str = None, limit: int = None, offset: int = 0):
+        with locked(self.path, shared=True):
+            times = load_timeindex(self.path)
+            try:
+                low, high = times.range(start, end)
+                with self._reader(backwards=True) as read_row:
+                    rows = (read_row(position) for position in times.positions(low, high, reverse=True))
+                    if type:
+                        rows = (row for row in rows if row[2].lower() == type.lower())
+                    yield from islice(rows, offset, None if limit is None else offset + limit)
+            finally:
+                times.close()
+
+    def find(self, prefix: str):
+        from features.ledger.idindex import load_index
+        with locked(self.path, shared=True):
+            index = load_index(self.path)
+            try:
+                return [self._read_row(position) for position in self._positions(index, prefix)]
+            finally:
+                index.close()
+
+    def stored_ids(self, ids):
+        # Exact IDs, so the ID index answers each one without a scan
+        from features.ledger.idindex import load_index
+        with locked(self.path, shared=True):
+            try:
+                index = load_index(self.path)
+            except FileNotFoundError:
+                return set()
+            try:
+                return {id for id in ids if index.positions(id)}
+            finally:
+                index.close()
+
+    def delete(self, *prefixes: str):
+        with locked(self.path), phase("write"), _sidecars(self.path) as sidecars:
+            positions = []
+            for prefix in prefixes:
+                positions.extend(self._positions(sidecars.index, prefix))
+            positions = list(dict.fromkeys(positions))
+            with self._reader() as read_row:
+                removed = Ledger().parse(_render(read_row(position) for position in positions).encode())
+            if positions:
+                self._tombstone(positions)
+            sidecars.remove(removed, positions)
+        return removed
+
+    def compact(self):
+        with locked(self.path), phase("write"):
+            return self._compact()
+
+    def _compact(self):
+        ledger = self.load()
+        data, tombstones, live = ledger.data, ledger.tombstones, ledger._line_starts
+        written = 0
+        with _sidecars(self.path, reindex=True) as sidecars:
+            # Streams the live lines into a new file, indexing them at their new offsets
+            positions = []
+            with atomic_write(self.path, sync=True) as f:
+                row = pos = 0
+                while pos < len(data):
+                    end = data.find(b"\n", pos)
+                    end = len(data) if end == -1 else end + 1
+                    if not data.startswith(TOMBSTONE, pos) and pos not in tombstones:
+                        if row < len(live) and live[row] == pos:
+                            positions.append(written)
+                            row += 1
+                        f.write(data[pos:end])
+                        written += end - pos
+                    pos = end
+            sidecars.index.put_many((ledger.id(row), position) for row, position in enumerate(positions))
+            sidecars.times.add(ledger.timestamps, positions)
+            sidecars.rollup.malformed = [line for line in sidecars.rollup.malformed if not line.startswith(TOMBSTONE.decode())]
+        return len(data) - written
+
+    def _rollup(self):
+        with locked(self.path, shared=True), phase("aggregate"):
+            return load_rollup(self.path)
+
+    def month_totals(self, month: int):
+        return self._rollup().totals.get(month, {})
+
+    def history_totals(self):
+        return self._rollup().totals
+
+    def malformed(self):
+        return self._rollup().malformed
+
+
+class BinaryStorage(TextStorage):
+    """The fixed-record binary log, see binlog.BinaryLog."""
+
+    # Records load with a bulk copy per column, which leaves worker processes nothing to speed up
+    parallel_scans = False
+    scan = Storage.scan
+
+    def __init__(self, path: str = None):
+        self.path = path or database_path("transactions.bin")
+
+    batch = Storage.batch
+    iter_rows = Storage.iter_rows
+
+    def _write(self, data: bytes, rows: Ledger, mode: str):
+        if mode == "wb":
+            self._install(self._rewritten(rows))
+            first = 0
+        else:
+            first = self._log().append(rows)
+        rows.malformed = [] # The binary log cannot hold unparseable lines
+        return range(first, first + len(rows))
+
+    def _reader(self, backwards: bool = False):
+        # Records have a fixed size, so each is read directly in either direction
+        return self._log().reader()
+
+    def _tombstone(self, positions: list):
+        self._log().mark_deleted(positions)
+
+    def _log(self, path: str = None):
+        # binlog is loaded once the binary engine is actually used
+        from features.ledger.binlog import BinaryLog
+        return BinaryLog(path or self.path)
+
+    def data_files(self):
+        log = self._log()
+        return [log.path, log.heap_path, log.names_path]
+
+    def _rewritten(self, rows: Ledger):
+        """Writes the rows as a new log beside this one and returns it."""
+        log = self._log(f"{os.path.splitext(self.path)[0]}.{os.getpid()}.tmp.bin")
+        log.write(rows)
+        return log
+
+    def _install(self, log):
+        """Moves a log written by _rewritten over this one, each file in one rename."""
+        sync_files([log.path, log.heap_path, log.names_path])
+        for source, target in zip([log.path, log.heap_path, log.names_path], self.data_files()):
+            if os.path.exists(source):
+                os.replace(source, target)
+            elif os.path.exists(target):
+                os.remove(target)
+
+    def _size(self):
+        log = self._log()
+        return sum(os.path.getsize(path) for path in (log.path, log.heap_path) if os.path.exists(path))
+
+    def _compact(self):
+        ledger = self.load()
+        before = self._size()
+        with _sidecars(self.path, reindex=True) as sidecars:
+            self._install(self._rewritten(ledger))
+            sidecars.index.put_many((ledger.id(row), row) for row in range(len(ledger)))
+            sidecars.times.add(ledger.timestamps, range(len(ledger)))
+        return before - self._size()
+
+
+class SQLiteStorage(Storage):
+    """An indexed SQLite database holding both transactions and budgets.
+
+    Monthly totals are computed by the database with GROUP BY, so reports
+    never bring individual rows into Python.
+    """
+
+    def __init__(self, path: str = None):
+        self.path = path or database_path("finance.db")
+
+    def files(self):
+        return [self.path]
+
+    def budgets_locked(self):
+        return locked(self.path)
+
+    def _connect(self, create: bool = False):
+        # sqlitedb, and with it sqlite3, is imported on first use, so that the
+        # other engines do not load it at startup
+        from features.ledger import sqlitedb
+        return sqlitedb.connect(self.path, create=create)
+
+    def data_fingerprint(self):
+        from features.ledger import sqlitedb
+        # Budgets live in the same file, so the database counts its transaction writes
+        try:
+            connection = self._connect()
+        except FileNotFoundError:
+            return {self.path: None}
+        try:
+            return {self.path: sqlitedb.data_version(connection)}
+        finally:
+            connection.close()
+
+    # SQLite syncs every transaction by default, and locks the database
+    # itself; writers also take the ledger lock, which keeps derived state
+    # such as the anomaly statistics in step with the database
+
+    def append(self, lines: str, fsync: bool = False, observers=()):
+        from features.ledger import sqlitedb
+        with locked(self.path), phase("write"):
+            rows = Ledger().parse(lines.encode())
+            for observer in observers:
+                observer.before_write()
+            connection = self._connect(create=True)
+            with connection:
+                sqlitedb.insert_rows(connection, rows)
+            connection.close()
+            rows.malformed = []
+            for observer in observers:
+                observer.after_write(rows)
+        count("rows_written", len(rows))
+        return rows
+
+    def replace(self, lines: str):
+        from features.ledger import sqlitedb
+        with locked(self.path), phase("write"):
+            rows = Ledger().parse(lines.encode())
+            connection = self._connect(create=True)
+            with connection:
+                connection.execute("DELETE FROM transactions")
+                sqlitedb.insert_rows(connection, rows)
+            connection.close()
+        count("rows_written", len(rows))
+        rows.malformed = []
+        return rows
+
+    @contextmanager
+    def batch(self, fsync: bool = False):
+        from features.ledger import sqlitedb
+        with locked(self.path):
+            connection = self._connect(create=True)
+            connection.execute(f"PRAGMA synchronous = {'FULL' if fsync else 'NORMAL'}")
+            def commit(lines: str):
+                with phase("write"):
+                    rows = Ledger().parse(lines.encode())
+                    with connection:
+                        sqlitedb.insert_rows(connection, rows)
+                count("rows_written", len(rows))
+                rows.malformed = []
+                return rows
+            try:
+                yield commit
+            finally:
+                connection.close()
+
+    def iter_rows(self, start: int = None, end: int = None, type: str = None, category: str = None):
+        conditions, parameters = [], []
+        for condition, value in (("epoch >= ?", start), ("epoch < ?", end), ("lower(type) = ?", type.lower() if type else None), ("category = ?", category)):
+            if value is not None:
+                conditions.append(condition)
+                parameters.append(value)
+        where = f"WHERE {' AND '.join(conditions)} " if conditions else ""
+        connection = self._connect()
+        try:
+            yield from connection.execute(
+                f"SELECT id, timestamp, type, category, amount, description FROM transactions {where}ORDER BY seq", parameters)
+        finally:
+            connection.close()
+
+    def latest(self, start: int = None, end: int = None, type: str = None, limit: int = None, offset: int = 0):
+        conditions, parameters = [], []
+        for condition, value in (("epoch >= ?", start), ("epoch < ?", end), ("lower(type) = ?", type.lower() if type else None)):
+            if value is not None:
+                conditions.append(condition)
+                parameters.append(value)
+        where = f"WHERE {' AND '.join(conditions)} " if conditions else ""
+        connection = self._connect()
+        try:
+            yield from connection.execute(
+                f"SELECT id, timestamp, type, category, amount, description FROM transactions {where}"
+                "ORDER BY epoch DESC, seq DESC LIMIT ? OFFSET ?", parameters + [-1 if limit is None else limit, offset])
+        finally:
+            connection.close()
+
+    def find(self, prefix: str):
+        from features.ledger import sqlitedb
+        connection = self._connect()
+        rows = connection.execute(
+            "SELECT id, timestamp, type, category, amount, description FROM transactions "
+            "WHERE id >= ? AND id < ? ORDER BY seq", sqlitedb.id_range(prefix)).fetchall()
+        connection.close()
+        return rows
+
+    def stored_ids(self, ids):
+        try:
+            connection = self._connect()
+        except FileNotFoundError:
+            return set()
+        ids, found = list(ids), set()
+        try:
+            # In groups, to stay under SQLite's limit on query parameters
+            for start in range(0, len(ids), 500):
+                group = ids[start:start + 500]
+                found.update(id for id, in connection.execute(
+                    f"SELECT DISTINCT id FROM transactions WHERE id IN ({', '.join('?' * len(group))})", group))
+        finally:
+            connection.close()
+        return found
+
+    def delete(self, *prefixes: str):
+        from features.ledger import sqlitedb
+        with locked(self.path):
+            connection = self._connect()
+            removed = []
+            with connection:
+                for prefix in prefixes:
+                    bounds = sqlitedb.id_range(prefix)
+                    removed += connection.execute(
+                        "SELECT id, timestamp, type, category, amount, description FROM transactions "
+                        "WHERE id >= ? AND id < ? ORDER BY seq", bounds).fetchall()
+                    connection.execute("DELETE FROM transactions WHERE id >= ? AND id < ?", bounds)
+                sqlitedb.count_change(connection)
+            connection.close()
+        return Ledger().parse(_render(removed).encode())
+
+    def compact(self):
+        before = os.path.getsize(self.path)
+        connection = self._connect()
+        connection.execute("VACUUM")
+        connection.close()
+        return before - os.path.getsize(self.path)
+
+    def month_totals(self, month: int):
+        connection = self._connect()
+        totals = {}
+        with phase("aggregate"):
+            for type, category, amount in connection.execute(
+                    "SELECT type, category, SUM(amount) FROM transactions "
+                    "WHERE epoch >= ? AND epoch < ? GROUP BY type, category ORDER BY MIN(seq)",
+                    month_bounds(month)):
+                totals.setdefault(type, {})[category] = amount
+        connection.close()
+        return totals
+
+    def history_totals(self):
+        connection = self._connect()
+        totals = {}
+        with phase("aggregate"):
+            for month, type, category, amount in connection.execute(
+                    "SELECT month, type, category, SUM(amount) FROM transactions "
+                    "GROUP BY month, type, category ORDER BY month, MIN(seq)"):
+                totals.setdefault(month, {}).setdefault(type, {})[category] = amount
+        connection.close()
+        return totals
+
+    def load_budgets(self):
+        connection = self._connect()
+        budgets = dict(connection.execute("SELECT category, amount FROM budgets ORDER BY rowid"))
+        connection.close()
+        return budgets
+
+    def write_budgets(self, budgets: dict):
+        connection = self._connect(create=True)
+        with connection:
+            connection.execute("DELETE FROM budgets")
+            connection.executemany("INSERT INTO budgets (category, amount) VALUES (?, ?)", budgets.items())
+        connection.close()
+
+
+class PartitionedStorage(Storage):
+    """Transactions split by month into text-format files under database/transactions/ (2026-09.gz, 2026-10, ...).
+
+    The manifest (see partitions.Manifest) keeps every partition's row
+    count and totals, so month totals read only the manifest, and a
+    listing reads only the months it shows: day-to-day commands cost the
+    same however long the history grows. Months before the current one are
+    closed, and their partitions gzip-compressed, as soon as a write finds
+    them open; they are read and appended to transparently. Deletes rewrite
+    just the partitions holding the deleted rows, so no tombstones are
+    kept. Like the binary log, partitions do not keep unparseable lines.
+    """
+
+    parallel_scans = True
+
+    def __init__(self, path: str = None):
+        self.path = path or partitions_path()
+
+    def exists(self):
+        # A lost manifest is rebuilt from the partitions, so the directory is enough
+        return os.path.isdir(self.path)
+
+    def data_files(self):
+        with locked(self.path, shared=True):
+            manifest = Manifest.load(self.path)
+            return [manifest_path(self.path)] + [manifest.file(month) for month in manifest.months()]
+
+    def files(self):
+        # Every write rewrites the manifest, so it alone stands for the partitions
+        return [manifest_path(self.path), budgets_path()]
+
+    def _manifest(self):
+        if not self.exists():
+            raise FileNotFoundError(f"No transactions in {self.path}")
+        return Manifest.load(self.path)
+
+    def _read(self, manifest: Manifest, month: int):
+        return Ledger().parse(read_partition(manifest.file(month)))
+
+    def load(self):
+        with locked(self.path, shared=True):
+            manifest = self._manifest()
+            parts = [read_partition(manifest.file(month)) for month in manifest.months()]
+            manifest.save()
+        return Ledger().parse(b"".join(part if part.endswith(b"\n") else part + b"\n" for part in parts if part))
+
+    def _write(self, manifest: Manifest, data: bytes):
+        """Appends rows to the partitions of their months. Returns the parsed rows and the files written."""
+        rows = Ledger().parse(data)
+        buffer, starts = rows.data, rows._line_starts
+        by_month = {}  # month -> (lines, row indexes)
+        for index, month in enumerate(rows.months):
+            start = starts[index]
+            end = buffer.find(b"\n", start)
+            lines, indexes = by_month.setdefault(month, ([], []))
+            lines.append(buffer[start:end if end != -1 else len(buffer)] + b"\n")
+            indexes.append(index)
+        os.makedirs(manifest.path, exist_ok=True)
+        files = [manifest.append(month, b"".join(lines), len(lines), month_totals_of(rows, indexes))
+                 for month, (lines, indexes) in by_month.items()]
+        rows.malformed = [] # Partitions do not keep unparseable lines
+        return rows, files
+
+    def _commit(self, manifest: Manifest, sync: bool = False):
+        manifest.close(current_month_key())
+        manifest.save(sync)
+
+    def append(self, lines: str, fsync: bool = False, observers=()):
+        with locked(self.path):
+            for observer in observers:
+                observer.before_write()
+            with phase("write"):
+                manifest = Manifest.load(self.path)
+                rows, files = self._write(manifest, lines.encode())
+                self._commit(manifest)
+            count("rows_written", len(rows))
+            for observer in observers:
+                observer.after_write(rows)
+            commit = record_commit(self.path) if fsync else None
+        if fsync:
+            group_sync(self.path, commit, files + [manifest_path(self.path)])
+        return rows
+
+    def replace(self, lines: str):
+        # The new partitions are written beside the old ones and swapped in by renaming the directories
+        with locked(self.path), phase("write"):
+            staging, retired = f"{self.path}.{os.getpid()}.tmp", f"{self.path}.{os.getpid()}.old"
+            shutil.rmtree(staging, ignore_errors=True)
+            manifest = Manifest(staging)
+            manifest.changed = True
+            rows, _ = self._write(manifest, lines.encode())
+            self._commit(manifest, sync=True)
+            if os.path.exists(self.path):
+                os.rename(self.path, retired)
+            os.rename(staging, self.path)
+            shutil.rmtree(retired, ignore_errors=True)
+        count("rows_written", len(rows))
+        return rows
+
+    @contextmanager
+    def batch(self, fsync: bool = False):
+        # The manifest stays in memory across commits and is saved once the
+        # batch finishes; partitions written by a batch cut short are
+        # rescanned when next read
+        with locked(self.path):
+            manifest = Manifest.load(self.path)
+
+            def commit(lines: str):
+                with phase("write"):
+                    rows, files = self._write(manifest, lines.encode())
+                    if fsync:
+                        sync_files(files)
+                count("rows_written", len(rows))
+                return rows
+            yield commit
+            self._commit(manifest, sync=fsync)
+
+    def iter_rows(self, start: int = None, end: int = None, type: str = None, category: str = None):
+        with locked(self.path, shared=True):
+            try:
+                manifest = self._manifest()
+            except FileNotFoundError:
+                return
+            type = type.lower() if type else None
+            filtered = 0
+            try:
+                for month in manifest.months(*month_range(start, end)):
+                    rows = self._read(manifest, month)
+                    timestamps, type_names, category_names = rows.timestamps, rows.type_names, rows.category_names
+                    for index in range(len(rows)):
+                        if ((start is None or timestamps[index] >= start) and (end is None or timestamps[index] < end)
+                                and (type is None or type_names[rows.types[index]].lower() == type)
+                                and (category is None or category_names[rows.categories[index]] == category)):
+                            yield rows.row(index)
+                        else:
+                            filtered += 1
+            finally:
+                count("rows_filtered", filtered)
+
+    def scan(self, worker, *args, start: int = None, end: int = None):
+        # Each month's partition is one range, and only the months from start to end are scanned
+        with locked(self.path, shared=True):
+            try:
+                manifest = self._manifest()
+            except FileNotFoundError:
+                return
+            tasks = [(manifest.file(month), 0, None, frozenset()) for month in manifest.months(*month_range(start, end))]
+            yield from parallel_map(worker, tasks, *args)
+
+    def latest(self, start: int = None, end: int = None, type: str = None, limit: int = None, offset: int = 0):
+        with locked(self.path, shared=True):
+            try:
+                manifest = self._manifest()
+            except FileNotFoundError:
+                return
+            yield from islice(self._newest_first(manifest, start, end, type), offset, None if limit is None else offset + limit)
+
+    def _newest_first(self, manifest: Manifest, start: int, end: int, type: str):
+        # Months do not overlap in time, so only the months shown are read
+        for month in reversed(manifest.months(*month_range(start, end))):
+            rows = self._read(manifest, month)
+            timestamps, types = rows.timestamps, rows.types
+            type_codes = {code for code, name in enumerate(rows.type_names) if name.lower() == type.lower()} if type else None
+            candidates = [index for index in range(len(rows))
+                          if (start is None or timestamps[index] >= start) and (end is None or timestamps[index] < end)
+                          and (type_codes is None or types[index] in type_codes)]
+            candidates.sort(key=lambda index: (timestamps[index], index), reverse=True)
+            for index in candidates:
+                yield rows.row(index)
+
+    def find(self, prefix: str):
+        # IDs say nothing of the month, so every partition is searched, newest first
+        with locked(self.path, shared=True):
+            manifest = self._manifest()
+            found = []
+            for month in reversed(manifest.months()):
+                rows = self._read(manifest, month)
+                found.extend(rows.row(index) for index in rows.find_all(prefix))
+            return found
+
+    def delete(self, *prefixes: str):
+        with locked(self.path), phase("write"):
+            manifest = self._manifest()
+            removed = []
+            for month in manifest.months():
+                data = read_partition(manifest.file(month))
+                rows = Ledger().parse(data)
+                doomed = sorted({index for prefix in prefixes for index in rows.find_all(prefix)})
+                if not doomed:
+                    continue
+                removed.extend(rows.row(index) for index in doomed)
+                starts = {rows.position(index) for index in doomed}
+                kept, pos = [], 0
+                while pos < len(data):
+                    end = data.find(b"\n", pos)
+                    end = len(data) if end == -1 else end + 1
+                    if pos not in starts:
+                        kept.append(data[pos:end])
+                    pos = end
+                manifest.rewrite(month, b"".join(kept))
+            self._commit(manifest)
+        return Ledger().parse(_render(removed).encode())
+
+    def compact(self):
+        """Compresses closed months still open, and recompresses those appended to since. Returns the bytes saved."""
+        with locked(self.path), phase("write"):
+            manifest = self._manifest()
+            manifest.months()
+            saved = manifest.close(current_month_key(), recompress=True)
+            manifest.save()
+        return saved
+
+    def month_totals(self, month: int):
+        with locked(self.path, shared=True), phase("aggregate"):
+            manifest = self._manifest()
+            entry = manifest.entry(month)
+            manifest.save()
+        return entry["totals"] if entry else {}
+
+    def history_totals(self):
+        with locked(self.path, shared=True), phase("aggregate"):
+            manifest = self._manifest()
+            totals = {month: manifest.entries[month]["totals"] for month in manifest.months() if manifest.entries[month]["rows"]}
+            manifest.save()
+        return totals
+
+    def malformed(self):
+        try:
+            with locked(self.path, shared=True):
+                manifest = self._manifest()
+                return [line for month in manifest.months() for line in manifest.entries[month]["malformed"]]
+        except FileNotFoundError:
+            return []
+
+
+ENGINES = {
+    "text": TextStorage,
+    "binary": BinaryStorage,
+    "sqlite": SQLiteStorage,
+    "partitioned": PartitionedStorage,
+}
+
+def get_storage(engine: str = None, daemon: bool = True):
+    """Returns the storage backend for the given or configured engine.
+
+    When a daemon is serving the database directory (see `main.py serve`),
+    its queries are answered by the daemon unless daemon is False.
+    """
+    engine = engine or storage_engine()
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown storage engine '{engine}'. Choose one of: {', '.join(ENGINES)}.")
+    storage = ENGINES[engine]()
+    if not daemon:
+        return storage
+    from features.daemon.client import connect_daemon
+    return connect_daemon(storage, engine)
@@ -0,0 +1,78 @@
+import calendar
+from datetime import datetime, timedelta
+
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+_EPOCH = datetime(1970, 1, 1)
+
+# "YYYY-MM-DD" prefix -> (days since 1970-01-01, month key). Ledgers hold many
+# rows per day, so the calendar arithmetic runs once per distinct date.
+_day_cache = {}
+
+def _days_from_civil(year: int, month: int, day: int):
+    """Days since 1970-01-01 for a proleptic Gregorian date."""
+    year -= month <= 2
+    era = year // 400
+    year_of_era = year - era * 400
+    day_of_year = (153 * (month + (-3 if month > 2 else 9)) + 2) // 5 + day - 1
+    day_of_era = year_of_era * 365 + year_of_era // 4 - year_of_era // 100 + day_of_year
+    return era * 146097 + day_of_era - 719468
+
+def _parse_day(date: bytes):
+    if len(date) != 10 or date[4:5] != b"-" or date[7:8] != b"-":
+        raise ValueError(f"invalid date: {date!r}")
+    year, month, day = int(date[0:4]), int(date[5:7]), int(date[8:10])
+    if not 1 <= month <= 12 or not 1 <= day <= calendar.monthrange(year, month)[1]:
+        raise ValueError(f"invalid date: {date!r}")
+    parsed = (_days_from_civil(year, month, day), month_key(year, month))
+    _day_cache[date] = parsed
+    return parsed
+
+def parse_timestamp_key(timestamp: bytes):
+    """Parses a fixed-width b"YYYY-MM-DD HH:MM:SS" into (epoch, month key).
+
+    Raises ValueError for anything strptime with TIMESTAMP_FORMAT would reject.
+    """
+    if len(timestamp) != 19 or timestamp[10:11] != b" " or timestamp[13:14] != b":" or timestamp[16:17] != b":":
+        raise ValueError(f"invalid timestamp: {timestamp!r}")
+    day = timestamp[:10]
+    days, key = _day_cache.get(day) or _parse_day(day)
+    hour, minute, second = int(timestamp[11:13]), int(timestamp[14:16]), int(timestamp[17:19])
+    if hour > 23 or minute > 59 or second > 59 or hour < 0 or minute < 0 or second < 0:
+        raise ValueError(f"invalid timestamp: {timestamp!r}")
+    return days * 86400 + hour * 3600 + minute * 60 + second, key
+
+def parse_timestamp(timestamp: bytes):
+    return parse_timestamp_key(timestamp)[0]
+
+def to_epoch(date: datetime):
+    """Converts a naive datetime to whole seconds since 1970-01-01."""
+    return (date - _EPOCH) // timedelta(seconds=1)
+
+def from_epoch(epoch: int):
+    return _EPOCH + timedelta(seconds=epoch)
+
+def format_timestamp(epoch: int):
+    return from_epoch(epoch).strftime(TIMESTAMP_FORMAT)
+
+def month_key(year: int, month: int):
+    """Integer key for a calendar month; consecutive months have consecutive keys."""
+    return year * 12 + month
+
+def month_of_key(key: int):
+    """Returns (year, month) for a month key."""
+    return (key - 1) // 12, (key - 1) % 12 + 1
+
+def month_key_of(date: datetime):
+    return month_key(date.year, date.month)
+
+def current_month_key():
+    return month_key_of(datetime.now())
+
+def month_bounds(key: int):
+    """Returns the half-open epoch interval [start, end) covering a month."""
+    year, month = month_of_key(key)
+    next_year, next_month = month_of_key(key + 1)
+    return _days_from_civil(year, month, 1) * 86400, _days_from_civil(next_year, next_month, 1) * 86400
+
+def month_name(key: int):
+    return calendar.month_name[month_of_key(key)[1]]
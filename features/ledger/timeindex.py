@@ -0,0 +1,194 @@
+import heapq
+import mmap
+import os
+import struct
+from array import array
+from bisect import bisect_left
+from contextlib import contextmanager
+from features.ledger.ledger import fingerprint, load_ledger
+from features.ledger.locking import atomic_write
+from features.profiling.profiler import phase
+
+MAGIC = b"FTTIX001"
+# magic, number of entries, ledger fingerprint
+_HEADER = struct.Struct("<8sQqq")
+# Entries are (epoch, position) pairs sorted by time, then by position
+_ENTRY = struct.Struct("<qq")
+DELETED = -1  # Position of an entry whose row was deleted
+
+
+def timeindex_path(path: str):
+    """Returns the sidecar file that holds the time index for a transactions file."""
+    base, extension = os.path.splitext(path)
+    if extension == ".txt":
+        return base + ".timeindex"
+    return path + ".timeindex"
+
+
+class _Epochs:
+    """Sequence view of the entries' epochs, for bisect."""
+
+    def __init__(self, mapped, count: int):
+        self.mapped = mapped
+        self.count = count
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index: int):
+        return _ENTRY.unpack_from(self.mapped, _HEADER.size + index * _ENTRY.size)[0]
+
+
+class TimeIndex:
+    """Rows of a transactions file in timestamp order.
+
+    The index is a file of (epoch, position) entries sorted by time, where
+    position is the row's byte offset (text) or record number (binary).
+    Date ranges are found by binary search over the mapped entries, so a
+    query only reads the entries inside its range.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.file = timeindex_path(path)
+        self._mapped = None
+        self.count = 0
+        self.fingerprint = None
+
+    def open(self):
+        with open(self.file, "rb") as f:
+            self._mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.count, size, mtime_ns = _HEADER.unpack_from(self._mapped, 0)
+        if magic != MAGIC or len(self._mapped) != _HEADER.size + self.count * _ENTRY.size:
+            raise ValueError(f"{self.file} is not a time index")
+        self.fingerprint = [size, mtime_ns]
+        return self
+
+    def close(self):
+        if self._mapped is not None:
+            self._mapped.close()
+            self._mapped = None
+
+    def range(self, start: int = None, end: int = None):
+        """Returns the entry numbers [low, high) of rows with start <= epoch < end."""
+        epochs = _Epochs(self._mapped, self.count)
+        low = bisect_left(epochs, start) if start is not None else 0
+        high = bisect_left(epochs, end) if end is not None else self.count
+        return low, max(low, high)
+
+    def positions(self, low: int, high: int, reverse: bool = False):
+        """Yields the positions of live rows in entries [low, high)."""
+        mapped, unpack_from, size = self._mapped, _ENTRY.unpack_from, _ENTRY.size
+        for entry in (range(high - 1, low - 1, -1) if reverse else range(low, high)):
+            position = unpack_from(mapped, _HEADER.size + entry * size)[1]
+            if position != DELETED:
+                yield position
+
+
+def _write(path: str, entries: array):
+    """Writes flat (epoch, position) entries, already sorted, as the new index."""
+    file = timeindex_path(path)
+    size, mtime_ns = fingerprint(path)
+    with atomic_write(file) as f:
+        f.write(_HEADER.pack(MAGIC, len(entries) // 2, size, mtime_ns))
+        f.write(entries.tobytes())
+
+def build(path: str):
+    """Rebuilds the time index from a full scan of the transactions file."""
+    with phase("sidecars"):
+        _build(path)
+
+def _build(path: str):
+    ledger = load_ledger(path)
+    timestamps, position = ledger.timestamps, ledger.position
+    # Positions grow with the row number, so a stable sort on time alone
+    # orders ties by position
+    entries = array("q")
+    for row in sorted(range(len(ledger)), key=timestamps.__getitem__):
+        entries.append(timestamps[row])
+        entries.append(position(row))
+    _write(path, entries)
+
+def load_timeindex(path: str):
+    """Opens the time index for a transactions file, rebuilding it if missing or stale.
+
+    Raises FileNotFoundError when the transactions file does not exist.
+    """
+    index = TimeIndex(path)
+    try:
+        index.open()
+    except (FileNotFoundError, ValueError, struct.error):
+        index.close()
+    else:
+        if index.fingerprint == fingerprint(path):
+            return index
+        index.close()
+    build(path)
+    return TimeIndex(path).open()
+
+
+class TimeIndexUpdate:
+    """Changes to the time index, applied when the write finishes."""
+
+    def __init__(self):
+        self.added = []
+        self.removed = []
+
+    def add(self, epochs, positions):
+        self.added.extend(zip(epochs, positions))
+
+    def remove(self, epochs, positions):
+        self.removed.extend(zip(epochs, positions))
+
+
+def _flat(entries):
+    return array("q", [value for entry in entries for value in entry])
+
+@contextmanager
+def timeindex_update(path: str, truncate: bool = False):
+    """Keeps the time index in step with a write to the transactions file.
+
+    Works like rollup.rollup_update, except that the changes are collected
+    and applied once the caller's block finishes. Deleted rows are marked in
+    place. Rows added in time order (the usual case) are appended; anything
+    older is merged in with one rewrite for the whole write, however many
+    batches it had.
+    """
+    count = None
+    if os.path.exists(path) and not truncate:
+        index = load_timeindex(path)
+        count = index.count
+        index.close()
+    update = TimeIndexUpdate()
+    yield update
+    added = sorted(update.added)
+    if count is None:
+        _write(path, _flat(added))
+        return
+
+    file = timeindex_path(path)
+    with open(file, "r+b") as f:
+        with mmap.mmap(f.fileno(), 0) as mapped:
+            epochs = _Epochs(mapped, count)
+            for epoch, position in update.removed:
+                entry = bisect_left(epochs, epoch)
+                while entry < count and epochs[entry] == epoch:
+                    start = _HEADER.size + entry * _ENTRY.size
+                    if _ENTRY.unpack_from(mapped, start)[1] == position:
+                        _ENTRY.pack_into(mapped, start, epoch, DELETED)
+                        break
+                    entry += 1
+            in_order = not count or not added or added[0][0] >= epochs[count - 1]
+            if not in_order:
+                entries = array("q")
+                entries.frombytes(mapped[_HEADER.size:])
+        if in_order:
+            # Append the new entries and refresh the header
+            f.seek(0, os.SEEK_END)
+            f.write(_flat(added).tobytes())
+            f.seek(0)
+            f.write(_HEADER.pack(MAGIC, count + len(added), *fingerprint(path)))
+            return
+
+    live = ((epoch, position) for epoch, position in zip(entries[0::2], entries[1::2]) if position != DELETED)
+    _write(path, _flat(heapq.merge(live, added)))
@@ -0,0 +1,82 @@
+import os
+import re
+from features.ledger import ledger, parallel
+
+LEDGERS_DIR = "ledgers"  # Named ledgers, one directory each; FINANCE_TRACKER_LEDGERS overrides it
+LEDGERS_PER_TASK = 16  # Ledgers a worker handles per task, so small ledgers do not cost a round trip each
+_NAME = re.compile(r"[A-Za-z0-9][A-Za-z0-9._-]*\Z")
+
+
+def ledgers_root():
+    """Returns the directory holding the named ledgers."""
+    return os.environ.get("FINANCE_TRACKER_LEDGERS") or LEDGERS_DIR
+
+def ledger_dir(name: str):
+    """Returns the directory of a named ledger. Raises ValueError for a name that is not a plain file name."""
+    if not _NAME.match(name):
+        raise ValueError(f"Invalid ledger name '{name}'. Use letters, digits, '.', '_' and '-'.")
+    return os.path.join(ledgers_root(), name)
+
+def ledger_names():
+    """Returns the names of every ledger under ledgers_root(), sorted."""
+    root = ledgers_root()
+    try:
+        names = os.listdir(root)
+    except FileNotFoundError:
+        return []
+    return sorted(name for name in names if _NAME.match(name) and os.path.isdir(os.path.join(root, name)))
+
+def create_ledger(name: str):
+    """Creates an empty named ledger and returns its directory. Raises FileExistsError if it exists."""
+    path = ledger_dir(name)
+    os.makedirs(path)
+    return path
+
+def use_ledger(name: str):
+    """Points every command in this process at a named ledger instead of database/.
+
+    Raises ValueError for an invalid name and FileNotFoundError when the
+    ledger does not exist.
+    """
+    path = ledger_dir(name)
+    if not os.path.isdir(path):
+        raise FileNotFoundError(f"No ledger named '{name}' in {ledgers_root()}. Create it with `ledgers create {name}`.")
+    ledger.DATABASE_DIR = path
+
+def _in_ledger(name: str, function, *args):
+    """Runs function(*args) against a named ledger. Returns (result, error message).
+
+    A ledger without transactions (FileNotFoundError) gives (None, None).
+    Scans inside stay in this process, and the ledger parsed is dropped
+    before the next ledger is used.
+    """
+    directory, jobs = ledger.DATABASE_DIR, parallel.jobs()
+    parallel.set_jobs(1)
+    try:
+        use_ledger(name)
+        return function(*args), None
+    except FileNotFoundError:
+        return None, None
+    except Exception as e:
+        return None, str(e) or type(e).__name__
+    finally:
+        ledger.DATABASE_DIR = directory
+        parallel.set_jobs(jobs)
+        ledger.clear_ledger_cache()
+
+def _in_ledgers(names: list, function, *args):
+    """Worker: _in_ledger for each of a task's ledgers."""
+    return [_in_ledger(name, function, *args) for name in names]
+
+def each_ledger(function, *args, names: list = None):
+    """Yields (name, result, error) for function(*args) run against every ledger (or those named), in name order.
+
+    Ledgers are handed LEDGERS_PER_TASK at a time to up to parallel.jobs()
+    worker processes, so function and its arguments must be picklable: a
+    module-level function. See _in_ledger for result and error.
+    """
+    names = ledger_names() if names is None else names
+    tasks = [(names[start:start + LEDGERS_PER_TASK],) for start in range(0, len(names), LEDGERS_PER_TASK)]
+    results = (result for batch in parallel.parallel_map(_in_ledgers, tasks, function, *args) for result in batch)
+    for name, (result, error) in zip(names, results):
+        yield name, result, error
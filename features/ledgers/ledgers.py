@@ -0,0 +1,61 @@
+import typer
+from rich.console import Console
+from features.ledger.storage import ENGINES, set_storage_engine, storage_engine
+from features.ledger.workspaces import create_ledger, each_ledger, ledger_dir, ledgers_root, use_ledger
+from features.output.formats import check_format, page_window, paginate, status_console, write_rows
+
+app = typer.Typer()
+console = Console()
+
+@app.command()
+def list(limit: int = typer.Option(None, help="Show at most this many ledgers (the page size with --page)."),
+         page: int = typer.Option(None, help="Show this page of ledgers, counting from 1."),
+         format: str = typer.Option("table", "--format", "-f", help="Output format: table, plain, csv or jsonl.")):
+    """List the named ledgers and the storage engine each one uses."""
+    out = console
+    try:
+        check_format(format)
+        out = status_console(format, console)
+        limit, offset = page_window(limit, page)
+        rows = paginate(((name, engine if error is None else f"error: {error}", ledger_dir(name))
+                         for name, engine, error in each_ledger(storage_engine)), limit, offset)
+        if format != "table":
+            write_rows(format, ["ledger", "engine", "directory"], rows)
+            return
+
+        from rich.table import Table # Deferred until a table is printed
+        table = Table(title=f"Ledgers in {ledgers_root()}")
+        table.add_column("Ledger", style="cyan", no_wrap=True)
+        table.add_column("Engine")
+        table.add_column("Directory")
+        for row in rows:
+            table.add_row(*row)
+        if not table.row_count:
+            console.print(f"[bold yellow]No ledgers found in {ledgers_root()}.[/bold yellow] Create one with `ledgers create NAME`.")
+            return
+        console.print(table)
+    except Exception as e:
+        out.print(f"[bold red]Error:[/bold red] {e}")
+
+@app.command()
+def create(name: str = typer.Argument(..., help="Name of the new ledger: letters, digits, '.', '_' and '-'."),
+           engine: str = typer.Option(None, help="Storage engine for the ledger (text, binary, sqlite or partitioned). Defaults to text.")):
+    """Create an empty named ledger under ledgers/, for use with --ledger."""
+    if engine is not None and engine not in ENGINES:
+        console.print(f"[bold red]Error:[/bold red] storage engine must be one of: {', '.join(ENGINES)}.")
+        raise typer.Exit(1)
+    try:
+        path = create_ledger(name)
+        if engine:
+            use_ledger(name)
+            set_storage_engine(engine)
+    except FileExistsError:
+        console.print(f"[bold red]Error:[/bold red] A ledger named '{name}' already exists in {ledgers_root()}.")
+        raise typer.Exit(1)
+    except (ValueError, OSError) as e:
+        console.print(f"[bold red]Error:[/bold red] {e}")
+        raise typer.Exit(1)
+    console.print(f"[bold green]Created ledger {name} in {path}.[/bold green] Use it with --ledger {name}.")
+
+if __name__ == "__main__":
+    app()
@@ -0,0 +1,92 @@
+import csv
+import json
+import os
+import sys
+from itertools import islice
+
+# Output formats of listing commands. "table" prints Rich tables; the others
+# stream one line per row to stdout without building renderables:
+#   plain  tab-separated fields, no header, for cut, sort and awk
+#   csv    comma-separated, with a header row
+#   jsonl  one JSON object per line
+# Amounts are written as the decimal strings the tables show (e.g. "12.50").
+FORMATS = ("table", "plain", "csv", "jsonl")
+PAGE_SIZE = 50  # Rows per page when --page is given without --limit
+
+_stderr = None
+
+
+def check_format(format: str):
+    """Raises ValueError unless format is one of FORMATS."""
+    if format not in FORMATS:
+        raise ValueError(f"format must be one of {', '.join(FORMATS)}.")
+
+def page_window(limit: int = None, page: int = None, offset: int = 0):
+    """Returns the (limit, offset) selected by --limit, --page and --offset.
+
+    Pages are limit rows long and numbered from 1, counted after offset.
+    Raises ValueError for values below their minimum.
+    """
+    if limit is not None and limit < 1:
+        raise ValueError("--limit must be at least 1.")
+    if offset < 0:
+        raise ValueError("--offset cannot be negative.")
+    if page is not None:
+        if page < 1:
+            raise ValueError("--page must be at least 1.")
+        limit = limit or PAGE_SIZE
+        offset += (page - 1) * limit
+    return limit, offset
+
+def paginate(rows, limit: int = None, offset: int = 0):
+    """Returns the rows from offset on, at most limit of them."""
+    return islice(rows, offset, None if limit is None else offset + limit)
+
+def money(amount_paisa: int):
+    return f"{amount_paisa / 100:.2f}"
+
+def status_console(format: str, console):
+    """Returns the console for warnings and notes: stderr while stdout carries rows."""
+    global _stderr
+    if format == "table":
+        return console
+    if _stderr is None:
+        from rich.console import Console
+        _stderr = Console(stderr=True)
+    return _stderr
+
+def write_rows(format: str, headers: list, rows, out=None):
+    """Streams rows to out (stdout by default) as plain, csv, jsonl or json. Returns how many were written.
+
+    json is an array with one item per line, which exports write; it is
+    never built in memory. A reader that goes away early (as with | head)
+    ends the output quietly.
+    """
+    count = 0
+    out = out or sys.stdout
+    try:
+        if format == "csv":
+            writer = csv.writer(out, lineterminator="\n")
+            writer.writerow(headers)
+            for row in rows:
+                writer.writerow(row)
+                count += 1
+        elif format == "jsonl":
+            for row in rows:
+                out.write(json.dumps(dict(zip(headers, row))) + "\n")
+                count += 1
+        elif format == "json":
+            out.write("[")
+            for row in rows:
+                out.write(("," if count else "") + "\n    " + json.dumps(dict(zip(headers, row))))
+                count += 1
+            out.write("\n]\n")
+        else:
+            for row in rows:
+                out.write("\t".join("" if value is None else str(value) for value in row) + "\n")
+                count += 1
+        out.flush()
+    except BrokenPipeError:
+        # Point the output at devnull, so flushing it at exit does not fail again
+        os.dup2(os.open(os.devnull, os.O_WRONLY), out.fileno())
+    return count
@@ -0,0 +1,135 @@
+import time
+from contextlib import contextmanager, nullcontext
+
+# Phases and counters recorded while a command runs with --profile.
+#
+# The storage, aggregation and rendering paths shared by every command
+# wrap their work in phase() and report what they handled with count():
+#   read       files or database rows brought into memory (bytes_read)
+#   parse      ledger lines turned into columns (rows_parsed, malformed_skipped)
+#   aggregate  monthly totals, metrics and trends
+#   sidecars   rebuilds of the rollup and indexes
+#   write      rows added, deleted or rewritten (rows_written)
+#   daemon     queries answered by a running daemon
+#   render     Rich output
+# Row streams count the rows their date, type or category filters leave out
+# as rows_filtered; they record no phase, as their work is interleaved with
+# the caller's. Phases nest, and each is reported under its parents
+# ("aggregate > read") with inclusive times. While no profile is active
+# both calls do nothing.
+
+_active = None  # The Profile being recorded, if any
+_NULL = nullcontext()
+
+
+class Profile:
+    """Wall and CPU time per phase, plus counters, for one command."""
+
+    def __init__(self, command: str):
+        self.command = command
+        self.phases = {}  # path -> [calls, wall seconds, CPU seconds]
+        self.counters = {}
+        self._stack = []
+        self._started = (time.perf_counter(), time.process_time())
+        self.wall = self.cpu = None
+
+    @contextmanager
+    def phase(self, name: str):
+        self._stack.append(name)
+        # Entered before it runs, so a phase is listed ahead of those inside it
+        entry = self.phases.setdefault(" > ".join(self._stack), [0, 0.0, 0.0])
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            entry[0] += 1
+            entry[1] += time.perf_counter() - wall
+            entry[2] += time.process_time() - cpu
+            self._stack.pop()
+
+    def stop(self):
+        self.wall = time.perf_counter() - self._started[0]
+        self.cpu = time.process_time() - self._started[1]
+
+    def to_dict(self):
+        return {
+            "command": self.command,
+            "wall_ms": round(self.wall * 1000, 3),
+            "cpu_ms": round(self.cpu * 1000, 3),
+            "phases": [
+                {"phase": path, "calls": calls, "wall_ms": round(wall * 1000, 3), "cpu_ms": round(cpu * 1000, 3)}
+                for path, (calls, wall, cpu) in self.phases.items()
+            ],
+            "counters": dict(self.counters),
+        }
+
+
+def phase(name: str):
+    """Times a block as the named phase of the active profile."""
+    return _active.phase(name) if _active is not None else _NULL
+
+def count(name: str, amount: int = 1):
+    """Adds to a counter of the active profile."""
+    if _active is not None:
+        _active.counters[name] = _active.counters.get(name, 0) + amount
+
+def start(command: str, cprofile: str = None):
+    """Starts recording a profile and returns a function that stops it and returns the Profile.
+
+    With cprofile set, a cProfile of the whole command is written to that
+    path as well. Rich output is timed as the render phase.
+    """
+    global _active
+    from rich.console import Console
+
+    profile = _active = Profile(command)
+    print = Console.print
+
+    def timed_print(self, *args, **kwargs):
+        with phase("render"):
+            return print(self, *args, **kwargs)
+
+    Console.print = timed_print
+    profiler = None
+    if cprofile:
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+
+    def stop():
+        global _active
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(cprofile)
+        Console.print = print
+        _active = None
+        profile.stop()
+        return profile
+
+    return stop
+
+def print_summary(profile: Profile):
+    """Prints the phases and counters as tables on stderr, so the command's own output stays clean."""
+    from rich.console import Console
+    from rich.table import Table
+
+    console = Console(stderr=True)
+    table = Table(title=f"Profile: {profile.command}")
+    table.add_column("Phase")
+    table.add_column("Calls", justify="right")
+    table.add_column("Wall (ms)", justify="right")
+    table.add_column("CPU (ms)", justify="right")
+    table.add_column("Share", justify="right")
+    for path, (calls, wall, cpu) in profile.phases.items():
+        depth = path.count(" > ")
+        table.add_row("  " * depth + path.rsplit(" > ", 1)[-1], str(calls), f"{wall * 1000:.1f}", f"{cpu * 1000:.1f}",
+                      f"{wall / profile.wall * 100:.0f}%" if profile.wall else "-")
+    table.add_row("[bold]Total[/bold]", "", f"[bold]{profile.wall * 1000:.1f}[/bold]", f"[bold]{profile.cpu * 1000:.1f}[/bold]", "")
+    console.print(table)
+    if profile.counters:
+        counters = Table(title="Counters")
+        counters.add_column("Counter")
+        counters.add_column("Value", justify="right")
+        for name, value in profile.counters.items():
+            counters.add_row(name, f"{value:,}")
+        console.print(counters)
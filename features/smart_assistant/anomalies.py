@@ -0,0 +1,220 @@
+import json
+import math
+import os
+from bisect import insort
+from contextlib import contextmanager
+from operator import itemgetter
+from features.ledger.ledger import Ledger, database_path
+from features.ledger.locking import atomic_write, locked
+from features.output.formats import money
+from features.profiling.profiler import phase
+
+MIN_HISTORY = 10  # Transactions a category needs before its amounts are judged
+Z_LIMIT = 3.5  # Standard deviations above the category mean that make an amount unusual
+SPIKE_RATIO = 5.0  # Multiple of the category's recent level that makes an amount a spike
+RECENT_WEIGHT = 0.05  # Weight of each new amount in the recent level (an exponential moving average)
+MIN_SPREAD = 0.1  # Smallest spread assumed, as a fraction of the mean, so fixed amounts like rent are not flagged for every change
+MAX_FLAGGED = 1000  # Unusual transactions kept for the anomalies command, the most recently dated
+
+
+def stats_path():
+    """Returns the file holding the per-category statistics and the transactions they flagged."""
+    return database_path("anomalies.json")
+
+
+class AnomalyDetector:
+    """Flags transactions whose amount is far from their category's usual amounts.
+
+    Each (type, category) keeps streaming statistics: a count, mean and sum
+    of squared deviations updated with Welford's method, and a recent level
+    that follows the latest amounts. A transaction is unusual when it lies
+    Z_LIMIT standard deviations or more from the mean, or is a spike of
+    SPIKE_RATIO times the recent level. check() scores each written row
+    against the statistics of the rows before it and then adds it, in O(1)
+    per row, and delete() takes removed rows back out of the count, mean
+    and deviations (the recent level keeps them).
+
+    Writers load, update and save the statistics while holding the
+    ledger's write lock (see Storage.append's observers, writing() and
+    delete()), and save them with the fingerprint of the transactions they
+    describe. Any other change to the transactions (a replace, a
+    compaction, or a write with the check turned off) leaves the
+    fingerprint behind, and the next load() rebuilds the statistics by
+    replaying the history.
+    """
+
+    def __init__(self, storage):
+        self.storage = storage
+        self.stats = {}  # {type: {category: [count, mean, m2, recent]}}
+        self.flagged = []  # Unusual transactions found, in timestamp order
+        self.found = []  # Those check() found in this run
+
+    def read(self):
+        """Reads the saved statistics. Returns False, reading nothing, if they are missing or stale."""
+        try:
+            with open(stats_path(), "r") as f:
+                data = json.load(f)
+            if data["fingerprint"] == self.storage.data_fingerprint():
+                self.stats, self.flagged = data["stats"], data["flagged"]
+                return True
+        except (FileNotFoundError, ValueError, KeyError, TypeError):
+            pass
+        return False
+
+    def load(self):
+        """Reads the saved statistics, rebuilding them with a scan of the history if missing or stale."""
+        if not self.read():
+            self.build()
+        return self
+
+    def build(self):
+        """Replays every stored transaction in order, as if each were checked as it was written."""
+        self.stats, self.flagged = {}, []
+        if not os.path.isdir(os.path.dirname(stats_path()) or "."):
+            return  # No database directory, so no transactions
+        # Writers wait until the statistics are saved with the fingerprint of what was scanned
+        with locked(self.storage.path, shared=True), phase("sidecars"):
+            fingerprint = self.storage.data_fingerprint()
+            try:
+                for row in self.storage.iter_rows():
+                    self._add(row)
+            except FileNotFoundError:
+                pass  # No transactions yet
+            del self.flagged[:-MAX_FLAGGED]
+            self.save(fingerprint)
+
+    def save(self, fingerprint: dict = None):
+        """Writes the statistics, by default with the transactions' current fingerprint."""
+        path = stats_path()
+        if not os.path.isdir(os.path.dirname(path) or "."):
+            return
+        if fingerprint is None:
+            fingerprint = self.storage.data_fingerprint()
+        data = {"fingerprint": fingerprint, "stats": self.stats, "flagged": self.flagged}
+        with atomic_write(path, "w") as f:
+            json.dump(data, f)
+
+    def before_write(self):
+        """Storage.append observer: loads the statistics under the write lock."""
+        self.load()
+
+    def after_write(self, rows: Ledger):
+        """Storage.append observer: checks the rows just written and saves the statistics, still under the lock."""
+        self.check(rows)
+        self.save()
+
+    @contextmanager
+    def writing(self):
+        """Holds the write lock across a batch of writes: loads the statistics first and saves them once the block finishes.
+
+        Enter it before the storage's batch, so the statistics are saved
+        after the batch has finished its own files. If the block raises,
+        nothing is saved and the statistics are rebuilt when next loaded.
+        """
+        with self.storage.write_locked():
+            self.load()
+            yield self
+            self.save()
+
+    def check(self, rows: Ledger):
+        """Scores written rows against the statistics, then adds them."""
+        for index in range(len(rows.amounts)):
+            anomaly = self._add(rows.row(index))
+            if anomaly:
+                self.found.append(anomaly)
+        del self.flagged[:-MAX_FLAGGED]
+
+    def delete(self, *prefixes: str):
+        """Deletes transactions as Storage.delete does, taking them out of the statistics if those are current."""
+        with self.storage.write_locked():
+            current = self.read()
+            removed = self.storage.delete(*prefixes)
+            if current:
+                self.remove(removed)
+                self.save()
+        return removed
+
+    def remove(self, rows: Ledger):
+        """Takes deleted rows out of the statistics, reversing Welford's update, and drops their flags."""
+        ids = set()
+        for index in range(len(rows.amounts)):
+            id, _, type, category, amount, _ = rows.row(index)
+            ids.add(id)
+            categories = self.stats.get(type, {})
+            stats = categories.get(category)
+            if stats is None:
+                continue
+            count, mean, m2, recent = stats
+            if count <= 1:
+                del categories[category]
+                if not categories:
+                    del self.stats[type]
+                continue
+            count -= 1
+            previous = mean - (amount - mean) / count
+            stats[0], stats[1], stats[2] = count, previous, max(0.0, m2 - (amount - mean) * (amount - previous))
+        self.flagged = [anomaly for anomaly in self.flagged if anomaly["id"] not in ids]
+
+    def _add(self, row):
+        """Scores one (id, timestamp, type, category, amount_paisa, description) row and adds it. Returns its anomaly, if any."""
+        id, timestamp, type, category, amount, description = row
+        stats = self.stats.setdefault(type, {}).get(category)
+        if stats is None:
+            self.stats[type][category] = [1, float(amount), 0.0, float(amount)]
+            return None
+        anomaly = score(stats, amount)
+        count, mean, m2, recent = stats
+        count += 1
+        delta = amount - mean
+        mean += delta / count
+        stats[0], stats[1], stats[2], stats[3] = count, mean, m2 + delta * (amount - mean), recent + RECENT_WEIGHT * (amount - recent)
+        if anomaly is None:
+            return None
+        reason, value, usual = anomaly
+        anomaly = {
+            "id": id,
+            "timestamp": timestamp,
+            "type": type,
+            "category": category,
+            "amount": money(amount),
+            "usual": money(round(usual)),
+            "reason": reason,
+            "score": round(value, 2),
+            "description": description,
+        }
+        # Backdated rows are flagged in date order, so the list stays sorted by timestamp
+        insort(self.flagged, anomaly, key=itemgetter("timestamp"))
+        return anomaly
+
+    def report(self, console, limit: int = 10):
+        """Prints the unusual transactions check() found, at most limit of them."""
+        for anomaly in self.found[:limit]:
+            console.print(f"[bold yellow]Unusual transaction:[/bold yellow] {anomaly['category']} {anomaly['type']} of "
+                          f"{anomaly['amount']} is {describe(anomaly)}.")
+        if len(self.found) > limit:
+            console.print(f"  ... and {len(self.found) - limit} more unusual transactions.")
+
+
+def score(stats: list, amount: int):
+    """Returns (reason, score, usual amount) if amount is unusual for a category's [count, mean, m2, recent], else None.
+
+    reason is "outlier" (score: standard deviations above the mean) or
+    "spike" (score: multiple of the recent level). Amounts below the usual
+    ones are not flagged: a small payment is seldom worth a warning.
+    """
+    count, mean, m2, recent = stats
+    if count < MIN_HISTORY:
+        return None
+    spread = max(math.sqrt(m2 / (count - 1)), abs(mean) * MIN_SPREAD, 1.0)
+    deviations = (amount - mean) / spread
+    if deviations >= Z_LIMIT:
+        return "outlier", deviations, mean
+    if recent > 0 and amount >= recent * SPIKE_RATIO:
+        return "spike", amount / recent, recent
+    return None
+
+def describe(anomaly: dict):
+    """Says why a flagged transaction is unusual, e.g. "4.2 standard deviations above the usual 1500.00"."""
+    if anomaly["reason"] == "spike":
+        return f"{anomaly['score']:.1f} times its recent level of {anomaly['usual']}"
+    return f"{anomaly['score']:.1f} standard deviations above the usual {anomaly['usual']}"
@@ -1,55 +1,28 @@
 import typer
 from rich.console import Console
-from rich.table import Table
 from datetime import datetime, timedelta
-import calendar
+from features.analytics.metrics import month_metrics, total_score
+from features.ledger.storage import get_storage
+from features.ledger.timecodec import current_month_key
+from features.output.formats import check_format, page_window, paginate, status_console, write_rows
+from features.smart_assistant.anomalies import AnomalyDetector, describe
 
 app = typer.Typer()
 console = Console()
 
-def get_month_range(date: datetime):
-    first_day = date.replace(day=1)
-    last_day = date.replace(day=calendar.monthrange(date.year, date.month)[1])
-    return first_day, last_day
+ANOMALY_FIELDS = ["id", "timestamp", "type", "category", "amount", "usual", "reason", "score", "description"]
 
 @app.command()
 def recommend():
     """Provides intelligent financial recommendations."""
     try:
         # --- Data Aggregation ---
-        total_income_paisa = 0
-        total_expense_paisa = 0
-        current_month_expenses_by_category_paisa = {}
-        budgets_data_paisa = {}
-
-        now = datetime.now()
-        current_month_start, current_month_end = get_month_range(now)
-
-        # Read transactions
-        with open("database/transactions.txt", "r") as f:
-            for line in f:
-                try:
-                    _, timestamp_str, type, category, amount_paisa_str, _ = line.strip().split(",", 5)
-                    transaction_date = datetime.strptime(timestamp_str, "%Y-%m-%d %H:%M:%S")
-                    amount_paisa = int(amount_paisa_str)
-
-                    if current_month_start <= transaction_date <= current_month_end:
-                        if type == "income":
-                            total_income_paisa += amount_paisa
-                        else:
-                            total_expense_paisa += amount_paisa
-                            current_month_expenses_by_category_paisa[category] = current_month_expenses_by_category_paisa.get(category, 0) + amount_paisa
-                except ValueError:
-                    pass # Skip malformed lines
-
-        # Read budgets
-        try:
-            with open("database/budgets.txt", "r") as f:
-                for line in f:
-                    category, budget_paisa_str = line.strip().split(",")
-                    budgets_data_paisa[category] = int(budget_paisa_str)
-        except FileNotFoundError:
-            pass # No budgets set
+        # The same cached month metrics that analytics reports use
+        metrics = month_metrics(current_month_key())
+        total_income_paisa = metrics["income"]
+        total_expense_paisa = metrics["expense"]
+        current_month_expenses_by_category_paisa = metrics["expenses_by_category"]
+        budgets_data_paisa = metrics["budgets"] or {} # No budgets set
 
         console.print("[bold green]--- Financial Recommendations ---[/bold green]")
 
@@ -118,24 +91,7 @@ def recommend():
         # --- Financial Health Tips (Simplified based on previous health score logic) ---
         console.print("\n[bold blue]4. Financial Health Tips:[/bold blue]")
         if total_income_paisa > 0:
-            # Simplified score logic from analytics, just for interpretation
-            savings_rate_score = 0
-            if total_income_paisa > 0:
-                net_balance_paisa = total_income_paisa - total_expense_paisa
-                savings_rate = (net_balance_paisa / total_income_paisa) * 100
-                if savings_rate >= 20: savings_rate_score = 30
-                elif savings_rate > 0: savings_rate_score = int(savings_rate / 20 * 30)
-
-            budget_adherence_score = 25
-            for category, budget_paisa in budgets_data_paisa.items():
-                spent_paisa = current_month_expenses_by_category_paisa.get(category, 0)
-                if budget_paisa > 0 and spent_paisa > budget_paisa:
-                    budget_adherence_score = 0
-                    break
-            
-            income_vs_expense_score = 25 if total_income_paisa > total_expense_paisa else 0
-
-            overall_score = savings_rate_score + budget_adherence_score + income_vs_expense_score + 10 # Placeholder for debt
+            overall_score = total_score(metrics)
 
             if overall_score < 50:
                 console.print("   [red]Your financial health needs attention.[/red] Focus on reducing expenses and increasing savings.")
@@ -149,11 +105,67 @@ def recommend():
         else:
             console.print("   No income recorded this month. Focus on increasing your income streams.")
 
+        # --- Unusual Transactions ---
+        console.print("\n[bold blue]5. Unusual Transactions:[/bold blue]")
+        this_month = datetime.now().strftime("%Y-%m")
+        unusual = [anomaly for anomaly in AnomalyDetector(get_storage()).load().flagged if anomaly["timestamp"].startswith(this_month)]
+        if unusual:
+            console.print("[yellow]   These transactions this month stand out from your usual spending:[/yellow]")
+            for anomaly in unusual[-3:][::-1]:
+                console.print(f"   - {anomaly['category']}: {anomaly['amount']} on {anomaly['timestamp'][:10]} is {describe(anomaly)}.")
+            console.print("   [tip]Tip: Check that these are expected; see `smart-assistant anomalies` for the full list.[/tip]")
+        else:
+            console.print("[green]   Nothing unusual this month.[/green]")
+
 
     except FileNotFoundError:
         console.print("[bold yellow]No financial data found. Please add transactions and budgets to get recommendations.[/bold yellow]")
     except Exception as e:
         console.print(f"[bold red]Error:[/bold red] {e}")
 
+@app.command()
+def anomalies(last_days: int = typer.Option(None, help="Show unusual transactions from the last N days."),
+              category: str = typer.Option(None, help="Show only this category."),
+              limit: int = typer.Option(None, help="Show at most this many transactions (the page size with --page)."),
+              page: int = typer.Option(None, help="Show this page of transactions, counting from 1."),
+              format: str = typer.Option("table", "--format", "-f", help="Output format: table, plain, csv or jsonl.")):
+    """List transactions far outside their category's usual amounts, newest first."""
+    out = console
+    try:
+        check_format(format)
+        out = status_console(format, console)
+        limit, offset = page_window(limit, page)
+        cutoff = None
+        if last_days:
+            cutoff = (datetime.now() - timedelta(days=last_days)).strftime("%Y-%m-%d %H:%M:%S")
+        # Flagged as the rows were written, so listing them reads no transactions
+        flagged = AnomalyDetector(get_storage()).load().flagged
+        rows = paginate(([anomaly[field] for field in ANOMALY_FIELDS] for anomaly in reversed(flagged)
+                         if (cutoff is None or anomaly["timestamp"] > cutoff)
+                         and (category is None or anomaly["category"] == category)), limit, offset)
+        if format != "table":
+            write_rows(format, ANOMALY_FIELDS, rows)
+            return
+
+        from rich.table import Table # Deferred until a table is printed
+        table = Table(title="Unusual Transactions" if page is None else f"Unusual Transactions (Page {page})")
+        table.add_column("ID")
+        table.add_column("Timestamp")
+        table.add_column("Category", style="cyan")
+        table.add_column("Amount", justify="right")
+        table.add_column("Why")
+        table.add_column("Description")
+        for row in rows:
+            anomaly = dict(zip(ANOMALY_FIELDS, row))
+            color = "green" if anomaly["type"] == "income" else "red"
+            table.add_row(anomaly["id"], anomaly["timestamp"], anomaly["category"],
+                          f"[{color}]{anomaly['amount']}[/{color}]", describe(anomaly), anomaly["description"])
+        if not table.row_count:
+            console.print("[bold green]No unusual transactions found.[/bold green]")
+            return
+        console.print(table)
+    except Exception as e:
+        out.print(f"[bold red]Error:[/bold red] {e}")
+
 if __name__ == "__main__":
     app()
\ No newline at end of file
@@ -1,47 +1,207 @@
 import typer
 from rich.console import Console
-from rich.table import Table
+from contextlib import nullcontext
 from datetime import datetime
-import questionary
-import uuid
+from typing import List
+import csv
+import json
+import sys
+from features.ledger.storage import get_storage
+from features.ledger.timecodec import current_month_key, to_epoch
+from features.output.formats import check_format, money, page_window, status_console, write_rows
+from features.transactions.validation import transaction_line
 
 app = typer.Typer()
 console = Console()
 
+ALERTS_HELP = "Alert when an expense takes its category past 70% or 100% of its budget."
+ANOMALIES_HELP = "Flag amounts far outside their category's usual range, or sudden spikes."
+
 @app.command()
-def add(type: str, category: str, amount: float, description: str, date: str = typer.Option(None, help="Date of the transaction in YYYY-MM-DD format.")):
+def add(type: str, category: str, amount: float, description: str, date: str = typer.Option(None, help="Date of the transaction in YYYY-MM-DD format."),
+        fsync: bool = typer.Option(False, help="Sync the transaction to disk before returning; concurrent adds share one sync."),
+        alerts: bool = typer.Option(True, "--alerts/--no-alerts", help=ALERTS_HELP),
+        anomalies: bool = typer.Option(True, "--anomalies/--no-anomalies", help=ANOMALIES_HELP)):
     """Add a new transaction (income or expense)."""
-    if amount <= 0:
-        console.print("[bold red]Error:[/bold red] Amount must be positive.")
+    try:
+        line = transaction_line(type, category, amount, description, date)
+    except ValueError as e:
+        console.print(f"[bold red]Error:[/bold red] {e}")
         raise typer.Exit()
 
     try:
-        with open("database/transactions.txt", "a") as f:
-            transaction_id = uuid.uuid4()
-            if date:
-                try:
-                    timestamp = datetime.strptime(date, "%Y-%m-%d").strftime("%Y-%m-%d %H:%M:%S")
-                except ValueError:
-                    console.print("[bold red]Error:[/bold red] Invalid date format. Please use YYYY-MM-DD.")
-                    raise typer.Exit()
-            else:
-                timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            
-            amount_paisa = int(amount * 100)
-            f.write(f"{transaction_id},{timestamp},{type},{category},{amount_paisa},{description}\n")
+        # Local: the checks read the ledger while the append holds the write
+        # lock, which the daemon would wait on
+        storage = get_storage(daemon=False)
+        budget_alerts = detector = None
+        # Alerts and anomalies are imported only when asked for, to keep startup short
+        if alerts:
+            from features.budgets.alerts import BudgetAlerts
+            budget_alerts = BudgetAlerts(storage)
+        if anomalies:
+            from features.smart_assistant.anomalies import AnomalyDetector
+            detector = AnomalyDetector(storage)
+        # Both check the row while the append holds the write lock
+        storage.append(line, fsync, observers=[observer for observer in (budget_alerts, detector) if observer])
         console.print(f"Added {type}: {description} ({amount:.2f})")
+        if budget_alerts:
+            budget_alerts.report(console)
+        if detector:
+            detector.report(console)
     except Exception as e:
         console.print(f"[bold red]Error:[/bold red] {e}")
 
+BATCH_FIELDS = ("type", "category", "amount", "description")
+LIST_FIELDS = ["id", "timestamp", "type", "category", "amount", "description"]
+
+def read_batch(f, format: str):
+    """Yields (line number, record) for each row of a CSV (with header) or JSON Lines stream."""
+    if format == "csv":
+        reader = csv.DictReader(f)
+        for record in reader:
+            yield reader.line_num, record
+        return
+    for number, line in enumerate(f, 1):
+        if not line.strip():
+            continue
+        try:
+            yield number, json.loads(line)
+        except ValueError:
+            yield number, line.rstrip("\n")
+
+def batch_line(record, timestamp: str):
+    """Validates one batch record like add does and returns its ledger line."""
+    if not isinstance(record, dict):
+        raise ValueError("Not a JSON object.")
+    for field in BATCH_FIELDS:
+        if record.get(field) is None:
+            raise ValueError(f"Missing {field}.")
+    try:
+        amount = float(record["amount"])
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid amount: {record['amount']!r}.") from None
+    return transaction_line(str(record["type"]), str(record["category"]), amount,
+                            str(record["description"]), record.get("date") or None, timestamp)
+
+@app.command()
+def add_batch(
+    source: str = typer.Argument("-", help="CSV or JSON Lines file to read, or - for stdin."),
+    format: str = typer.Option(None, "--format", "-f", help="Input format (csv or jsonl). Defaults to the file extension, or csv for stdin."),
+    commit_every: int = typer.Option(10000, help="Rows written per group commit."),
+    fsync: bool = typer.Option(False, help="Sync every group commit to disk."),
+    errors: str = typer.Option(None, help="Write rejected rows and their errors to this JSON Lines file."),
+    alerts: bool = typer.Option(True, "--alerts/--no-alerts", help=ALERTS_HELP),
+    anomalies: bool = typer.Option(True, "--anomalies/--no-anomalies", help=ANOMALIES_HELP)
+):
+    """Add many transactions from CSV or JSON Lines (fields: type, category, amount, description and optional date)."""
+    if format is None:
+        format = "jsonl" if source.endswith((".jsonl", ".json")) else "csv"
+    if format not in ["csv", "jsonl"]:
+        console.print("[bold red]Error:[/bold red] format must be 'csv' or 'jsonl'.")
+        raise typer.Exit(1)
+    if commit_every <= 0:
+        console.print("[bold red]Error:[/bold red] --commit-every must be positive.")
+        raise typer.Exit(1)
+
+    # Rows without a date are stamped with the time the batch started
+    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    added, rejected = 0, []
+    budget_alerts = detector = None
+    try:
+        # Local: the checks read the ledger while the batch holds the write lock
+        storage = get_storage(daemon=False)
+        if alerts:
+            from features.budgets.alerts import BudgetAlerts
+            budget_alerts = BudgetAlerts(storage)
+        if anomalies:
+            from features.smart_assistant.anomalies import AnomalyDetector
+            detector = AnomalyDetector(storage)
+
+        def commit_lines(lines):
+            rows = commit("".join(lines))
+            if budget_alerts:
+                budget_alerts.check(rows)
+            if detector:
+                detector.check(rows)
+            return len(rows)
+
+        with (nullcontext(sys.stdin) if source == "-" else open(source, "r", newline="")) as f, \
+                (detector.writing() if detector else nullcontext()), storage.batch(fsync) as commit:
+            lines = []
+            for number, record in read_batch(f, format):
+                try:
+                    lines.append(batch_line(record, timestamp))
+                except ValueError as e:
+                    rejected.append((number, record, str(e)))
+                if len(lines) >= commit_every:
+                    added += commit_lines(lines)
+                    lines = []
+            if lines:
+                added += commit_lines(lines)
+    except FileNotFoundError:
+        console.print(f"[bold red]Error:[/bold red] Input file not found: {source}")
+        raise typer.Exit(1)
+    except Exception as e:
+        console.print(f"[bold red]Error:[/bold red] {e}")
+        console.print(f"{added} transactions were added before the error.")
+        raise typer.Exit(1)
+
+    console.print(f"[bold green]Added {added} transactions.[/bold green]")
+    if budget_alerts:
+        budget_alerts.report(console)
+    if detector:
+        detector.report(console)
+    if rejected:
+        console.print(f"[bold yellow]Rejected {len(rejected)} rows:[/bold yellow]")
+        for number, _, error in rejected[:10]:
+            console.print(f"  Line {number}: {error}", markup=False)
+        if len(rejected) > 10:
+            console.print(f"  ... and {len(rejected) - 10} more.")
+        if errors:
+            with open(errors, "w") as f:
+                for number, record, error in rejected:
+                    f.write(json.dumps({"line": number, "error": error, "record": record}) + "\n")
+            console.print(f"Rejected rows written to {errors}")
+
 @app.command()
 def list(last_days: int = typer.Option(None, help="List transactions from the last N days."),
-         type_filter: str = typer.Option(None, help="Filter by transaction type (income or expense).")):
-    """List all transactions."""
+         type_filter: str = typer.Option(None, help="Filter by transaction type (income or expense)."),
+         date_from: str = typer.Option(None, "--from", help="List transactions on or after this date (YYYY-MM-DD)."),
+         date_to: str = typer.Option(None, "--to", help="List transactions on or before this date (YYYY-MM-DD)."),
+         limit: int = typer.Option(None, help="Show at most this many transactions (the page size with --page)."),
+         page: int = typer.Option(None, help="Show this page of transactions, counting from 1."),
+         offset: int = typer.Option(0, help="Skip this many of the newest matching transactions."),
+         format: str = typer.Option("table", "--format", "-f", help="Output format: table, plain, csv or jsonl.")):
+    """List all transactions, newest first."""
+    out = console
     try:
-        with open("database/transactions.txt", "r") as f:
-            lines = f.readlines()
+        check_format(format)
+        out = status_console(format, console)
+        limit, offset = page_window(limit, page, offset)
+        start = end = None
+        if last_days:
+            # Rows from the last N days lie in the half-open interval (cutoff, now]
+            start = to_epoch(datetime.now()) - (last_days + 1) * 86400 + 1
+        try:
+            if date_from:
+                from_epoch = to_epoch(datetime.strptime(date_from, "%Y-%m-%d"))
+                start = from_epoch if start is None else max(start, from_epoch)
+            if date_to:
+                end = to_epoch(datetime.strptime(date_to, "%Y-%m-%d")) + 86400
+        except ValueError:
+            out.print("[bold red]Error:[/bold red] Invalid date format. Please use YYYY-MM-DD.")
+            raise typer.Exit()
 
-        table = Table(title="Transactions")
+        # The storage resolves the date range and walks it newest first,
+        # so only the rows that are shown get read
+        rows = get_storage().latest(start, end, type_filter, limit, offset)
+        if format != "table":
+            write_rows(format, LIST_FIELDS, ((id, timestamp, type, category, money(amount_paisa), description)
+                                             for id, timestamp, type, category, amount_paisa, description in rows))
+            return
+
+        from rich.table import Table # Deferred: only listing needs it
+        table = Table(title="Transactions" if page is None else f"Transactions (Page {page})")
         table.add_column("ID")
         table.add_column("Timestamp")
         table.add_column("Type")
@@ -49,71 +209,58 @@ def list(last_days: int = typer.Option(None, help="List transactions from the la
         table.add_column("Amount")
         table.add_column("Description")
 
-        transactions = []
-        for line in lines:
-            id, timestamp, type, category, amount_paisa, description = line.strip().split(",")
-            transactions.append((id, timestamp, type, category, int(amount_paisa), description))
-
-        # Sort by date
-        transactions.sort(key=lambda t: t[1], reverse=True)
-
-        now = datetime.now()
-
-        for id, timestamp, type, category, amount_paisa, description in transactions:
-            
-            # Filtering
-            if last_days:
-                transaction_date = datetime.strptime(timestamp, "%Y-%m-%d %H:%M:%S")
-                if (now - transaction_date).days > last_days:
-                    continue
-            
-            if type_filter and type_filter.lower() != type.lower():
-                continue
-
+        for id, timestamp, type, category, amount_paisa, description in rows:
             amount = amount_paisa / 100
             color = "green" if type == "income" else "red"
             table.add_row(id, timestamp, type, category, f"[{color}]{amount:.2f}[/{color}]", description)
         
         console.print(table)
     except FileNotFoundError:
-        console.print("[bold yellow]No transactions found.[/bold yellow]")
+        out.print("[bold yellow]No transactions found.[/bold yellow]")
+    except typer.Exit:
+        raise
     except Exception as e:
-        console.print(f"[bold red]Error:[/bold red] {e}")
+        out.print(f"[bold red]Error:[/bold red] {e}")
 
 @app.command()
-def delete(transaction_id: str):
-    """Delete a transaction by its ID."""
+def delete(transaction_ids: List[str] = typer.Argument(..., help="IDs (or ID prefixes) of the transactions to delete."),
+           yes: bool = typer.Option(False, "--yes", "-y", help="Delete without asking for confirmation.")):
+    """Delete one or more transactions by ID."""
     try:
-        with open("database/transactions.txt", "r") as f:
-            lines = f.readlines()
-
-        transaction_to_delete = None
-        for line in lines:
-            if line.startswith(transaction_id):
-                transaction_to_delete = line
-                break
+        storage = get_storage()
+        found = []
+        for transaction_id in transaction_ids:
+            rows = storage.find(transaction_id)
+            if not rows:
+                console.print(f"[bold yellow]Transaction {transaction_id} not found.[/bold yellow]")
+                continue
+            found.append(transaction_id)
+            _, timestamp, type, category, amount_paisa, description = rows[0]
+            console.print(f"ID: {transaction_id}\n"
+                          f"Timestamp: {timestamp}\n"
+                          f"Type: {type}\n"
+                          f"Category: {category}\n"
+                          f"Amount: {amount_paisa / 100:.2f}\n"
+                          f"Description: {description}\n")
 
-        if transaction_to_delete is None:
-            console.print(f"[bold yellow]Transaction {transaction_id} not found.[/bold yellow]")
+        if not found:
             return
 
-        _, timestamp, type, category, amount_paisa, description = transaction_to_delete.strip().split(',')
-        amount = int(amount_paisa) / 100
-        
-        confirm = questionary.confirm(f"Are you sure you want to delete this transaction?\n"
-                                      f"ID: {transaction_id}\n"
-                                      f"Timestamp: {timestamp}\n"
-                                      f"Type: {type}\n"
-                                      f"Category: {category}\n"
-                                      f"Amount: {amount:.2f}\n"
-                                      f"Description: {description}").ask()
+        confirm = yes
+        if not confirm:
+            what = "this transaction" if len(found) == 1 else f"these {len(found)} transactions"
+            import questionary # Deferred: prompt_toolkit is slow to import
+            confirm = questionary.confirm(f"Are you sure you want to delete {what}?").ask()
 
         if confirm:
-            with open("database/transactions.txt", "w") as f:
-                for line in lines:
-                    if not line.startswith(transaction_id):
-                        f.write(line)
-            console.print(f"Deleted transaction {transaction_id}")
+            # A single delete call, so the whole batch is one append of tombstones
+            # Through the anomaly detector, which takes the rows out of its statistics
+            from features.smart_assistant.anomalies import AnomalyDetector
+            removed = AnomalyDetector(storage).delete(*found)
+            for transaction_id in found:
+                # An imported ID may have been stored more than once; every copy goes
+                copies = sum(1 for row in range(len(removed)) if removed.id(row).startswith(transaction_id))
+                console.print(f"Deleted transaction {transaction_id}" + (f" ({copies} rows)" if copies > 1 else ""))
         else:
             console.print("Deletion cancelled.")
 
@@ -129,22 +276,16 @@ if __name__ == "__main__":
 def balance():
     """Display the current balance for the current month."""
     try:
-        with open("database/transactions.txt", "r") as f:
-            lines = f.readlines()
+        totals = get_storage().month_totals(current_month_key())
 
         total_income = 0
         total_expense = 0
-        now = datetime.now()
-
-        for line in lines:
-            _, timestamp, type, _, amount_paisa, _ = line.strip().split(",")
-            transaction_date = datetime.strptime(timestamp, "%Y-%m-%d %H:%M:%S")
 
-            if transaction_date.year == now.year and transaction_date.month == now.month:
-                if type == "income":
-                    total_income += int(amount_paisa)
-                else:
-                    total_expense += int(amount_paisa)
+        for type, categories in totals.items():
+            if type == "income":
+                total_income += sum(categories.values())
+            else:
+                total_expense += sum(categories.values())
 
         balance = total_income - total_expense
         
@@ -0,0 +1,84 @@
+import math
+import os
+from datetime import datetime
+from functools import lru_cache
+from features.ledger.ledger import TOMBSTONE
+from features.ledger.timecodec import parse_timestamp_key
+
+def new_id():
+    """Returns a random (version 4) UUID string, like str(uuid.uuid4()) but cheaper."""
+    raw = bytearray(os.urandom(16))
+    raw[6] = raw[6] & 0x0F | 0x40
+    raw[8] = raw[8] & 0x3F | 0x80
+    hex = raw.hex()
+    return f"{hex[:8]}-{hex[8:12]}-{hex[12:16]}-{hex[16:20]}-{hex[20:]}"
+
+def _check_text(type: str, category: str, description: str):
+    if "," in type or "," in category:
+        raise ValueError("Type and category cannot contain commas.")
+    if "\n" in type or "\n" in category or "\n" in description:
+        raise ValueError("Fields cannot contain line breaks.")
+
+@lru_cache(maxsize=4096)
+def _date_timestamp(date: str):
+    try:
+        return datetime.strptime(date, "%Y-%m-%d").strftime("%Y-%m-%d %H:%M:%S")
+    except ValueError:
+        raise ValueError("Invalid date format. Please use YYYY-MM-DD.") from None
+
+def transaction_line(type: str, category: str, amount: float, description: str, date: str = None, timestamp: str = None):
+    """Validates a new transaction and formats it as a ledger line with a fresh ID.
+
+    date is YYYY-MM-DD; without it the transaction is stamped with timestamp,
+    or the current time. Raises ValueError with a message for the user.
+    """
+    # inf, nan and amounts too large for paisa cannot be stored
+    if not math.isfinite(amount * 100):
+        raise ValueError(f"Invalid amount: {amount!r}.")
+    if amount <= 0:
+        raise ValueError("Amount must be positive.")
+    _check_text(type, category, description)
+    if date:
+        timestamp = _date_timestamp(date)
+    elif not timestamp:
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    amount_paisa = int(amount * 100)
+    return f"{new_id()},{timestamp},{type},{category},{amount_paisa},{description}\n"
+
+def imported_line(id, timestamp, type, category, amount_paisa, description):
+    """Validates and normalizes an imported transaction row and returns its ledger line.
+
+    The row has the exported layout: amounts are whole paisa and timestamps
+    are "YYYY-MM-DD HH:MM:SS" (a bare date means midnight). Raises ValueError
+    with a message for the user.
+    """
+    id, timestamp, type, category, description = (str(field).strip() for field in (id, timestamp, type, category, description))
+    if not id or "," in id or "\n" in id:
+        raise ValueError(f"Invalid ID: {id!r}.")
+    if id.startswith(TOMBSTONE.decode()):
+        # The ledger would read the line as a tombstone, not a transaction
+        raise ValueError(f"Invalid ID: {id!r}. IDs cannot start with {TOMBSTONE.decode()!r}.")
+    if len(timestamp) == 10:
+        timestamp += " 00:00:00"
+    try:
+        parse_timestamp_key(timestamp.encode())
+    except ValueError:
+        raise ValueError(f"Invalid timestamp: {timestamp!r}.") from None
+    if not type or not category:
+        raise ValueError("Type and category cannot be empty.")
+    _check_text(type, category, description)
+    amount = paisa(amount_paisa)
+    if amount <= 0:
+        raise ValueError("Amount must be positive.")
+    return f"{id},{timestamp},{type},{category},{amount},{description}\n"
+
+def paisa(amount):
+    """Parses a whole number of paisa from text or a JSON number."""
+    if isinstance(amount, float) and amount.is_integer():
+        amount = int(amount)
+    if isinstance(amount, bool) or not isinstance(amount, (int, str)):
+        raise ValueError(f"Invalid amount: {amount!r}.")
+    try:
+        return int(amount)
+    except ValueError:
+        raise ValueError(f"Invalid amount: {amount!r}. Amounts are whole paisa.") from None
@@ -1,17 +1,85 @@
+import importlib
 import typer
-from features.transactions import transactions
-from features.budgets import budgets
-from features.analytics import analytics
-from features.smart_assistant import smart_assistant
-from features.data_management import data_management
+from typer.core import TyperGroup
 
-app = typer.Typer()
+# Sub-apps by command name. Each module is imported only when its command
+# runs (or help lists it), so a command pays for its own imports only.
+SUBCOMMANDS = {
+    "transactions": "features.transactions.transactions",
+    "budgets": "features.budgets.budgets",
+    "analytics": "features.analytics.analytics",
+    "smart-assistant": "features.smart_assistant.smart_assistant",
+    "data": "features.data_management.data_management",
+    "ledgers": "features.ledgers.ledgers",
+}
 
-app.add_typer(transactions.app, name="transactions")
-app.add_typer(budgets.app, name="budgets")
-app.add_typer(analytics.app, name="analytics")
-app.add_typer(smart_assistant.app, name="smart-assistant")
-app.add_typer(data_management.app, name="data")
+
+class LazyGroup(TyperGroup):
+    """Command group that loads the SUBCOMMANDS sub-apps on first use."""
+
+    def list_commands(self, ctx):
+        return list(SUBCOMMANDS) + [name for name in super().list_commands(ctx) if name not in SUBCOMMANDS]
+
+    def get_command(self, ctx, name):
+        if name not in SUBCOMMANDS:
+            return super().get_command(ctx, name)
+        command = typer.main.get_group(importlib.import_module(SUBCOMMANDS[name]).app)
+        command.name = name
+        return command
+
+
+app = typer.Typer(cls=LazyGroup)
+
+# The callback makes the app a group even though its commands are added lazily
+@app.callback()
+def main(ctx: typer.Context,
+         profile: bool = typer.Option(False, "--profile", envvar="FINANCE_TRACKER_PROFILE",
+                                      help="Print time spent per phase (read, parse, aggregate, render, ...) and row counters when the command finishes."),
+         profile_json: str = typer.Option(None, envvar="FINANCE_TRACKER_PROFILE_JSON", help="Write the profile to this JSON file instead."),
+         cprofile: str = typer.Option(None, envvar="FINANCE_TRACKER_CPROFILE", help="Also write cProfile statistics for the command to this file."),
+         ledger: str = typer.Option(None, "--ledger", envvar="FINANCE_TRACKER_LEDGER",
+                                    help="Use the named ledger under ledgers/ (see `ledgers list`) instead of database/.")):
+    if ledger:
+        from features.ledger.workspaces import use_ledger
+        try:
+            use_ledger(ledger)
+        except (ValueError, FileNotFoundError) as e:
+            from rich.console import Console
+            Console(stderr=True).print(f"[bold red]Error:[/bold red] {e}")
+            raise typer.Exit(1)
+    if not (profile or profile_json or cprofile):
+        return
+    import sys
+    from features.profiling import profiler
+
+    stop = profiler.start(" ".join(sys.argv[1:]), cprofile)
+
+    def report():
+        result = stop()
+        if profile_json:
+            import json
+            with open(profile_json, "w") as f:
+                json.dump(result.to_dict(), f, indent=4)
+        elif profile:
+            profiler.print_summary(result)
+
+    ctx.call_on_close(report)
+
+@app.command()
+def serve(engine: str = typer.Option(None, help="Storage engine to load up front (text, binary, sqlite or partitioned); defaults to the configured one.")):
+    """Keep the ledger in memory and answer queries over a Unix socket until stopped with Ctrl+C."""
+    from rich.console import Console
+    from features.daemon.daemon import serve as run_daemon
+    from features.ledger.storage import storage_engine
+
+    console = Console()
+    try:
+        run_daemon(engine or storage_engine(), ready=lambda path: console.print(
+            f"[bold green]Serving the ledger on {path}.[/bold green] Commands will use it until you press Ctrl+C."))
+    except Exception as e:
+        console.print(f"[bold red]Error:[/bold red] {e}")
+        raise typer.Exit(1)
+    console.print("Daemon stopped.")
 
 if __name__ == "__main__":
-    app()
\ No newline at end of file
+    app()
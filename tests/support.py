@@ -0,0 +1,31 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+from features.ledger.ledger import DATABASE_DIR, clear_ledger_cache
+
+
+def line(id: str, timestamp: str, amount_paisa: int, type: str = "expense", category: str = "Food", description: str = "test"):
+    """Returns one text-format transaction line."""
+    return f"{id},{timestamp},{type},{category},{amount_paisa},{description}\n"
+
+
+class DatabaseTestCase(unittest.TestCase):
+    """Runs each test in a fresh working directory holding an empty database/ directory.
+
+    The storage engine comes from database/config.json, and the files are
+    read directly rather than through a daemon.
+    """
+
+    def setUp(self):
+        environment = mock.patch.dict(os.environ, {"FINANCE_TRACKER_DAEMON": "off"})
+        environment.start()
+        self.addCleanup(environment.stop)
+        os.environ.pop("FINANCE_TRACKER_STORAGE", None)
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.addCleanup(os.chdir, os.getcwd())
+        os.chdir(directory.name)
+        os.mkdir(DATABASE_DIR)
+        clear_ledger_cache()
+        self.addCleanup(clear_ledger_cache)
@@ -0,0 +1,66 @@
+import json
+import multiprocessing
+import os
+import unittest
+from unittest import mock
+from features.budgets.alerts import BudgetAlerts
+from features.ledger.storage import ENGINES
+from tests.support import DatabaseTestCase, line
+
+WRITERS = 4
+ROWS = 15
+BUDGET = 4000  # Food, in paisa: Warning from 2800, Over past 4000; the writers add 6000
+
+
+def add_rows(directory: str, engine: str, writer: int):
+    """Adds ROWS expenses one by one with budget alerts on, as separate `transactions add` runs would."""
+    os.chdir(directory)
+    storage = ENGINES[engine]()
+    for row in range(ROWS):
+        storage.append(line(f"w{writer}-{row}", f"2026-05-{row + 1:02d} 10:00:00", 100), observers=[BudgetAlerts(storage)])
+
+
+class BudgetAlertsTest(DatabaseTestCase):
+
+    def test_concurrent_adds_raise_each_alert_once(self):
+        for engine in ENGINES:
+            with self.subTest(engine=engine):
+                directory = os.path.join(os.getcwd(), engine)
+                os.makedirs(os.path.join(directory, "database"))
+                os.chdir(directory)
+                log = os.path.join(directory, "alerts.jsonl")
+                storage = ENGINES[engine]()
+                storage.replace("")
+                storage.write_budgets({"Food": BUDGET})
+                with mock.patch.dict(os.environ, {"FINANCE_TRACKER_ALERT_LOG": log}):
+                    writers = [multiprocessing.Process(target=add_rows, args=(directory, engine, writer)) for writer in range(WRITERS)]
+                    for writer in writers:
+                        writer.start()
+                    for writer in writers:
+                        writer.join()
+                self.assertEqual([writer.exitcode for writer in writers], [0] * WRITERS)
+                with open(log, "r") as f:
+                    alerts = [json.loads(entry) for entry in f]
+                self.assertEqual([(alert["status"], alert["spent"]) for alert in alerts],
+                                 [("Warning", "28.00"), ("Over", "41.00")])
+                os.chdir("..")
+
+    def test_batches_read_each_month_once_it_is_written(self):
+        for engine in ENGINES:
+            with self.subTest(engine=engine):
+                storage = ENGINES[engine]()
+                storage.replace(line("j1", "2026-01-05 10:00:00", 2500) + line("m1", "2026-03-05 10:00:00", 2000))
+                storage.write_budgets({"Food": BUDGET})
+                alerts = BudgetAlerts(storage)
+                with storage.batch() as commit:
+                    alerts.check(commit(line("f1", "2026-02-01 10:00:00", 3000) + line("j2", "2026-01-06 10:00:00", 400)
+                                        + line("s1", "2026-01-07 10:00:00", 9000, category="Travel")))
+                    self.assertEqual(len(alerts.spent), 2)  # March is read when a row of it is written
+                    alerts.check(commit(line("j3", "2026-01-08 10:00:00", 1200) + line("m2", "2026-03-06 10:00:00", 1000)))
+                self.assertEqual([(alert["transaction_id"], alert["status"], alert["spent"]) for alert in alerts.alerts],
+                                 [("f1", "Warning", "30.00"), ("j2", "Warning", "29.00"),
+                                  ("j3", "Over", "41.00"), ("m2", "Warning", "30.00")])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,119 @@
+import multiprocessing
+import os
+import unittest
+from features.ledger.storage import ENGINES
+from features.smart_assistant.anomalies import MIN_HISTORY, AnomalyDetector, stats_path
+from tests.support import DatabaseTestCase, line
+
+WRITERS = 4
+ROWS = 15
+
+
+def add_rows(directory: str, engine: str, writer: int):
+    """Adds ROWS transactions one by one with the anomaly check, as separate `transactions add` runs would."""
+    os.chdir(directory)
+    storage = ENGINES[engine]()
+    for row in range(ROWS):
+        storage.append(line(f"w{writer}-{row}", f"2026-05-{row + 1:02d} 10:00:00", 1000 + row), observers=[AnomalyDetector(storage)])
+
+
+def history(days: int = 20):
+    return "".join(line(f"h{day}", f"2026-04-{day + 1:02d} 10:00:00", 1000 + day % 3) for day in range(days))
+
+
+class AnomalyDetectorTest(DatabaseTestCase):
+
+    def saved(self, storage):
+        """Returns the saved statistics, or None if they are stale."""
+        detector = AnomalyDetector(storage)
+        return (detector.stats, detector.flagged) if detector.read() else None
+
+    def rebuilt(self, storage):
+        detector = AnomalyDetector(storage)
+        detector.build()
+        return detector.stats, detector.flagged
+
+    def assert_stats_equal(self, saved, rebuilt):
+        (stats, flagged), (expected, expected_flagged) = saved, rebuilt
+        self.assertEqual(flagged, expected_flagged)
+        self.assertEqual(stats.keys(), expected.keys())
+        for type in stats:
+            self.assertEqual(stats[type].keys(), expected[type].keys())
+            for category, (count, mean, m2, _) in stats[type].items():
+                self.assertEqual(count, expected[type][category][0])
+                self.assertAlmostEqual(mean, expected[type][category][1])
+                self.assertAlmostEqual(m2, expected[type][category][2], delta=1e-6 * max(1.0, m2))
+
+    def test_flags_an_outlier_after_enough_history(self):
+        for engine in ENGINES:
+            with self.subTest(engine=engine):
+                storage = ENGINES[engine]()
+                storage.replace(history(MIN_HISTORY))
+                detector = AnomalyDetector(storage)
+                storage.append(line("big", "2026-05-01 10:00:00", 90000), observers=[detector])
+                self.assertEqual([anomaly["id"] for anomaly in detector.found], ["big"])
+                self.assertEqual(detector.found[0]["reason"], "outlier")
+                self.assertIsNotNone(self.saved(storage))
+                os.remove(stats_path())
+
+    def test_concurrent_adds_keep_the_statistics_current(self):
+        for engine in ENGINES:
+            with self.subTest(engine=engine):
+                directory = os.path.join(os.getcwd(), engine)
+                os.makedirs(os.path.join(directory, "database"))
+                os.chdir(directory)
+                ENGINES[engine]().replace(history())
+                writers = [multiprocessing.Process(target=add_rows, args=(directory, engine, writer)) for writer in range(WRITERS)]
+                for writer in writers:
+                    writer.start()
+                for writer in writers:
+                    writer.join()
+                self.assertEqual([writer.exitcode for writer in writers], [0] * WRITERS)
+
+                storage = ENGINES[engine]()
+                saved = self.saved(storage)
+                self.assertIsNotNone(saved)
+                self.assertEqual(saved[0]["expense"]["Food"][0], 20 + WRITERS * ROWS)
+                self.assert_stats_equal(saved, self.rebuilt(storage))
+                os.chdir("..")
+
+    def test_delete_takes_rows_out_of_the_statistics(self):
+        for engine in ENGINES:
+            with self.subTest(engine=engine):
+                storage = ENGINES[engine]()
+                storage.replace(history() + line("big", "2026-05-01 10:00:00", 90000) + line("solo", "2026-05-02 10:00:00", 5, category="Gifts"))
+                AnomalyDetector(storage).load()
+                removed = AnomalyDetector(storage).delete("h3", "h7", "big", "solo")
+                self.assertEqual(len(removed), 4)
+                saved = self.saved(storage)
+                self.assertIsNotNone(saved)
+                self.assertNotIn("Gifts", saved[0]["expense"])
+                self.assertEqual(saved[1], [])
+                self.assert_stats_equal(saved, self.rebuilt(storage))
+                os.remove(stats_path())
+
+    def test_budget_changes_keep_the_statistics(self):
+        for engine in ENGINES:
+            with self.subTest(engine=engine):
+                storage = ENGINES[engine]()
+                storage.replace(history())
+                AnomalyDetector(storage).load()
+                storage.write_budgets({"Food": 500000})
+                self.assertIsNotNone(self.saved(storage))
+                storage.append(line("late", "2026-05-01 10:00:00", 1000))
+                self.assertIsNone(self.saved(storage))
+                os.remove(stats_path())
+
+    def test_flagged_rows_are_kept_in_timestamp_order(self):
+        storage = ENGINES["text"]()
+        storage.replace(history())
+        detector = AnomalyDetector(storage)
+        with detector.writing(), storage.batch() as commit:
+            detector.check(commit(line("later", "2026-06-01 10:00:00", 90000)))
+            detector.check(commit(line("backdated", "2026-05-01 10:00:00", 95000)))
+        flagged = [anomaly["id"] for anomaly in AnomalyDetector(storage).load().flagged]
+        self.assertEqual(flagged, ["backdated", "later"])
+
+
+if __name__ == "__main__":
+    unittest.main()
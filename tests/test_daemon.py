@@ -0,0 +1,68 @@
+import asyncio
+import threading
+import unittest
+from features.daemon.client import MAX_PAGE, DaemonClient, DaemonStorage, socket_path
+from features.daemon.daemon import Resident, _handle
+from features.ledger.storage import TextStorage
+from tests.support import DatabaseTestCase, line
+
+ROWS = "".join(line(f"id{n}", f"2026-01-{n + 1:02d} 10:00:00", n + 1) for n in range(5))
+
+
+class ResidentTest(DatabaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        TextStorage().replace(ROWS)
+        self.resident = Resident()
+
+    def test_listings_are_answered_and_kept(self):
+        rows = self.resident.query("text", "latest", {"limit": 2, "offset": 1})
+        self.assertEqual([row[0] for row in rows], ["id3", "id2"])
+        self.assertEqual(len(self.resident.results["text"]), 1)
+
+    def test_unbounded_listings_are_refused(self):
+        for limit in (None, MAX_PAGE + 1):
+            with self.subTest(limit=limit):
+                with self.assertRaises(ValueError):
+                    self.resident.query("text", "latest", {"limit": limit})
+        self.assertEqual(len(self.resident.results["text"]), 0)
+
+
+class DaemonStorageTest(DatabaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        TextStorage().replace(ROWS)
+        self.resident = Resident()
+        self.addCleanup(self.resident.close)
+        loop = asyncio.new_event_loop()
+        server = loop.run_until_complete(asyncio.start_unix_server(
+            lambda reader, writer: _handle(self.resident, reader, writer), path=socket_path()))
+        thread = threading.Thread(target=loop.run_forever)
+        thread.start()
+
+        def stop():
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join()
+            server.close()
+            loop.run_until_complete(server.wait_closed())
+            loop.close()
+        self.addCleanup(stop)
+        client = DaemonClient().connect()
+        self.addCleanup(client.close)
+        self.storage = DaemonStorage(TextStorage(), "text", client)
+
+    def test_short_listings_come_from_the_daemon(self):
+        self.assertEqual([row[0] for row in self.storage.latest(limit=2)], ["id4", "id3"])
+        self.assertEqual(len(self.resident.results.get("text", {})), 1)
+
+    def test_long_listings_are_read_from_the_files(self):
+        for limit in (None, MAX_PAGE + 1):
+            with self.subTest(limit=limit):
+                self.assertEqual([row[0] for row in self.storage.latest(limit=limit)], ["id4", "id3", "id2", "id1", "id0"])
+        self.assertEqual(self.resident.results.get("text", {}), {})
+
+
+if __name__ == "__main__":
+    unittest.main()
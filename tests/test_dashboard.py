@@ -0,0 +1,31 @@
+import unittest
+from dashboard.loaders import month_totals, recent_frame
+from features.ledger.storage import TextStorage
+from features.ledger.timecodec import month_key
+from tests.support import DatabaseTestCase, line
+
+
+class LoadersTest(DatabaseTestCase):
+
+    def test_frames_come_from_storage_queries(self):
+        storage = TextStorage()
+        storage.replace(line("a", "2026-01-05 10:00:00", 100) + line("b", "2026-01-06 10:00:00", 5000, "income", "Salary")
+                        + line("c", "2026-01-07 10:00:00", 250) + line("d", "2026-02-01 10:00:00", 75))
+        totals = month_totals(storage, month_key(2026, 1))
+        self.assertEqual({type: amounts.to_dict() for type, amounts in totals.items()},
+                         {"expense": {"Food": 350}, "income": {"Salary": 5000}})
+        recent = recent_frame(storage, 2)
+        self.assertEqual(list(recent["ID"]), ["d", "c"])
+        self.assertEqual(list(recent["Amount"]), [75, 250])
+        self.assertEqual(str(recent["Amount"].dtype), "int64")
+
+    def test_missing_ledger_gives_empty_frames(self):
+        storage = TextStorage()
+        self.assertEqual(month_totals(storage, month_key(2026, 1)), {})
+        recent = recent_frame(storage)
+        self.assertTrue(recent.empty)
+        self.assertEqual(list(recent.columns), ["ID", "Timestamp", "Type", "Category", "Amount", "Description"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,56 @@
+import json
+import os
+import unittest
+from typer.testing import CliRunner
+from features.data_management.data_management import app
+from features.ledger.storage import ENGINES
+from tests.support import DatabaseTestCase, line
+
+ROWS = (line("a", "2026-01-05 10:00:00", 100, "Expense") + line("b", "2026-01-06 10:00:00", 200, "income", "Salary")
+        + line("c", "2026-01-07 10:00:00", 300, "expense"))
+
+
+class ExportTest(DatabaseTestCase):
+
+    def export(self, *options):
+        result = CliRunner().invoke(app, ["export", "transactions", "jsonl", "--path", "out.jsonl", *options])
+        self.assertEqual(result.exit_code, 0, result.output)
+        if not os.path.exists("out.jsonl"):
+            return []
+        with open("out.jsonl") as f:
+            ids = [json.loads(line)["ID"] for line in f]
+        os.remove("out.jsonl")
+        return ids
+
+    def test_type_is_matched_ignoring_case_on_every_engine(self):
+        for engine in ENGINES:
+            with self.subTest(engine=engine):
+                os.environ["FINANCE_TRACKER_STORAGE"] = engine
+                ENGINES[engine]().replace(ROWS)
+                self.assertEqual(self.export("--type", "expense"), ["a", "c"])
+                self.assertEqual(self.export("--type", "EXPENSE", "--category", "Food"), ["a", "c"])
+                self.assertEqual(self.export("--type", "Income", "--from", "2026-01-06"), ["b"])
+
+    def test_parallel_export_matches_type_ignoring_case(self):
+        os.environ["FINANCE_TRACKER_STORAGE"] = "text"
+        ENGINES["text"]().replace(ROWS)
+        self.assertEqual(self.export("--type", "Expense", "--jobs", "2"), ["a", "c"])
+
+    def test_serial_and_parallel_exports_write_the_same_file(self):
+        os.environ["FINANCE_TRACKER_STORAGE"] = "text"
+        ENGINES["text"]().replace(ROWS)
+        for format in ("csv", "json", "jsonl"):
+            with self.subTest(format=format):
+                outputs = []
+                for jobs in ("1", "2"):
+                    result = CliRunner().invoke(app, ["export", "transactions", format, "--path", f"out.{format}", "--jobs", jobs])
+                    self.assertEqual(result.exit_code, 0, result.output)
+                    with open(f"out.{format}", "rb") as f:
+                        outputs.append(f.read())
+                self.assertEqual(outputs[0], outputs[1])
+        with open("out.json") as f:
+            self.assertEqual([item["ID"] for item in json.load(f)], ["a", "b", "c"])
+
+
+if __name__ == "__main__":
+    unittest.main()
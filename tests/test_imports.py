@@ -0,0 +1,64 @@
+import io
+import json
+import unittest
+from typer.testing import CliRunner
+from features.data_management.data_management import app
+from features.data_management.readers import read_json
+from features.ledger.storage import TextStorage
+from features.transactions.validation import imported_line
+from tests.support import DatabaseTestCase
+
+
+def items(text: str):
+    return [value for _, value in read_json(io.StringIO(text))]
+
+
+class ReadJsonTest(unittest.TestCase):
+
+    def test_array_items_are_read_one_at_a_time(self):
+        self.assertEqual(items('[{"a": 1}, [2, 3], "x"]'), [{"a": 1}, [2, 3], "x"])
+        self.assertEqual(items(" [ ] "), [])
+
+    def test_trailing_comma_is_rejected_like_json_load(self):
+        for text in ('[{"a": 1},]', "[1, 2 , ]", "[,]"):
+            with self.subTest(text=text):
+                with self.assertRaises(ValueError):
+                    json.loads(text)
+                with self.assertRaises(ValueError):
+                    items(text)
+
+
+class ImportedLineTest(unittest.TestCase):
+
+    def test_valid_row_becomes_a_ledger_line(self):
+        self.assertEqual(imported_line(" abc ", "2026-01-05", "expense", "Food", "1500", "lunch"),
+                         "abc,2026-01-05 00:00:00,expense,Food,1500,lunch\n")
+
+    def test_ids_cannot_start_with_the_tombstone_marker(self):
+        for id in ("!5", "!0", " !abc"):
+            with self.subTest(id=id):
+                with self.assertRaises(ValueError):
+                    imported_line(id, "2026-01-05 10:00:00", "expense", "Food", 100, "")
+
+
+class ImportTest(DatabaseTestCase):
+
+    def test_rows_with_tombstone_ids_are_rejected(self):
+        with open("input.csv", "w") as f:
+            f.write("ID,Timestamp,Type,Category,Amount,Description\n"
+                    "!5,2026-01-05 10:00:00,expense,Food,100,bad\n"
+                    "abc,2026-01-06 10:00:00,expense,Food,200,good\n")
+        result = CliRunner().invoke(app, ["import-data", "transactions", "csv", "--path", "input.csv", "--restart",
+                                          "--no-alerts", "--no-anomalies"])
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertEqual([row[0] for row in TextStorage().iter_rows()], ["abc"])
+        with open("input.csv.rejected.jsonl") as f:
+            rejected = [json.loads(line) for line in f]
+        self.assertEqual(len(rejected), 1)
+        self.assertIn("!5", json.dumps(rejected[0]))
+        with open(TextStorage().path) as f:
+            self.assertNotIn("!5", f.read())
+
+
+if __name__ == "__main__":
+    unittest.main()
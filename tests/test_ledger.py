@@ -0,0 +1,161 @@
+import os
+import unittest
+from features.ledger.idindex import IdIndex, MIN_CAPACITY, index_path, load_index
+from features.ledger.ledger import Ledger, fingerprint, tombstone_line
+from features.ledger.storage import BinaryStorage, TextStorage
+from tests.support import DatabaseTestCase, line
+
+
+class TombstoneTest(unittest.TestCase):
+
+    def test_tombstoned_rows_are_dropped(self):
+        first, second = line("a1", "2026-01-05 10:00:00", 100), line("b2", "2026-01-06 10:00:00", 200)
+        data = (first + second).encode() + tombstone_line(0)
+        ledger = Ledger().parse(data)
+        self.assertEqual(len(ledger), 1)
+        self.assertEqual(ledger.id(0), "b2")
+        self.assertEqual(ledger.position(0), len(first))
+        self.assertEqual(ledger.tombstones, {0})
+        self.assertEqual(ledger.malformed, [])
+
+    def test_unreadable_tombstone_is_malformed(self):
+        ledger = Ledger().parse((line("a1", "2026-01-05 10:00:00", 100) + "!abc\n").encode())
+        self.assertEqual(len(ledger), 1)
+        self.assertEqual(ledger.malformed, ["!abc"])
+
+    def test_extend_renumbers_rows_after_a_tombstone(self):
+        lines = [line(f"id{n}", f"2026-01-0{n + 1} 10:00:00", (n + 1) * 100) for n in range(3)]
+        ledger = Ledger().parse("".join(lines).encode())
+        before = ledger.copy()
+        extended = ledger.copy().extend(tombstone_line(len(lines[0])))
+        self.assertEqual(extended.version, ledger.version + 1)
+        self.assertEqual([extended.id(row) for row in range(len(extended))], ["id0", "id2"])
+        self.assertEqual(list(extended.amounts), [100, 300])
+        self.assertEqual(extended.row(1), ("id2", "2026-01-03 10:00:00", "expense", "Food", 300, "test"))
+        # The ledger it was copied from keeps every row
+        self.assertEqual([ledger.id(row) for row in range(len(ledger))], [before.id(row) for row in range(len(before))])
+
+    def test_keep_drops_unlisted_rows_from_every_column(self):
+        ledger = Ledger().parse("".join([
+            line("a", "2026-01-01 10:00:00", 1, "income", "Salary"),
+            line("b", "2026-02-01 10:00:00", 2),
+            line("c", "2026-03-01 10:00:00", 3, "expense", "Rent"),
+        ]).encode())
+        ledger._keep([0, 2])
+        self.assertEqual(len(ledger), 2)
+        for name in Ledger._row_columns:
+            self.assertEqual(len(getattr(ledger, name)), 2, name)
+        self.assertEqual([ledger.row(row)[:5] for row in range(2)], [
+            ("a", "2026-01-01 10:00:00", "income", "Salary", 1),
+            ("c", "2026-03-01 10:00:00", "expense", "Rent", 3),
+        ])
+
+
+class IdIndexTest(DatabaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.path = os.path.join("database", "transactions.txt")
+        with open(self.path, "w") as f:
+            f.write(line("a1", "2026-01-05 10:00:00", 100))
+
+    def index(self):
+        index = IdIndex(self.path)
+        index._create(MIN_CAPACITY)
+        self.addCleanup(index.close)
+        return index
+
+    def test_duplicated_ids_keep_every_position(self):
+        index = self.index()
+        index.put("a1", 40)
+        index.put("a1", 0)
+        index.put("b2", 80)
+        self.assertEqual(index.positions("a1"), [0, 40])
+        index.remove("a1", 40)
+        self.assertEqual(index.positions("a1"), [0])
+        self.assertEqual(index.positions("b2"), [80])
+        self.assertEqual(index.positions("missing"), [])
+        self.assertEqual(index.count, 2)
+
+    def test_growing_keeps_entries(self):
+        index = self.index()
+        for n in range(MIN_CAPACITY):
+            index.put(f"id{n}", n)
+        self.assertGreater(index.capacity, MIN_CAPACITY)
+        self.assertTrue(all(index.positions(f"id{n}") == [n] for n in range(MIN_CAPACITY)))
+
+    def test_put_many_fills_an_empty_or_used_table(self):
+        index = IdIndex(self.path)
+        self.addCleanup(index.close)
+        index.put_many([("a1", 0), ("a1", 7), ("b2", 3)])
+        self.assertEqual(index.positions("a1"), [0, 7])
+        index.put_many([("b2", 9), ("c3", 12)])
+        self.assertEqual(index.positions("b2"), [3, 9])
+        self.assertEqual(index.positions("c3"), [12])
+
+    def test_stale_index_is_rebuilt(self):
+        index = load_index(self.path)
+        self.assertEqual(index.positions("a1"), [0])
+        index.close()
+        with open(self.path, "a") as f:
+            f.write(line("b2", "2026-01-06 10:00:00", 200))
+        index = load_index(self.path)
+        self.addCleanup(index.close)
+        self.assertEqual(index.fingerprint, fingerprint(self.path))
+        self.assertEqual(index.positions("b2"), [len(line("a1", "2026-01-05 10:00:00", 100))])
+
+    def test_unreadable_index_is_rebuilt(self):
+        with open(index_path(self.path), "wb") as f:
+            f.write(b"not an index")
+        index = load_index(self.path)
+        self.addCleanup(index.close)
+        self.assertEqual(index.positions("a1"), [0])
+
+
+class DeleteTest(DatabaseTestCase):
+    engines = (TextStorage, BinaryStorage)
+
+    def stored(self, storage):
+        ledger = storage.load()
+        return [ledger.id(row) for row in range(len(ledger))]
+
+    def test_delete_removes_every_row_of_a_duplicated_id(self):
+        for engine in self.engines:
+            with self.subTest(engine=engine.__name__):
+                storage = engine()
+                storage.replace(line("dup", "2026-01-05 10:00:00", 100) + line("keep", "2026-01-06 10:00:00", 200))
+                storage.append(line("dup", "2026-01-07 10:00:00", 300))
+                removed = storage.delete("dup")
+                self.assertEqual(sorted(removed.amounts), [100, 300])
+                self.assertEqual(self.stored(storage), ["keep"])
+                self.assertEqual(storage.find("dup"), [])
+                self.assertEqual(storage.history_totals(), {storage.load().months[0]: {"expense": {"Food": 200}}})
+
+    def test_delete_by_prefix(self):
+        for engine in self.engines:
+            with self.subTest(engine=engine.__name__):
+                storage = engine()
+                storage.replace(line("abc123", "2026-01-05 10:00:00", 100) + line("def456", "2026-01-06 10:00:00", 200))
+                self.assertEqual(len(storage.delete("abc")), 1)
+                self.assertEqual(self.stored(storage), ["def456"])
+
+    def test_compact_drops_deleted_rows_and_reindexes(self):
+        for engine in self.engines:
+            with self.subTest(engine=engine.__name__):
+                storage = engine()
+                storage.replace("".join(line(f"id{n}", f"2026-01-{n + 1:02d} 10:00:00", n + 1) for n in range(10)))
+                storage.delete("id0", "id4", "id9")
+                kept = [storage.load().row(row) for row in range(7)]
+                self.assertGreater(storage.compact(), 0)
+                ledger = storage.load()
+                self.assertEqual([ledger.row(row) for row in range(len(ledger))], kept)
+                self.assertEqual(ledger.tombstones, set())
+                index = load_index(storage.path)
+                self.assertTrue(all(index.positions(ledger.id(row)) == [ledger.position(row)] for row in range(len(ledger))))
+                index.close()
+                self.assertEqual(storage.delete("id5").id(0), "id5")
+                self.assertEqual(len(storage.load()), 6)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,136 @@
+import fcntl
+import multiprocessing
+import os
+import unittest
+from features.ledger.locking import atomic_write, group_sync, lock_path, locked, record_commit
+from features.ledger.rollup import Rollup, load_rollup
+from features.ledger.storage import ENGINES
+from tests.support import DatabaseTestCase, line
+
+WRITERS = 4
+ROWS = 25  # Appended by each writer, one at a time
+
+
+def append_rows(directory: str, engine: str, writer: int):
+    """Appends ROWS transactions one by one, syncing every other one, as separate `transactions add` runs would."""
+    os.chdir(directory)
+    storage = ENGINES[engine]()
+    for row in range(ROWS):
+        storage.append(line(f"w{writer}-{row}", f"2026-{row % 12 + 1:02d}-10 10:00:00", row + 1), fsync=row % 2 == 0)
+
+
+class LockTest(DatabaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.path = os.path.join("database", "transactions.txt")
+
+    def held_elsewhere(self, shared: bool = False):
+        """Whether another open file description would wait for the lock; flock locks belong to the open file."""
+        with open(lock_path(self.path), "a+b") as f:
+            try:
+                fcntl.flock(f.fileno(), (fcntl.LOCK_SH if shared else fcntl.LOCK_EX) | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return True
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            return False
+
+    def test_exclusive_lock_is_reentrant(self):
+        with locked(self.path):
+            with locked(self.path), locked(self.path, shared=True):
+                self.assertTrue(self.held_elsewhere(shared=True))
+            # Leaving the inner blocks keeps the outer lock
+            self.assertTrue(self.held_elsewhere(shared=True))
+        self.assertFalse(self.held_elsewhere())
+
+    def test_shared_lock_admits_other_readers(self):
+        with locked(self.path, shared=True), locked(self.path, shared=True):
+            self.assertFalse(self.held_elsewhere(shared=True))
+            self.assertTrue(self.held_elsewhere())
+        self.assertFalse(self.held_elsewhere())
+
+    def test_writing_inside_a_shared_lock_is_refused(self):
+        with locked(self.path, shared=True):
+            with self.assertRaises(RuntimeError):
+                with locked(self.path):
+                    pass
+            # The shared lock is still held after the refusal
+            self.assertTrue(self.held_elsewhere())
+        self.assertFalse(self.held_elsewhere())
+
+    def test_lock_is_released_when_the_block_raises(self):
+        with self.assertRaises(ValueError):
+            with locked(self.path):
+                raise ValueError
+        self.assertFalse(self.held_elsewhere())
+
+
+class AtomicWriteTest(DatabaseTestCase):
+
+    def test_replaces_the_file_when_the_block_finishes(self):
+        path = os.path.join("database", "budgets.txt")
+        with open(path, "w") as f:
+            f.write("old")
+        with atomic_write(path, "w", sync=True) as f:
+            f.write("new")
+            with open(path) as current:
+                self.assertEqual(current.read(), "old")
+        with open(path) as f:
+            self.assertEqual(f.read(), "new")
+
+    def test_leaves_the_file_when_the_block_raises(self):
+        path = os.path.join("database", "budgets.txt")
+        with open(path, "w") as f:
+            f.write("old")
+        with self.assertRaises(ValueError):
+            with atomic_write(path, "w") as f:
+                f.write("partial")
+                raise ValueError
+        with open(path) as f:
+            self.assertEqual(f.read(), "old")
+        self.assertEqual(os.listdir("database"), ["budgets.txt"])
+
+
+class GroupSyncTest(DatabaseTestCase):
+
+    def test_one_sync_covers_every_commit_written_before_it(self):
+        path = os.path.join("database", "transactions.txt")
+        with open(path, "w") as f:
+            f.write(line("a", "2026-01-01 10:00:00", 1))
+        first, second = record_commit(path), record_commit(path)
+        self.assertEqual((first, second), (1, 2))
+        # The later writer's sync covers the earlier one's commit too
+        self.assertTrue(group_sync(path, second, [path]))
+        self.assertFalse(group_sync(path, first, [path]))
+        self.assertFalse(group_sync(path, second, [path]))
+        third = record_commit(path)
+        self.assertTrue(group_sync(path, third, [path]))
+
+
+class ConcurrentWritersTest(DatabaseTestCase):
+
+    def test_concurrent_appends_keep_every_row(self):
+        for engine in ENGINES:
+            with self.subTest(engine=engine):
+                directory = os.path.join(os.getcwd(), engine)
+                os.makedirs(os.path.join(directory, "database"))
+                writers = [multiprocessing.Process(target=append_rows, args=(directory, engine, writer)) for writer in range(WRITERS)]
+                for writer in writers:
+                    writer.start()
+                for writer in writers:
+                    writer.join()
+                self.assertEqual([writer.exitcode for writer in writers], [0] * WRITERS)
+
+                os.chdir(directory)
+                storage = ENGINES[engine]()
+                expected = {f"w{writer}-{row}" for writer in range(WRITERS) for row in range(ROWS)}
+                self.assertEqual(sorted(row[0] for row in storage.iter_rows()), sorted(expected))
+                # Found through the ID index on the text and binary engines
+                self.assertTrue(all(storage.find(id) for id in expected))
+                if engine in ("text", "binary"):
+                    self.assertEqual(load_rollup(storage.path).totals, Rollup.build(storage.path).totals)
+                os.chdir("..")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,130 @@
+import gzip
+import json
+import os
+import unittest
+from typer.testing import CliRunner
+from features.data_management.data_management import app
+from features.ledger.partitions import COMPRESSED, Manifest, manifest_path, partition_month, partition_name
+from features.ledger.storage import PartitionedStorage, TextStorage, storage_engine
+from features.ledger.timecodec import current_month_key, format_timestamp, month_bounds, month_key
+from tests.support import DatabaseTestCase, line
+
+CURRENT = current_month_key()
+NOW = format_timestamp(month_bounds(CURRENT)[0] + 3600)  # In the current month, whose partition stays open
+
+ROWS = (
+    line("a", "2025-01-05 10:00:00", 100)
+    + line("b", "2025-01-20 10:00:00", 250, "income", "Salary")
+    + line("c", "2025-03-02 10:00:00", 75, category="Travel")
+    + line("d", NOW, 40)
+)
+
+
+def rows_of(storage):
+    return sorted(storage.iter_rows())
+
+def rows_of_text(text: str):
+    return sorted(tuple(int(field) if number == 4 else field for number, field in enumerate(row.split(",", 5)))
+                  for row in text.splitlines())
+
+
+class PartitionNameTest(unittest.TestCase):
+
+    def test_names_round_trip(self):
+        month = month_key(2026, 9)
+        self.assertEqual(partition_name(month), "2026-09")
+        self.assertEqual(partition_month("2026-09"), month)
+        self.assertEqual(partition_month("2026-09" + COMPRESSED), month)
+
+    def test_other_files_are_not_partitions(self):
+        for name in ("manifest.json", "2026-13", "2026-9", "26-09", "2026-09.tmp", "abcd-ef"):
+            self.assertIsNone(partition_month(name), name)
+
+
+class PartitionedStorageTest(DatabaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.storage = PartitionedStorage()
+        self.storage.replace(ROWS)
+
+    def test_rows_go_to_their_months_and_closed_months_are_compressed(self):
+        self.assertEqual(sorted(os.listdir(self.storage.path)),
+                         sorted(["2025-01" + COMPRESSED, "2025-03" + COMPRESSED, partition_name(CURRENT), "manifest.json"]))
+        with gzip.open(os.path.join(self.storage.path, "2025-01" + COMPRESSED), "rt") as f:
+            self.assertEqual(f.read(), "".join(ROWS.splitlines(keepends=True)[:2]))
+        self.assertEqual(rows_of(self.storage), rows_of_text(ROWS))
+
+    def test_manifest_keeps_counts_and_totals(self):
+        manifest = Manifest.load(self.storage.path)
+        january = manifest.entries[month_key(2025, 1)]
+        self.assertEqual((january["file"], january["rows"]), ("2025-01" + COMPRESSED, 2))
+        self.assertEqual(january["totals"], {"expense": {"Food": 100}, "income": {"Salary": 250}})
+        self.assertEqual(self.storage.month_totals(month_key(2025, 3)), {"expense": {"Travel": 75}})
+        self.assertEqual(self.storage.month_totals(month_key(2025, 2)), {})
+        self.assertEqual(sorted(self.storage.history_totals()), [month_key(2025, 1), month_key(2025, 3), CURRENT])
+
+    def test_appends_to_a_closed_month_are_read_back(self):
+        self.storage.append(line("e", "2025-01-25 10:00:00", 5) + line("f", NOW, 6))
+        self.assertEqual(self.storage.month_totals(month_key(2025, 1)), {"expense": {"Food": 105}, "income": {"Salary": 250}})
+        self.assertEqual([row[0] for row in self.storage.find("e")], ["e"])
+        entry = Manifest.load(self.storage.path).entries[month_key(2025, 1)]
+        self.assertTrue(entry["appended"])
+        # compact() rewrites the appended month as a single gzip member
+        self.storage.compact()
+        self.assertFalse(Manifest.load(self.storage.path).entries[month_key(2025, 1)]["appended"])
+        self.assertEqual(len(rows_of(self.storage)), 6)
+
+    def test_delete_rewrites_only_the_months_it_touches(self):
+        march = os.path.join(self.storage.path, "2025-03" + COMPRESSED)
+        untouched = os.stat(march).st_mtime_ns
+        self.assertEqual(self.storage.delete("a").id(0), "a")
+        self.assertEqual(os.stat(march).st_mtime_ns, untouched)
+        self.assertEqual(self.storage.month_totals(month_key(2025, 1)), {"income": {"Salary": 250}})
+        # Deleting a month's last row removes its partition
+        self.storage.delete("c")
+        self.assertFalse(os.path.exists(march))
+        self.assertNotIn(month_key(2025, 3), self.storage.history_totals())
+
+    def test_unreadable_manifest_is_rebuilt_from_the_partitions(self):
+        expected = Manifest.load(self.storage.path).entries
+        with open(manifest_path(self.storage.path), "w") as f:
+            f.write("{\"partitions\": ")
+        self.assertEqual(self.storage.history_totals(), {month: entry["totals"] for month, entry in expected.items()})
+        with open(manifest_path(self.storage.path)) as f:
+            self.assertEqual(len(json.load(f)["partitions"]), 3)
+
+    def test_partition_edited_by_hand_is_rescanned(self):
+        with open(os.path.join(self.storage.path, partition_name(CURRENT)), "a") as f:
+            f.write(line("g", NOW, 1000))
+        self.assertEqual(self.storage.month_totals(CURRENT), {"expense": {"Food": 1040}})
+        self.assertEqual(Manifest.load(self.storage.path).entries[CURRENT]["rows"], 2)
+
+
+class RepartitionTest(DatabaseTestCase):
+
+    def test_round_trip_through_partitions_keeps_every_row(self):
+        text = TextStorage()
+        text.replace(ROWS)
+        text.delete("b")
+        expected = rows_of(text)
+
+        result = CliRunner().invoke(app, ["repartition", "--from", "text"])
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn("Split 3 transactions into 3 monthly partitions", result.output)
+        self.assertEqual(storage_engine(), "partitioned")
+        self.assertEqual(rows_of(PartitionedStorage()), expected)
+
+        # Repartitioning the partitions rebuilds them unchanged
+        result = CliRunner().invoke(app, ["repartition", "--no-switch"])
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertEqual(rows_of(PartitionedStorage()), expected)
+
+        os.remove(text.path)
+        result = CliRunner().invoke(app, ["migrate", "text", "--from", "partitioned"])
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertEqual(rows_of(TextStorage()), expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,35 @@
+import unittest
+from features.ledger.storage import SQLiteStorage
+from tests.support import DatabaseTestCase, line
+
+
+class SQLiteLedgerTest(DatabaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.storage = SQLiteStorage()
+        self.storage.replace(line("abc1", "2026-01-05 10:00:00", 100) + line("def2", "2026-01-06 10:00:00", 200)
+                             + line("abc3", "2026-01-07 10:00:00", 300))
+        self.storage.delete("def2")
+        self.ledger = self.storage.load()
+        self.addCleanup(self.ledger.connection.close)
+
+    def test_rows_are_found_by_id_prefix(self):
+        self.assertEqual(list(self.ledger.find_all("abc")), [0, 1])
+        self.assertEqual(self.ledger.find("abc3"), 1)
+        self.assertIsNone(self.ledger.find("def"))
+        self.assertEqual([self.ledger.id(row) for row in range(len(self.ledger))], ["abc1", "abc3"])
+
+    def test_positions_are_seqs(self):
+        self.assertEqual([self.ledger.position(row) for row in range(len(self.ledger))], list(self.ledger.seqs))
+        self.assertEqual(self.ledger.row(1), ("abc3", "2026-01-07 10:00:00", "expense", "Food", 300, "test"))
+
+    def test_copy_keeps_the_seqs(self):
+        copy = self.ledger.copy()
+        copy._keep([1])
+        self.assertEqual(copy.id(0), "abc3")
+        self.assertEqual(len(self.ledger.seqs), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
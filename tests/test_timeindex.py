@@ -0,0 +1,113 @@
+import unittest
+from features.ledger.ledger import fingerprint
+from features.ledger.rollup import Rollup, load_rollup
+from features.ledger.storage import BinaryStorage, Storage, TextStorage
+from features.ledger.timecodec import parse_timestamp
+from features.ledger.timeindex import _ENTRY, _HEADER, DELETED, TimeIndex, load_timeindex, timeindex_path
+from tests.support import DatabaseTestCase, line
+
+ENGINES = (TextStorage, BinaryStorage)
+
+
+def epoch(timestamp: str):
+    return parse_timestamp(timestamp.encode())
+
+
+class TimeIndexTest(DatabaseTestCase):
+
+    def entries(self, storage):
+        """Returns the (epoch, position) entries of the storage's time index, deleted ones included."""
+        index = TimeIndex(storage.path).open()
+        try:
+            return [_ENTRY.unpack_from(index._mapped, _HEADER.size + number * _ENTRY.size) for number in range(index.count)]
+        finally:
+            index.close()
+
+    def assert_latest_matches(self, storage):
+        """Checks the indexed newest-first listing against the full-scan one, with and without filters."""
+        start, end = epoch("2026-02-01 00:00:00"), epoch("2026-05-01 00:00:00")
+        for arguments in ({}, {"start": start, "end": end}, {"type": "INCOME"}, {"start": start, "limit": 3, "offset": 2}):
+            with self.subTest(**arguments):
+                self.assertEqual(list(storage.latest(**arguments)), list(Storage.latest(storage, **arguments)))
+
+    def test_entries_are_sorted_by_time_then_position(self):
+        for engine in ENGINES:
+            with self.subTest(engine=engine.__name__):
+                storage = engine()
+                storage.replace(line("c", "2026-03-01 10:00:00", 3) + line("a", "2026-01-01 10:00:00", 1)
+                                + line("b", "2026-03-01 10:00:00", 2, "income", "Salary"))
+                ledger = storage.load()
+                self.assertEqual(self.entries(storage), sorted(zip(ledger.timestamps, map(ledger.position, range(3)))))
+                self.assertEqual([row[0] for row in storage.latest()], ["b", "c", "a"])
+
+    def test_range_finds_rows_by_bisection(self):
+        storage = TextStorage()
+        storage.replace("".join(line(f"m{month}", f"2026-{month:02d}-15 10:00:00", month) for month in range(1, 13)))
+        index = load_timeindex(storage.path)
+        self.addCleanup(index.close)
+        low, high = index.range(epoch("2026-03-01 00:00:00"), epoch("2026-06-01 00:00:00"))
+        self.assertEqual(high - low, 3)
+        self.assertEqual(index.range(epoch("2027-01-01 00:00:00")), (12, 12))
+        self.assertEqual(index.range(None, epoch("2026-01-01 00:00:00")), (0, 0))
+
+    def test_writes_keep_the_index_in_step(self):
+        for engine in ENGINES:
+            with self.subTest(engine=engine.__name__):
+                storage = engine()
+                storage.replace("".join(line(f"r{n}", f"2026-04-{n + 1:02d} 10:00:00", n + 1) for n in range(20)))
+                # In time order, appended; backdated, merged in
+                storage.append(line("late", "2026-06-01 10:00:00", 7, "income", "Salary"))
+                with storage.batch() as commit:
+                    commit(line("early", "2026-01-02 10:00:00", 5, "income", "Salary"))
+                    commit(line("mid", "2026-04-10 12:00:00", 9))
+                storage.delete("r3", "r11", "early")
+                self.assertIn(DELETED, [position for _, position in self.entries(storage)])
+                self.assert_latest_matches(storage)
+                storage.compact()
+                self.assertNotIn(DELETED, [position for _, position in self.entries(storage)])
+                self.assert_latest_matches(storage)
+
+
+class SidecarInvalidationTest(DatabaseTestCase):
+    """Sidecars carry the fingerprint of the file they describe and are rebuilt once it changes."""
+
+    def setUp(self):
+        super().setUp()
+        self.storage = TextStorage()
+        self.storage.replace(line("a", "2026-01-01 10:00:00", 100) + line("b", "2026-02-01 10:00:00", 200))
+
+    def edit_by_hand(self):
+        with open(self.storage.path, "a") as f:
+            f.write(line("c", "2026-01-15 10:00:00", 50))
+
+    def test_time_index_is_rebuilt_after_an_outside_edit(self):
+        self.edit_by_hand()
+        self.assertEqual([row[0] for row in self.storage.latest()], ["b", "c", "a"])
+        index = load_timeindex(self.storage.path)
+        self.addCleanup(index.close)
+        self.assertEqual(index.fingerprint, fingerprint(self.storage.path))
+        self.assertEqual(index.count, 3)
+
+    def test_unreadable_time_index_is_rebuilt(self):
+        with open(timeindex_path(self.storage.path), "wb") as f:
+            f.write(b"FTTIX001 but truncated")
+        self.assertEqual([row[0] for row in self.storage.latest()], ["b", "a"])
+
+    def test_id_index_and_rollup_are_rebuilt_after_an_outside_edit(self):
+        self.edit_by_hand()
+        self.assertEqual(self.storage.find("c")[0][4], 50)
+        self.assertEqual(load_rollup(self.storage.path).totals, Rollup.build(self.storage.path).totals)
+        january = self.storage.load().months[0]
+        self.assertEqual(self.storage.month_totals(january), {"expense": {"Food": 150}})
+
+    def test_writes_leave_the_time_index_current(self):
+        for write in (lambda: self.storage.append(line("d", "2026-03-01 10:00:00", 25)), lambda: self.storage.delete("a")):
+            write()
+            # Opened as saved, without the rebuild load_timeindex would make
+            index = TimeIndex(self.storage.path).open()
+            self.assertEqual(index.fingerprint, fingerprint(self.storage.path))
+            index.close()
+
+
+if __name__ == "__main__":
+    unittest.main()